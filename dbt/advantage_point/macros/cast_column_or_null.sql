@@ -0,0 +1,8 @@
+{% macro cast_column_or_null(column_name, column_name_list, data_type) %}
+    {#- cast column if it exists in the relation (column_name_list), otherwise a typed null -#}
+    {%- if column_name | lower in column_name_list -%}
+        cast({{ column_name }} as {{ data_type }})
+    {%- else -%}
+        cast(null as {{ data_type }})
+    {%- endif -%}
+{% endmacro %}
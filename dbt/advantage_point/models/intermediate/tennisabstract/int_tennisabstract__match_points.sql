@@ -1,12 +1,45 @@
+/*
+incremental: only matches with points (or match data) loaded since the last run are rebuilt
+- each rebuilt match replaces all of its points (delete+insert on match_url), so window functions see the whole match
+- loads that finished while the previous run was reading are picked up by the lookback (var: match_points_lookback_hours)
+- changes to seeds or to this model's logic need a full refresh (dbt build --full-refresh)
+- rally data is parsed at ingest; re-parsed points (backfill) are loaded as new record versions, so their matches are rebuilt too
+*/
+{{
+  config(
+    materialized='incremental',
+    unique_key='match_url',
+    incremental_strategy='delete+insert',
+    on_schema_change='append_new_columns',
+    indexes=[
+      {'columns': ['match_url']},
+    ]
+  )
+}}
+
 with
 
 matches as (
   select * from {{ ref('int_tennisabstract__matches') }}
 ),
 
+{% if is_incremental() %}
+-- get matches loaded since last run
+match_urls_changed as (
+  select match_url from {{ ref('stg_tennisabstract__match_points') }}
+  where loaded_at > (select coalesce(max(loaded_at), '-infinity') from {{ this }}) - interval '{{ var("match_points_lookback_hours", 1) }} hours'
+  union
+  select match_url from {{ ref('stg_tennisabstract__matches') }}
+  where loaded_at > (select coalesce(max(loaded_at), '-infinity') from {{ this }}) - interval '{{ var("match_points_lookback_hours", 1) }} hours'
+),
+{% endif %}
+
 match_points as (
   select * from {{ ref('stg_tennisabstract__match_points') }}
   where is_record_active = true
+  {% if is_incremental() %}
+    and match_url in (select match_url from match_urls_changed)
+  {% endif %}
 ),
 
 valid_match_point_descriptions as (
@@ -39,7 +72,27 @@ match_points_scores_split as (
       split_part(mp.point_score_in_game, '-', 2) as point_score_receiver,
 
       -- join in valid point descriptions
-      coalesce(valid_mp_point_desc.point_description_new, mp.point_description) as point_description
+      coalesce(valid_mp_point_desc.point_description_new, mp.point_description) as point_description,
+      mp.loaded_at,
+
+      -- rally data parsed at ingest (or parsed from the valid point description, if the point description is replaced)
+      -- points ingested before the parser have no rally data until backfilled (ingest.backfill_tennisabstract_point_descriptions)
+      case
+        when valid_mp_point_desc.point_description_new is not null then valid_mp_point_desc.number_of_shots_in_point
+        else mp.number_of_shots_in_point
+      end as number_of_shots_in_point,
+      case
+        when valid_mp_point_desc.point_description_new is not null then valid_mp_point_desc.point_result
+        else mp.point_result
+      end as point_result,
+      case
+        when valid_mp_point_desc.point_description_new is not null then valid_mp_point_desc.rally_length
+        else mp.rally_length
+      end as rally_length,
+      case
+        when valid_mp_point_desc.point_description_new is not null then valid_mp_point_desc.point_winner_rally_role
+        else mp.point_winner_rally_role
+      end as point_winner_rally_role
       
     from match_points as mp
     left join matches as m on mp.match_url = m.match_url
@@ -53,32 +106,19 @@ match_points_scores_split as (
       and mp.point_description = valid_mp_point_desc.point_description_old
 ),
 
--- nullify point descriptions
-match_points_point_descriptions as (
-  select
-    *,
-
-    -- nullify point_description if not valid
-      case
-        -- if no rally occurred/recorded
-        when point_description in ('Point penalty.', 'Unknown.') then null
-        -- if rally resulted in a 'challenge'
-        when point_description ilike '%challenge was incorrect%' then null
-        -- if rally does not contain an 'outcome' string
-        when not (point_description ilike any (array['%ace%', '%double fault%', '%forced error%', '%unforced error%', '%service winner%', '%winner%'])) then null
-        else point_description
-    end as point_description_new
-
-  from match_points_scores_split
-),
-
 -- add scores
+-- get point winner from rally
 match_points_scores_add as (
   select
     *,
     set_score_server + set_score_receiver + 1 as set_number_in_match,
-    game_score_server + game_score_receiver + 1 as game_number_in_set
-  from match_points_point_descriptions
+    game_score_server + game_score_receiver + 1 as game_number_in_set,
+    case
+      when point_winner_rally_role = 'server' then point_server
+      when point_winner_rally_role = 'receiver' then point_receiver
+      else null
+    end as point_winner_rally
+  from match_points_scores_split
 ),
 
 -- get running counts
@@ -91,106 +131,6 @@ match_points_running_numbers as (
   from match_points_scores_add
 ),
 
--- get number of shots (separated by ';')
-match_points_rally_shot_count as (
-  select
-    *,
-    array_length(
-      regexp_split_to_array(point_description_new, ';'),
-      1
-    ) as number_of_shots_in_point
-  from match_points_running_numbers
-),
-
--- get last shot in rally
-match_points_last_shot as (
-  select
-    *,
-    trim(
-      split_part(point_description_new, ';', number_of_shots_in_point)
-    ) as last_shot_in_point
-  from match_points_rally_shot_count
-),
-
--- get number of elements in last shot (separated by ',')
--- in case string contains multiple ',' like in the case of double faults (, fault, double fault)
-match_points_last_shot_count as (
-  select
-    *,
-    array_length(
-      regexp_split_to_array(last_shot_in_point, ','), 
-      1
-    ) as number_of_elements_in_last_shot
-  from match_points_last_shot
-),
-
--- get last shot outcome
--- last element in ',' separated string
--- get rid of any extra strings:
-    -- replace '.'
-    -- split string by '(' and get anything before '(...)'
-    -- if resulting string is '', make null
-match_points_outcome as (
-  select
-    *,
-    nullif(
-        trim(
-            split_part(
-                replace(
-                cast(split_part(last_shot_in_point, ',', number_of_elements_in_last_shot) as text),
-                '.',
-                ''
-                ),
-                '(',
-                1
-            )
-        ),
-        ''
-    )
-    as point_result
-  from match_points_last_shot_count
-),
-
--- get rally length
-match_points_rally_length as (
-  select
-    *,
-    -- calculate rally length
-    case
-      -- exclude 'errors'
-      when point_result in ('double fault', 'forced error', 'unforced error') then number_of_shots_in_point - 1
-      -- include 'winners'
-      when point_result in ('ace', 'service winner', 'winner') then number_of_shots_in_point
-      else null
-    end as rally_length
-  from match_points_outcome
-),
-
--- get point winner from rally
-match_points_winner_rally as (
-  select
-    *,
-    case
-      -- if odd length (server hit last shot)
-      when number_of_shots_in_point % 2 != 0 then
-        case
-          when point_result in ('ace', 'service winner', 'winner') then point_server
-          when point_result in ('double fault', 'forced error', 'unforced error') then point_receiver
-          else null
-        end
-      -- if even length (receiver hit last shot)
-      when number_of_shots_in_point % 2 = 0 then
-        case
-          when point_result in ('winner') then point_receiver
-          when point_result in ('forced error', 'unforced error') then point_server
-          else null
-        end
-      else null
-    end as point_winner_rally
-    
-  from match_points_rally_length
-),
-
 -- get point loser from rally
 match_points_loser_rally as (
   select
@@ -200,7 +140,7 @@ match_points_loser_rally as (
       when point_winner_rally != point_server then point_server
       else null
     end as point_loser_rally
-  from match_points_winner_rally
+  from match_points_running_numbers
 ),
 
 -------------------------------------------------------
@@ -416,7 +356,10 @@ final as (
     set_score_in_match,
     set_score_server,
     set_score_receiver,
-    set_number_in_match
+    set_number_in_match,
+
+    -- latest load of the match's points (incremental watermark)
+    max(loaded_at) over (partition by match_url) as loaded_at
     
   from match_points_side
 )
@@ -16,6 +16,128 @@ renamed as (
         point_description_new,
         notes
     from source
+),
+
+/*
+rally data parsed from the corrected point descriptions
+- same logic as the ingest parser (ingest.utils.functions.tennisabstract.point_descriptions), which parses all other points
+- the seed only holds a handful of rows, so parsing here is cheap
+*/
+
+-- nullify point descriptions
+point_descriptions as (
+  select
+    *,
+
+    -- nullify point_description if not valid
+    case
+        -- if no rally occurred/recorded
+        when point_description_new in ('Point penalty.', 'Unknown.') then null
+        -- if rally resulted in a 'challenge'
+        when point_description_new ilike '%challenge was incorrect%' then null
+        -- if rally does not contain an 'outcome' string
+        when not (point_description_new ilike any (array['%ace%', '%double fault%', '%forced error%', '%unforced error%', '%service winner%', '%winner%'])) then null
+        else point_description_new
+    end as point_description_valid
+
+  from renamed
+),
+
+-- get number of shots (separated by ';')
+rally_shot_count as (
+  select
+    *,
+    array_length(
+      regexp_split_to_array(point_description_valid, ';'),
+      1
+    ) as number_of_shots_in_point
+  from point_descriptions
+),
+
+-- get last shot in rally
+last_shot as (
+  select
+    *,
+    trim(
+      split_part(point_description_valid, ';', number_of_shots_in_point)
+    ) as last_shot_in_point
+  from rally_shot_count
+),
+
+-- get last shot outcome
+-- last element in ',' separated string, without '.' and anything from '(' on
+outcome as (
+  select
+    *,
+    nullif(
+        trim(
+            split_part(
+                replace(
+                  split_part(last_shot_in_point, ',', array_length(regexp_split_to_array(last_shot_in_point, ','), 1)),
+                  '.',
+                  ''
+                ),
+                '(',
+                1
+            )
+        ),
+        ''
+    ) as point_result
+  from last_shot
+),
+
+-- get rally length and point winner from rally
+rally as (
+  select
+    *,
+
+    -- calculate rally length
+    case
+      -- exclude 'errors'
+      when point_result in ('double fault', 'forced error', 'unforced error') then number_of_shots_in_point - 1
+      -- include 'winners'
+      when point_result in ('ace', 'service winner', 'winner') then number_of_shots_in_point
+      else null
+    end as rally_length,
+
+    case
+      -- if odd length (server hit last shot)
+      when number_of_shots_in_point % 2 != 0 then
+        case
+          when point_result in ('ace', 'service winner', 'winner') then 'server'
+          when point_result in ('double fault', 'forced error', 'unforced error') then 'receiver'
+          else null
+        end
+      -- if even length (receiver hit last shot)
+      when number_of_shots_in_point % 2 = 0 then
+        case
+          when point_result in ('winner') then 'receiver'
+          when point_result in ('forced error', 'unforced error') then 'server'
+          else null
+        end
+      else null
+    end as point_winner_rally_role
+
+  from outcome
+),
+
+final as (
+  select
+    match_url,
+    point_number_in_match,
+    point_server,
+    set_score_in_match,
+    game_score_in_set,
+    point_score_in_game,
+    point_description_old,
+    point_description_new,
+    number_of_shots_in_point,
+    last_shot_in_point,
+    point_result,
+    rally_length,
+    point_winner_rally_role,
+    notes
+  from rally
 )
 
-select * from renamed
\ No newline at end of file
+select * from final
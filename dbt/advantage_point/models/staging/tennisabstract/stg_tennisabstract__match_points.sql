@@ -1,3 +1,6 @@
+{#- parsed columns are added to the source by the first ingest (or backfill) after the parser was deployed -#}
+{%- set source_column_name_list = adapter.get_columns_in_relation(source('tennisabstract', 'match_points')) | map(attribute='name') | map('lower') | list -%}
+
 with
 
 source as (
@@ -18,6 +21,15 @@ renamed as (
         replace(games, '‑', '-') as game_score_in_set,
         replace(points, '‑', '-') as point_score_in_game,
         point_description,
+
+        -- rally data parsed from point_description at ingest (null for points ingested before the parser, until backfilled)
+        {{ cast_column_or_null('number_of_shots_in_point', source_column_name_list, 'int') }} as number_of_shots_in_point,
+        {{ cast_column_or_null('last_shot_in_point', source_column_name_list, 'text') }} as last_shot_in_point,
+        {{ cast_column_or_null('point_result', source_column_name_list, 'text') }} as point_result,
+        {{ cast_column_or_null('rally_length', source_column_name_list, 'int') }} as rally_length,
+        {{ cast_column_or_null('point_winner_rally_role', source_column_name_list, 'text') }} as point_winner_rally_role,
+        {{ cast_column_or_null('point_description_parser_version', source_column_name_list, 'int') }} as point_description_parser_version,
+
         audit_field_active_flag as is_record_active,
         audit_field_start_datetime_utc as loaded_at
     from source
@@ -0,0 +1,122 @@
+from ingest.utils.functions.catalog import (
+    get_table_column_dict,
+)
+from ingest.utils.functions.sql import (
+    create_connection,
+    ingest_df_to_sql,
+)
+from ingest.utils.functions.tennisabstract.point_descriptions import (
+    POINT_DESCRIPTION_COLUMN_LIST,
+    POINT_DESCRIPTION_PARSER_VERSION,
+    add_point_description_columns,
+)
+import logging
+import os
+import pandas as pd
+
+def main():
+
+    # set logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    # set constants for use in function
+    # active points ingested before the point description parser (or parsed by an older version) are re-parsed
+    # - re-parsed points are merged like any other load (new record versions), so the incremental dbt models rebuild their matches
+    target_schema_name = os.getenv('SCHEMA_INGESTION')
+    temp_schema_name = os.getenv('SCHEMA_INGESTION_TEMP')
+    target_table_name = 'tennisabstract_match_points'
+    temp_table_name = target_table_name
+    unique_column_list = ['match_url', 'point_number',]
+    partition_column_name = 'match_url'
+    partition_count = 8
+    alter_table_drop_column_flag = False
+    merge_table_delete_row_flag = False
+    temp_table_load_method = 'copy'
+    temp_table_type = 'temp'
+    chunk_size = 100
+
+    # create connection
+    conn = create_connection()
+
+    # get columns of table
+    column_data_type_dict = get_table_column_dict(
+        connection=conn,
+        schema_name=target_schema_name,
+        table_name=target_table_name
+    )
+    if column_data_type_dict is None:
+        logging.info(f"Table {target_schema_name}.{target_table_name} does not exist - Nothing to backfill.")
+        conn.close()
+        return
+
+    # get matches with points to re-parse (all active points if the parser columns were never added)
+    cursor = conn.cursor()
+    where_clause = 'audit_field_active_flag = TRUE'
+    if 'point_description_parser_version' in column_data_type_dict:
+        where_clause += f" AND (point_description_parser_version IS NULL OR point_description_parser_version < {POINT_DESCRIPTION_PARSER_VERSION})"
+    match_url_select_sql = f"""
+        SELECT DISTINCT
+            match_url
+        FROM {target_schema_name}.{target_table_name}
+        WHERE {where_clause}
+        ORDER BY match_url
+    """
+    logging.info(f"Running select statement: {match_url_select_sql}")
+    cursor.execute(match_url_select_sql)
+    match_url_list = [row[0] for row in cursor.fetchall()]
+    logging.info(f"Found {len(match_url_list)} matches to backfill.")
+
+    # columns loaded by ingest (re-parsed columns are recomputed)
+    column_name_list = [
+        col for col in column_data_type_dict
+        if not col.startswith('audit_field_') and col not in POINT_DESCRIPTION_COLUMN_LIST
+    ]
+    point_select_sql = f"""
+        SELECT
+            {', '.join(column_name_list)}
+        FROM {target_schema_name}.{target_table_name}
+        WHERE 1=1
+            AND audit_field_active_flag = TRUE
+            AND match_url = ANY(%s)
+        ORDER BY match_url, point_number
+    """
+
+    # re-parse and merge points in chunks of matches
+    for i in range(0, len(match_url_list), chunk_size):
+        match_url_chunk_list = match_url_list[i:i + chunk_size]
+
+        # get active points of matches
+        cursor.execute(point_select_sql, (match_url_chunk_list,))
+        match_point_data_df = pd.DataFrame(cursor.fetchall(), columns=column_name_list)
+
+        # parse point descriptions
+        match_point_data_df = add_point_description_columns(match_point_data_df=match_point_data_df)
+
+        # ingest dataframe to sql
+        ingest_df_to_sql(
+            connection=conn,
+            df=match_point_data_df,
+            target_schema_name=target_schema_name,
+            target_table_name=target_table_name,
+            temp_schema_name=temp_schema_name,
+            temp_table_name=temp_table_name,
+            unique_column_list=unique_column_list,
+            drop_column_flag=alter_table_drop_column_flag,
+            delete_row_flag=merge_table_delete_row_flag,
+            load_method=temp_table_load_method,
+            temp_table_type=temp_table_type,
+            partition_column_name=partition_column_name,
+            partition_count=partition_count
+        )
+        logging.info(f"Backfilled point descriptions for {i + len(match_url_chunk_list)}/{len(match_url_list)} matches.")
+
+    # close connection
+    cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from ingest.utils.functions.replay import (
+    get_replay_path,
+)
+from ingest.utils.functions.tennisabstract.match_points import (
+    parse_match_point_data,
+)
+from ingest.utils.functions.tennisabstract.matches import (
+    parse_match_data_scraped,
+)
+import logging
+import os
+import time
+
+def main():
+
+    # set logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    # compares the lxml parsers with the BeautifulSoup (html.parser) parsers on the match pages of a snapshot directory
+    # (record one with SCRAPE_RECORD_PATH, then run with SCRAPE_REPLAY_PATH set to it)
+    # - without SCRAPE_REPLAY_PATH, the committed fixture snapshot (tests/fixtures/snapshot) is used
+    replay_path = get_replay_path() or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures', 'snapshot'
+    )
+    if not os.path.isdir(replay_path):
+        raise ValueError(f"Snapshot directory not found: {replay_path}")
+    parser_list = ['html.parser', 'lxml']
+    repeat_count = int(os.getenv('BENCHMARK_REPEAT', 3))
+
+    # get match pages from snapshot
+    match_page_list = []
+    for root, _, file_name_list in os.walk(replay_path):
+        for file_name in sorted(file_name_list):
+            member_name = os.path.relpath(os.path.join(root, file_name), replay_path)
+            if '/charting/' not in member_name or not file_name.endswith('.html') or file_name == 'index.html':
+                continue
+            with open(os.path.join(root, file_name), 'rb') as f:
+                content = f.read().decode('utf-8', errors='replace')
+            match_page_list.append({'match_url': f"https://{member_name}", 'content': content})
+    logging.info(f"Found {len(match_page_list)} match pages.")
+
+    # silence per-page parse messages while timing
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # parse every page with every parser (best of repeat_count runs, in CPU seconds)
+    output_dict = {}
+    cpu_seconds_dict = {}
+    for parser in parser_list:
+        cpu_seconds_list = []
+        for _ in range(repeat_count):
+            output_list = []
+            start = time.process_time()
+            for match_page in match_page_list:
+                try:
+                    match_point_data_list = parse_match_point_data(
+                        match_url=match_page['match_url'],
+                        content=match_page['content'],
+                        parser=parser
+                    )
+                except Exception as e:
+                    match_point_data_list = f"{type(e).__name__}"
+                output_list.append({
+                    'match_data': parse_match_data_scraped(content=match_page['content'], parser=parser),
+                    'match_point_data_list': match_point_data_list,
+                })
+            cpu_seconds_list.append(time.process_time() - start)
+        output_dict[parser] = output_list
+        cpu_seconds_dict[parser] = min(cpu_seconds_list)
+
+    logging.getLogger().setLevel(logging.INFO)
+
+    # compare output
+    mismatch_list = [
+        match_page['match_url']
+        for match_page, output_baseline, output in zip(match_page_list, output_dict[parser_list[0]], output_dict[parser_list[1]])
+        if output_baseline != output
+    ]
+    point_count = sum(
+        len(output['match_point_data_list']) for output in output_dict[parser_list[0]]
+        if isinstance(output['match_point_data_list'], list)
+    )
+    for match_url in mismatch_list:
+        logging.warning(f"Output differs for {match_url}")
+
+    for parser in parser_list:
+        logging.info(f"{parser}: {cpu_seconds_dict[parser]:.3f} CPU seconds for {len(match_page_list)} pages ({point_count} points).")
+    logging.info(
+        f"lxml speedup: {cpu_seconds_dict['html.parser'] / max(cpu_seconds_dict['lxml'], 1e-9):.1f}x; "
+        f"identical output for {len(match_page_list) - len(mismatch_list)}/{len(match_page_list)} pages."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+from ingest.utils.functions.checkpoint import (
+    add_checkpoint_key_list,
+    create_checkpoint_table,
+    get_checkpoint_key_list,
+    set_checkpoint_state,
+)
+from ingest.utils.functions.landing import (
+    write_landing_df,
+)
+from ingest.utils.functions.pipeline import (
+    run_ingest_pipeline,
+)
+from ingest.utils.functions.scrape_async import (
+    scrape_async,
+)
+from ingest.utils.functions.sql import (
+    ConnectionPool,
+    get_missing_row_list,
+    ingest_df_to_sql,
+)
+from ingest.utils.functions.tennisabstract.match_pages import (
+    get_match_page_record,
+    parse_match_page_data,
+)
+from ingest.utils.functions.tennisabstract.matches import (
+    fetch_match_page_content,
+    get_match_url_list as get_match_url_list_tennisabstract,
+)
+from ingest.utils.functions.tennisabstract.point_descriptions import (
+    add_point_description_columns,
+)
+from ingest.utils.functions.watermark import (
+    read_watermark,
+    write_watermark,
+)
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import os
+import pandas as pd
+
+def main():
+
+    # set logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    # set constants for use in function
+    # each match page is fetched once and loaded into both tables
+    target_schema_name = os.getenv('SCHEMA_INGESTION')
+    temp_schema_name = os.getenv('SCHEMA_INGESTION_TEMP')
+    table_config_dict = {
+        'match_data': {
+            'target_table_name': 'tennisabstract_matches',
+            'unique_column_list': ['match_url',],
+        },
+        'match_point_data_list': {
+            'target_table_name': 'tennisabstract_match_points',
+            'unique_column_list': ['match_url', 'point_number',],
+            'partition_column_name': 'match_url',
+            'partition_count': 8,
+            'partition_connection_count': 3,
+        },
+    }
+    alter_table_drop_column_flag = False
+    merge_table_delete_row_flag = False
+    temp_table_load_method = 'copy'
+    temp_table_type = 'temp'
+    landing_source_name = 'tennisabstract'
+
+    # set ingest mode
+    # - incremental: every match missing from the matches table, and up to 100 matches only missing points, per run
+    # - backfill: every missing match, checkpointed per match so an interrupted run resumes where it stopped
+    ingest_mode = os.getenv('INGEST_MODE', 'incremental')
+    checkpoint_flag = ingest_mode == 'backfill'
+    meta_schema_name = os.getenv('SCHEMA_META')
+    if checkpoint_flag and not meta_schema_name:
+        raise ValueError("SCHEMA_META must be set when INGEST_MODE is backfill.")
+    checkpoint_job_name = f"{target_schema_name}.tennisabstract_match_pages"
+    checkpoint_max_attempts = 5
+
+    # create connection pool
+    # - one connection per table, so both tables load concurrently
+    # - plus the extra connections each table merges its partitions over (reserved, so table loads never wait on partition merges)
+    connection_pool = ConnectionPool(
+        max_size=len(table_config_dict) + sum(
+            table_config.get('partition_connection_count', 0) for table_config in table_config_dict.values()
+        )
+    )
+
+    # get list of matches (skipping matches confirmed as ingested into both tables on a previous run)
+    watermark_name = f"{target_schema_name}.tennisabstract_match_pages"
+    match_url_watermark_set = read_watermark(name=watermark_name)
+    match_url_list_tennisabstract = [
+        url_dict for url_dict in get_match_url_list_tennisabstract()
+        if url_dict['match_url'] not in match_url_watermark_set
+    ]
+
+    # get list of matches missing from each table
+    with connection_pool.connection() as conn:
+        match_url_missing_set_dict = {
+            data_key: {
+                url_dict['match_url']
+                for url_dict in get_missing_row_list(
+                    connection=conn,
+                    schema_name=target_schema_name,
+                    table_name=table_config['target_table_name'],
+                    row_list=match_url_list_tennisabstract,
+                    column_name_list=['match_url',],
+                    where_clause_list=['audit_field_active_flag = TRUE',]
+                )
+            }
+            for data_key, table_config in table_config_dict.items()
+        }
+    match_url_missing_set = set().union(*match_url_missing_set_dict.values())
+
+    # update watermark with matches already in both tables
+    write_watermark(
+        name=watermark_name,
+        key_set=match_url_watermark_set | {
+            url_dict['match_url'] for url_dict in match_url_list_tennisabstract
+            if url_dict['match_url'] not in match_url_missing_set
+        }
+    )
+    if checkpoint_flag:
+
+        with connection_pool.connection() as conn:
+            # checkpoint missing matches (matches seen on earlier runs keep their state)
+            create_checkpoint_table(
+                connection=conn,
+                schema_name=meta_schema_name
+            )
+            add_checkpoint_key_list(
+                connection=conn,
+                schema_name=meta_schema_name,
+                job_name=checkpoint_job_name,
+                key_list=list(match_url_missing_set)
+            )
+
+            # get unfinished matches and failed matches due for a retry
+            match_url_checkpoint_set = set(
+                get_checkpoint_key_list(
+                    connection=conn,
+                    schema_name=meta_schema_name,
+                    job_name=checkpoint_job_name,
+                    max_attempts=checkpoint_max_attempts
+                )
+            )
+        match_url_list = [
+            url_dict for url_dict in match_url_list_tennisabstract
+            if url_dict['match_url'] in match_url_missing_set
+            and url_dict['match_url'] in match_url_checkpoint_set
+        ]
+
+    else:
+        # fetch all matches missing from the matches table, and a capped number of matches only missing points
+        match_point_url_limit = 100
+        match_url_list = [
+            url_dict for url_dict in match_url_list_tennisabstract
+            if url_dict['match_url'] in match_url_missing_set_dict['match_data']
+        ] + [
+            url_dict for url_dict in match_url_list_tennisabstract
+            if url_dict['match_url'] in match_url_missing_set
+            and url_dict['match_url'] not in match_url_missing_set_dict['match_data']
+        ][:match_point_url_limit]
+    logging.info(f"Found {len(match_url_list)} matches.")
+
+    # scrape match pages and stream them into the tables
+    # batches are loaded (in a worker thread) while scraping continues; batch_size counts pages
+    batch_size = 10
+    flush_interval = 60
+    max_concurrency = 10
+    requests_per_second = 5
+
+    # threads loading the tables of a batch
+    table_executor = ThreadPoolExecutor(max_workers=len(table_config_dict))
+
+    # matches that returned no point data (checkpointed as failed with the next load)
+    failed_match_url_deque = deque()
+
+    def checkpoint_failed_match_url_list(connection):
+
+        failed_match_url_list = []
+        while failed_match_url_deque:
+            failed_match_url_list.append(failed_match_url_deque.popleft())
+
+        set_checkpoint_state(
+            connection=connection,
+            schema_name=meta_schema_name,
+            job_name=checkpoint_job_name,
+            key_list=failed_match_url_list,
+            checkpoint_state='failed',
+            error='No match point data returned'
+        )
+
+    def ingest_match_page_data_list(match_page_data_list):
+
+        # get matches in batch with point data (matches without point data are checkpointed as failed)
+        match_url_batch_list = [
+            match_page_data['match_point_data_list'][0]['match_url'] for match_page_data in match_page_data_list
+            if match_page_data['match_point_data_list']
+        ]
+
+        if checkpoint_flag:
+            with connection_pool.connection() as conn:
+                checkpoint_failed_match_url_list(connection=conn)
+                set_checkpoint_state(
+                    connection=conn,
+                    schema_name=meta_schema_name,
+                    job_name=checkpoint_job_name,
+                    key_list=match_url_batch_list,
+                    checkpoint_state='fetched'
+                )
+
+        # create dataframe per table
+        data_list_dict = {
+            'match_data': [
+                match_page_data['match_data'] for match_page_data in match_page_data_list
+                if match_page_data['match_data']
+            ],
+            'match_point_data_list': [
+                match_point_data for match_page_data in match_page_data_list
+                for match_point_data in match_page_data['match_point_data_list']
+            ],
+        }
+
+        def ingest_data_list(data_key, table_config):
+
+            # create dataframe
+            df = pd.DataFrame(data_list_dict[data_key])
+
+            # parse point descriptions (rally data computed once per point, at ingest)
+            if data_key == 'match_point_data_list':
+                df = add_point_description_columns(match_point_data_df=df)
+
+            # write dataframe to landing zone (if enabled)
+            write_landing_df(
+                df=df,
+                source_name=landing_source_name,
+                table_name=table_config['target_table_name']
+            )
+
+            # ingest dataframe to sql
+            with connection_pool.connection() as conn:
+                ingest_df_to_sql(
+                    connection=conn,
+                    df=df,
+                    target_schema_name=target_schema_name,
+                    target_table_name=table_config['target_table_name'],
+                    temp_schema_name=temp_schema_name,
+                    temp_table_name=table_config['target_table_name'],
+                    unique_column_list=table_config['unique_column_list'],
+                    drop_column_flag=alter_table_drop_column_flag,
+                    delete_row_flag=merge_table_delete_row_flag,
+                    load_method=temp_table_load_method,
+                    temp_table_type=temp_table_type,
+                    partition_column_name=table_config.get('partition_column_name'),
+                    partition_count=table_config.get('partition_count'),
+                    connection_pool=connection_pool,
+                    partition_connection_count=table_config.get('partition_connection_count', 0)
+                )
+
+        # load tables concurrently (each on its own connection)
+        future_list = [
+            table_executor.submit(ingest_data_list, data_key, table_config)
+            for data_key, table_config in table_config_dict.items()
+            if data_list_dict[data_key]
+        ]
+        try:
+            for future in future_list:
+                future.result()
+        except Exception as e:
+            if not checkpoint_flag:
+                raise
+            # record failed batch and keep going (matches are retried on a later run)
+            logging.error(f"Failed to ingest batch of {len(match_page_data_list)} matches: {e}")
+            with connection_pool.connection() as conn:
+                set_checkpoint_state(
+                    connection=conn,
+                    schema_name=meta_schema_name,
+                    job_name=checkpoint_job_name,
+                    key_list=match_url_batch_list,
+                    checkpoint_state='failed',
+                    error=str(e)
+                )
+            return
+
+        if checkpoint_flag:
+            with connection_pool.connection() as conn:
+                set_checkpoint_state(
+                    connection=conn,
+                    schema_name=meta_schema_name,
+                    job_name=checkpoint_job_name,
+                    key_list=match_url_batch_list,
+                    checkpoint_state='loaded'
+                )
+
+    # count scraped urls (for progress logging)
+    url_count = 0
+
+    def get_match_page_record_list(match_url_dict, result):
+
+        nonlocal url_count
+        url_count += 1
+        if result is None:
+            logging.info(f"Failed to fetch or parse URL {url_count}/{len(match_url_list)}: {match_url_dict['match_url']}")
+
+        # keep url data if the page could not be fetched or parsed (only for matches missing from the matches table)
+        result = get_match_page_record(
+            match_url=match_url_dict['match_url'],
+            match_page_data=result,
+            match_data_missing_flag=match_url_dict['match_url'] in match_url_missing_set_dict['match_data']
+        )
+        if not result['match_point_data_list']:
+            if checkpoint_flag:
+                failed_match_url_deque.append(match_url_dict['match_url'])
+            return [result]
+        logging.info(
+            f"Successfully fetched data for URL {url_count}/{len(match_url_list)}: {match_url_dict['match_url']}"
+        )
+        return [result]
+
+    asyncio.run(
+        run_ingest_pipeline(
+            result_iter=scrape_async(
+                func=fetch_match_page_content,
+                arg_dict_list=match_url_list,
+                url_key='match_url',
+                max_concurrency=max_concurrency,
+                requests_per_second=requests_per_second,
+                parse_func=parse_match_page_data,
+                retries=3,
+                delay=3
+            ),
+            record_func=get_match_page_record_list,
+            load_func=ingest_match_page_data_list,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue_size=max_concurrency * 2
+        )
+    )
+
+    # checkpoint failures since the last load
+    if checkpoint_flag:
+        with connection_pool.connection() as conn:
+            checkpoint_failed_match_url_list(connection=conn)
+
+    # close table loaders and connections
+    table_executor.shutdown()
+    connection_pool.close()
+
+
+if __name__ == "__main__":
+    main()
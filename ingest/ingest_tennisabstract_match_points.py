@@ -1,13 +1,39 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from ingest.utils.functions.checkpoint import (
+    add_checkpoint_key_list,
+    create_checkpoint_table,
+    get_checkpoint_key_list,
+    set_checkpoint_state,
+)
+from ingest.utils.functions.landing import (
+    write_landing_df,
+)
+from ingest.utils.functions.pipeline import (
+    run_ingest_pipeline,
+)
+from ingest.utils.functions.scrape_async import (
+    scrape_async,
+)
 from ingest.utils.functions.sql import (
-    create_connection,
-    get_table_column_list,
+    ConnectionPool,
+    get_missing_row_list,
     ingest_df_to_sql,
 )
-from ingest.utils.functions.tennisabstract import (
+from ingest.utils.functions.tennisabstract.match_points import (
+    parse_match_point_data,
+)
+from ingest.utils.functions.tennisabstract.matches import (
+    fetch_match_page_content,
     get_match_url_list as get_match_url_list_tennisabstract,
-    get_match_point_data,
 )
+from ingest.utils.functions.tennisabstract.point_descriptions import (
+    add_point_description_columns,
+)
+from ingest.utils.functions.watermark import (
+    read_watermark,
+    write_watermark,
+)
+from collections import deque
+import asyncio
 import logging
 import os
 import pandas as pd
@@ -26,86 +52,227 @@ def main():
     target_table_name = 'tennisabstract_match_points'
     temp_table_name = target_table_name
     unique_column_list = ['match_url', 'point_number',]
+    partition_column_name = 'match_url'
+    partition_count = 8
     alter_table_drop_column_flag = False
     merge_table_delete_row_flag = False
+    temp_table_load_method = 'copy'
+    temp_table_type = 'temp'
+    landing_source_name = 'tennisabstract'
+
+    # set ingest mode
+    # - incremental: up to 100 missing matches per run
+    # - backfill: every missing match, checkpointed per match so an interrupted run resumes where it stopped
+    ingest_mode = os.getenv('INGEST_MODE', 'incremental')
+    checkpoint_flag = ingest_mode == 'backfill'
+    meta_schema_name = os.getenv('SCHEMA_META')
+    if checkpoint_flag and not meta_schema_name:
+        raise ValueError("SCHEMA_META must be set when INGEST_MODE is backfill.")
+    checkpoint_job_name = f"{target_schema_name}.{target_table_name}"
+    checkpoint_max_attempts = 5
 
-    # create connection
-    conn = create_connection()
+    # create connection pool (loads check out a connection per batch)
+    connection_pool = ConnectionPool()
+    conn = connection_pool.getconn()
 
-    # get list of matches
-    match_url_list_tennisabstract = get_match_url_list_tennisabstract()
-    match_url_list_db = get_table_column_list(
+    # get list of matches (skipping matches confirmed as ingested on a previous run)
+    watermark_name = f"{target_schema_name}.{target_table_name}"
+    match_url_watermark_set = read_watermark(name=watermark_name)
+    match_url_list_tennisabstract = [
+        url_dict for url_dict in get_match_url_list_tennisabstract()
+        if url_dict['match_url'] not in match_url_watermark_set
+    ]
+
+    # get list of matches missing from table
+    match_url_list_missing = get_missing_row_list(
         connection=conn,
         schema_name=target_schema_name,
         table_name=target_table_name,
+        row_list=match_url_list_tennisabstract,
         column_name_list=['match_url',],
         where_clause_list=['audit_field_active_flag = TRUE']
     )
-    match_url_list = list(
-        filter(
-            lambda url_dict: url_dict not in match_url_list_db, match_url_list_tennisabstract
+
+    # update watermark with matches already in table
+    match_url_missing_set = {url_dict['match_url'] for url_dict in match_url_list_missing}
+    write_watermark(
+        name=watermark_name,
+        key_set=match_url_watermark_set | {
+            url_dict['match_url'] for url_dict in match_url_list_tennisabstract
+            if url_dict['match_url'] not in match_url_missing_set
+        }
+    )
+    if checkpoint_flag:
+
+        # checkpoint missing matches (matches seen on earlier runs keep their state)
+        create_checkpoint_table(
+            connection=conn,
+            schema_name=meta_schema_name
+        )
+        add_checkpoint_key_list(
+            connection=conn,
+            schema_name=meta_schema_name,
+            job_name=checkpoint_job_name,
+            key_list=list(match_url_missing_set)
         )
-    )[:100]
+
+        # get unfinished matches and failed matches due for a retry
+        match_url_checkpoint_set = set(
+            get_checkpoint_key_list(
+                connection=conn,
+                schema_name=meta_schema_name,
+                job_name=checkpoint_job_name,
+                max_attempts=checkpoint_max_attempts
+            )
+        )
+        match_url_list = [
+            url_dict for url_dict in match_url_list_missing
+            if url_dict['match_url'] in match_url_checkpoint_set
+        ]
+
+    else:
+        match_url_list = match_url_list_missing[:100]
     logging.info(f"Found {len(match_url_list)} matches.")
+    connection_pool.putconn(conn)
 
-    # loop through matches
-    # initialize chunk logic
-    i = 0
-    chunk_size = 10
-    max_workers = 5
-    for i in range(0, len(match_url_list), chunk_size):
-
-        match_url_chunk_list = match_url_list[i:i + chunk_size]
-
-        chunk_size_start = i
-        chunk_size_end = min(i + chunk_size, len(match_url_list))
-        logging.info(f"Chunking: {chunk_size_start} to {chunk_size_end}")
-
-        # initialize data list
-        match_point_data_list_master = []
-
-        # Use ThreadPoolExecutor to scrape match data in parallel
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit tasks directly to executor
-            future_to_url = {
-                executor.submit(get_match_point_data, match_url_dict['match_url'], retries=3, delay=3): idx
-                for idx, match_url_dict in enumerate(match_url_chunk_list, start=chunk_size_start)
-            }
-
-            # Process results as they complete
-            for future in as_completed(future_to_url):
-                url_index = future_to_url[future]  # Get the original index of the URL
-                match_url_dict = match_url_chunk_list[url_index - chunk_size_start]
-                try:
-                    result = future.result()  # Get the result of `get_match_point_data`
-                    if result:
-                        match_point_data_list_master.extend(result)
-                        logging.info(
-                            f"Successfully fetched data for URL {url_index + 1}/{len(match_url_list)}: {match_url_dict['match_url']}"
-                        )
-                except Exception as e:
-                    logging.info(
-                        f"Failed to fetch data for URL {url_index + 1}/{len(match_url_list)}: {match_url_dict['match_url']} - Error: {e}"
-                    )
-        
-        # create dataframe
-        match_point_data_df = pd.DataFrame(match_point_data_list_master)
-
-        # ingest dataframe to sql
-        ingest_df_to_sql(
-            connection=conn,
-            df=match_point_data_df,
-            target_schema_name=target_schema_name,
-            target_table_name=target_table_name,
-            temp_schema_name=temp_schema_name,
-            temp_table_name=temp_table_name,
-            unique_column_list=unique_column_list,
-            drop_column_flag=alter_table_drop_column_flag,
-            delete_row_flag=merge_table_delete_row_flag
+    # scrape match points and stream them into the table
+    # batches are loaded (in a worker thread) while scraping continues; batch_size counts rows
+    batch_size = 2000
+    flush_interval = 60
+    max_concurrency = 10
+    requests_per_second = 5
+
+    # matches that returned no data (checkpointed as failed with the next load)
+    failed_match_url_deque = deque()
+
+    def checkpoint_failed_match_url_list(connection):
+
+        failed_match_url_list = []
+        while failed_match_url_deque:
+            failed_match_url_list.append(failed_match_url_deque.popleft())
+
+        set_checkpoint_state(
+            connection=connection,
+            schema_name=meta_schema_name,
+            job_name=checkpoint_job_name,
+            key_list=failed_match_url_list,
+            checkpoint_state='failed',
+            error='No match point data returned'
         )
 
-    # close connection
-    conn.close()
+    def ingest_match_point_data_list(match_point_data_list):
+
+        with connection_pool.connection() as conn:
+            # get matches in batch
+            match_url_batch_list = list(dict.fromkeys(match_point_data['match_url'] for match_point_data in match_point_data_list))
+
+            if checkpoint_flag:
+                checkpoint_failed_match_url_list(connection=conn)
+                set_checkpoint_state(
+                    connection=conn,
+                    schema_name=meta_schema_name,
+                    job_name=checkpoint_job_name,
+                    key_list=match_url_batch_list,
+                    checkpoint_state='fetched'
+                )
+
+            # create dataframe
+            match_point_data_df = pd.DataFrame(match_point_data_list)
+
+            # parse point descriptions (rally data computed once per point, at ingest)
+            match_point_data_df = add_point_description_columns(match_point_data_df=match_point_data_df)
+
+            # write dataframe to landing zone (if enabled)
+            write_landing_df(
+                df=match_point_data_df,
+                source_name=landing_source_name,
+                table_name=target_table_name
+            )
+
+            # ingest dataframe to sql
+            try:
+                ingest_df_to_sql(
+                    connection=conn,
+                    df=match_point_data_df,
+                    target_schema_name=target_schema_name,
+                    target_table_name=target_table_name,
+                    temp_schema_name=temp_schema_name,
+                    temp_table_name=temp_table_name,
+                    unique_column_list=unique_column_list,
+                    drop_column_flag=alter_table_drop_column_flag,
+                    delete_row_flag=merge_table_delete_row_flag,
+                    load_method=temp_table_load_method,
+                    temp_table_type=temp_table_type,
+                    partition_column_name=partition_column_name,
+                    partition_count=partition_count,
+                    connection_pool=connection_pool
+                )
+            except Exception as e:
+                if not checkpoint_flag:
+                    raise
+                # record failed batch and keep going (matches are retried on a later run)
+                logging.error(f"Failed to ingest batch of {len(match_url_batch_list)} matches: {e}")
+                set_checkpoint_state(
+                    connection=conn,
+                    schema_name=meta_schema_name,
+                    job_name=checkpoint_job_name,
+                    key_list=match_url_batch_list,
+                    checkpoint_state='failed',
+                    error=str(e)
+                )
+                return
+
+            if checkpoint_flag:
+                set_checkpoint_state(
+                    connection=conn,
+                    schema_name=meta_schema_name,
+                    job_name=checkpoint_job_name,
+                    key_list=match_url_batch_list,
+                    checkpoint_state='loaded'
+                )
+
+    # count scraped urls (for progress logging)
+    url_count = 0
+
+    def get_match_point_record_list(match_url_dict, result):
+
+        nonlocal url_count
+        url_count += 1
+        if not result:
+            failed_match_url_deque.append(match_url_dict['match_url'])
+            return []
+        logging.info(
+            f"Successfully fetched data for URL {url_count}/{len(match_url_list)}: {match_url_dict['match_url']}"
+        )
+        return result
+
+    asyncio.run(
+        run_ingest_pipeline(
+            result_iter=scrape_async(
+                func=fetch_match_page_content,
+                arg_dict_list=match_url_list,
+                url_key='match_url',
+                max_concurrency=max_concurrency,
+                requests_per_second=requests_per_second,
+                parse_func=parse_match_point_data,
+                retries=3,
+                delay=3
+            ),
+            record_func=get_match_point_record_list,
+            load_func=ingest_match_point_data_list,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue_size=max_concurrency * 2
+        )
+    )
+
+    # checkpoint failures since the last load
+    if checkpoint_flag:
+        with connection_pool.connection() as conn:
+            checkpoint_failed_match_url_list(connection=conn)
+
+    # close connections
+    connection_pool.close()
 
 
 if __name__ == "__main__":
@@ -1,13 +1,28 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from ingest.utils.functions.landing import (
+    write_landing_df,
+)
+from ingest.utils.functions.pipeline import (
+    run_ingest_pipeline,
+)
+from ingest.utils.functions.scrape_async import (
+    scrape_async,
+)
 from ingest.utils.functions.sql import (
-    create_connection,
-    get_table_column_list,
+    ConnectionPool,
+    get_missing_row_list,
     ingest_df_to_sql,
 )
 from ingest.utils.functions.tennisabstract.matches import (
+    fetch_match_page_content,
+    get_match_data_url,
     get_match_url_list as get_match_url_list_tennisabstract,
-    get_match_data,
+    parse_match_data,
+)
+from ingest.utils.functions.watermark import (
+    read_watermark,
+    write_watermark,
 )
+import asyncio
 import logging
 import os
 import pandas as pd
@@ -29,81 +44,115 @@ def main():
     unique_column_list = ['match_url',]
     alter_table_drop_column_flag = False
     merge_table_delete_row_flag = False
+    temp_table_load_method = 'copy'
+    temp_table_type = 'temp'
+    landing_source_name = 'tennisabstract'
+
+    # create connection pool (loads check out a connection per batch)
+    connection_pool = ConnectionPool()
+
+    # get list of matches (skipping matches confirmed as ingested on a previous run)
+    watermark_name = f"{target_schema_name}.{target_table_name}"
+    match_url_watermark_set = read_watermark(name=watermark_name)
+    match_url_list_tennisabstract = [
+        url_dict for url_dict in get_match_url_list_tennisabstract()
+        if url_dict['match_url'] not in match_url_watermark_set
+    ]
+
+    # get list of matches missing from table
+    with connection_pool.connection() as conn:
+        match_url_list = get_missing_row_list(
+            connection=conn,
+            schema_name=target_schema_name,
+            table_name=target_table_name,
+            row_list=match_url_list_tennisabstract,
+            column_name_list=unique_column_list,
+            where_clause_list=['audit_field_active_flag = TRUE',]
+        )
 
-    # create connection
-    conn = create_connection()
-
-    # get list of matches
-    match_url_list_tennisabstract = get_match_url_list_tennisabstract()
-    match_url_list_db = get_table_column_list(
-        connection=conn,
-        schema_name=target_schema_name,
-        table_name=target_table_name,
-        column_name_list=unique_column_list,
-        where_clause_list=['audit_field_active_flag = TRUE',]
+    # update watermark with matches already in table
+    match_url_missing_set = {url_dict['match_url'] for url_dict in match_url_list}
+    write_watermark(
+        name=watermark_name,
+        key_set=match_url_watermark_set | {
+            url_dict['match_url'] for url_dict in match_url_list_tennisabstract
+            if url_dict['match_url'] not in match_url_missing_set
+        }
     )
-    match_url_list = list(filter(lambda url_dict: url_dict not in match_url_list_db, match_url_list_tennisabstract))
     logging.info(f"Found {len(match_url_list)} matches.")
 
-    # loop through matches
-    # initialize chunk logic
-    i = 0
-    chunk_size = 100
-    max_workers = 5
-    for i in range(0, len(match_url_list), chunk_size):
-
-        match_url_chunk_list = match_url_list[i:i + chunk_size]
-
-        chunk_size_start = i
-        chunk_size_end = min(i + chunk_size, len(match_url_list))
-        logging.info(f"Chunking: {chunk_size_start} to {chunk_size_end}")
-
-        # initialize data list
-        match_data_list = []
-
-        # Use ThreadPoolExecutor to scrape match data in parallel
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit tasks directly to executor
-            future_to_url = {
-                executor.submit(get_match_data, match_url_dict['match_url'], retries=3, delay=3): idx
-                for idx, match_url_dict in enumerate(match_url_chunk_list, start=chunk_size_start)
-            }
-
-            # Process results as they complete
-            for future in as_completed(future_to_url):
-                url_index = future_to_url[future]  # Get the original index of the URL
-                match_url_dict = match_url_chunk_list[url_index - chunk_size_start]
-                try:
-                    result = future.result()  # Get the result of `get_match_data`
-                    if result:
-                        match_data_list.append(result)
-                        logging.info(
-                            f"Successfully fetched data for URL {url_index + 1}/{len(match_url_list)}: {match_url_dict['match_url']}"
-                        )
-                except Exception as e:
-                    logging.info(
-                        f"Failed to fetch data for URL {url_index + 1}/{len(match_url_list)}: {match_url_dict['match_url']} - Error: {e}"
-                    )
-
-            
+    # scrape matches and stream them into the table
+    # batches are loaded (in a worker thread) while scraping continues; batch_size counts matches
+    batch_size = 100
+    flush_interval = 60
+    max_concurrency = 10
+    requests_per_second = 5
+
+    def ingest_match_data_list(match_data_list):
+
         # create dataframe
         match_data_df = pd.DataFrame(match_data_list)
 
-        # ingest dataframe to sql
-        ingest_df_to_sql(
-            connection=conn,
+        # write dataframe to landing zone (if enabled)
+        write_landing_df(
             df=match_data_df,
-            target_schema_name=target_schema_name,
-            target_table_name=target_table_name,
-            temp_schema_name=temp_schema_name,
-            temp_table_name=temp_table_name,
-            unique_column_list=unique_column_list,
-            drop_column_flag=alter_table_drop_column_flag,
-            delete_row_flag=merge_table_delete_row_flag
+            source_name=landing_source_name,
+            table_name=target_table_name
         )
 
-    # close connection
-    conn.close()
+        # ingest dataframe to sql
+        with connection_pool.connection() as conn:
+            ingest_df_to_sql(
+                connection=conn,
+                df=match_data_df,
+                target_schema_name=target_schema_name,
+                target_table_name=target_table_name,
+                temp_schema_name=temp_schema_name,
+                temp_table_name=temp_table_name,
+                unique_column_list=unique_column_list,
+                drop_column_flag=alter_table_drop_column_flag,
+                delete_row_flag=merge_table_delete_row_flag,
+                load_method=temp_table_load_method,
+                temp_table_type=temp_table_type
+            )
+
+    # count scraped urls (for progress logging)
+    url_count = 0
+
+    def get_match_record_list(match_url_dict, result):
+
+        nonlocal url_count
+        url_count += 1
+        if not result:
+            # keep url data for matches whose page could not be fetched or parsed
+            return [get_match_data_url(match_url=match_url_dict['match_url'])]
+        logging.info(
+            f"Successfully fetched data for URL {url_count}/{len(match_url_list)}: {match_url_dict['match_url']}"
+        )
+        return [result]
+
+    asyncio.run(
+        run_ingest_pipeline(
+            result_iter=scrape_async(
+                func=fetch_match_page_content,
+                arg_dict_list=match_url_list,
+                url_key='match_url',
+                max_concurrency=max_concurrency,
+                requests_per_second=requests_per_second,
+                parse_func=parse_match_data,
+                retries=3,
+                delay=3
+            ),
+            record_func=get_match_record_list,
+            load_func=ingest_match_data_list,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue_size=max_concurrency * 2
+        )
+    )
+
+    # close connections
+    connection_pool.close()
 
 
 if __name__ == "__main__":
@@ -1,21 +1,28 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from ingest.utils.functions.landing import (
+    write_landing_df,
+)
+from ingest.utils.functions.pipeline import (
+    run_ingest_pipeline,
+)
 from ingest.utils.functions.scrape import (
-    create_chromedriver,
+    close_chromedrivers,
+)
+from ingest.utils.functions.scrape_async import (
+    scrape_async,
 )
 from ingest.utils.functions.sql import (
-    create_connection,
-    get_table_column_list,
+    ConnectionPool,
     ingest_df_to_sql,
 )
-from ingest.utils.functions.tennisabstract import (
+from ingest.utils.functions.tennisabstract.players import (
     get_player_url_list as get_player_url_list_tennisabstract,
-    get_player_data,
+    fetch_player_data,
+    get_player_data_url,
 )
+import asyncio
 import logging
 import os
 import pandas as pd
-import random
-import time
 
 
 def main():
@@ -26,11 +33,6 @@ def main():
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
-    # create driver
-    webdriver_path = os.getenv('CHROMEDRIVER_PATH')
-    driver = create_chromedriver(webdriver_path=webdriver_path)
-
-
     # set constants for use in function
     target_schema_name = os.getenv('SCHEMA_INGESTION')
     temp_schema_name = os.getenv('SCHEMA_INGESTION_TEMP')
@@ -39,102 +41,94 @@ def main():
     unique_column_list = ['player_url',]
     alter_table_drop_column_flag = False
     merge_table_delete_row_flag = False
+    temp_table_load_method = 'copy'
+    temp_table_type = 'temp'
+    landing_source_name = 'tennisabstract'
 
-    # create connection
-    conn = create_connection()
+    # create connection pool (loads check out a connection per batch)
+    connection_pool = ConnectionPool()
 
     # get list of players
     player_url_list_tennisabstract = get_player_url_list_tennisabstract()
-    # player_url_list_db = get_table_column_list(
-    #     connection=conn,
-    #     schema_name=target_schema_name,
-    #     table_name=target_table_name,
-    #     column_name_list=unique_column_list,
-    #     where_clause_list=['audit_field_active_flag = TRUE',]
-    # )
-    # player_url_list = list(filter(lambda url_dict: url_dict not in player_url_list_db, player_url_list_tennisabstract))[:20]
     player_url_list = player_url_list_tennisabstract[:20]
     logging.info(f"Found {len(player_url_list)} players.")
 
-    # loop through players
-    # initialize chunk logic
-    i = 0
-    chunk_size = 10
-    max_workers = 5
-    for i in range(0, len(player_url_list), chunk_size):
-
-        player_url_chunk_list = player_url_list[i:i + chunk_size]
-
-        chunk_size_start = i
-        chunk_size_end = min(i + chunk_size, len(player_url_list))
-        logging.info(f"Chunking: {chunk_size_start} to {chunk_size_end}")
-
-        # initialize data list
-        player_data_list = []
-
-        # # Use ThreadPoolExecutor to scrape player data in parallel
-        # with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        #     # Submit tasks directly to executor
-        #     future_to_url = {
-        #         executor.submit(
-        #             get_player_data,
-        #             driver=driver,
-        #             player_url=player_url_dict['player_url'],
-        #             retries=3,
-        #             delay=3
-        #         ): idx
-        #         for idx, player_url_dict in enumerate(player_url_chunk_list, start=chunk_size_start)
-        #     }
-
-        #     # Process results as they complete
-        #     for future in as_completed(future_to_url):
-        #         url_index = future_to_url[future]  # Get the original index of the URL
-        #         player_url_dict = player_url_chunk_list[url_index - chunk_size_start]
-        #         try:
-        #             result = future.result()  # Get the result of `get_player_data`
-        #             if result:
-        #                 player_data_list.append(result)
-        #                 logging.info(
-        #                     f"Successfully fetched data for URL {url_index + 1}/{len(player_url_list)}: {player_url_dict['player_url']}"
-        #                 )
-        #         except Exception as e:
-        #             logging.info(
-        #                 f"Failed to fetch data for URL {url_index + 1}/{len(player_url_list)}: {player_url_dict['player_url']} - Error: {e}"
-        #             )
-
-        # loop through chunk urls
-        for idx, player_url_dict in enumerate(player_url_chunk_list, start=i):
-            player_url = player_url_dict['player_url']
-            logging.info(f"Starting {idx+1} of {len(player_url_list)}.")
-            logging.info(f"player url: {player_url}")
-            player_data_dict = get_player_data(
-                driver=driver,
-                player_url=player_url,
-                retries=3,
-                delay=3
-            )
-            player_data_list.append(player_data_dict)
-            logging.info(f"Fetched data for: {player_url}")
-            time.sleep(random.uniform(1, 3))
+    # scrape players and stream them into the table
+    # batches are loaded (in a worker thread) while scraping continues; batch_size counts players
+    # pages are read over plain http; a browser is only started for pages that need javascript execution
+    batch_size = 10
+    flush_interval = 60
+    max_concurrency = 10
+    requests_per_second = 5
+
+    def ingest_player_data_list(player_data_list):
 
         # create dataframe
         player_data_df = pd.DataFrame(player_data_list)
 
-        # ingest dataframe to sql
-        ingest_df_to_sql(
-            connection=conn,
+        # write dataframe to landing zone (if enabled)
+        write_landing_df(
             df=player_data_df,
-            target_schema_name=target_schema_name,
-            target_table_name=target_table_name,
-            temp_schema_name=temp_schema_name,
-            temp_table_name=temp_table_name,
-            unique_column_list=unique_column_list,
-            drop_column_flag=alter_table_drop_column_flag,
-            delete_row_flag=merge_table_delete_row_flag
+            source_name=landing_source_name,
+            table_name=target_table_name
+        )
+
+        # ingest dataframe to sql
+        with connection_pool.connection() as conn:
+            ingest_df_to_sql(
+                connection=conn,
+                df=player_data_df,
+                target_schema_name=target_schema_name,
+                target_table_name=target_table_name,
+                temp_schema_name=temp_schema_name,
+                temp_table_name=temp_table_name,
+                unique_column_list=unique_column_list,
+                drop_column_flag=alter_table_drop_column_flag,
+                delete_row_flag=merge_table_delete_row_flag,
+                load_method=temp_table_load_method,
+                temp_table_type=temp_table_type
+            )
+
+    # count scraped urls (for progress logging)
+    url_count = 0
+
+    def get_player_record_list(player_url_dict, result):
+
+        nonlocal url_count
+        url_count += 1
+        if result is None:
+            # keep url data if the page could not be fetched
+            logging.info(f"Returning url data for URL {url_count}/{len(player_url_list)}: {player_url_dict['player_url']}")
+            return [get_player_data_url(player_url=player_url_dict['player_url'])]
+        logging.info(
+            f"Successfully fetched data for URL {url_count}/{len(player_url_list)}: {player_url_dict['player_url']}"
         )
+        return [result]
+
+    asyncio.run(
+        run_ingest_pipeline(
+            result_iter=scrape_async(
+                func=fetch_player_data,
+                arg_dict_list=player_url_list,
+                url_key='player_url',
+                max_concurrency=max_concurrency,
+                requests_per_second=requests_per_second,
+                retries=3,
+                delay=3
+            ),
+            record_func=get_player_record_list,
+            load_func=ingest_player_data_list,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue_size=max_concurrency * 2
+        )
+    )
+
+    # close browser (if one was needed)
+    close_chromedrivers()
 
-    # close connection
-    conn.close()
+    # close connections
+    connection_pool.close()
 
 
 if __name__ == "__main__":
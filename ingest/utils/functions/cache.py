@@ -0,0 +1,309 @@
+from typing import (
+    Dict,
+    Optional,
+)
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+# number of writes between cache size checks
+_EVICT_CHECK_INTERVAL = 100
+_write_count = 0
+_write_count_lock = threading.Lock()
+
+# serializes body/entry writes with eviction removals (so eviction never removes a body an entry is being written for)
+_cache_lock = threading.Lock()
+
+def get_cache_dir() -> Optional[str]:
+    """
+    Returns response cache directory (set by SCRAPE_CACHE_DIR), or None if caching is disabled
+    """
+
+    cache_dir = os.getenv('SCRAPE_CACHE_DIR')
+
+    return cache_dir or None
+
+def get_cache_max_age() -> float:
+    """
+    Returns number of seconds a cached response is served without revalidation (set by SCRAPE_CACHE_MAX_AGE, default 3600)
+    - within this window pages are served from the cache without a request, so a page changed upstream is picked up up to max_age seconds late
+    - older entries are revalidated with a conditional GET (set 0 to revalidate every cached page)
+    """
+
+    return float(os.getenv('SCRAPE_CACHE_MAX_AGE', 3600))
+
+def get_cache_max_bytes() -> int:
+    """
+    Returns maximum size of the response cache in bytes (set by SCRAPE_CACHE_MAX_BYTES, default 2GB)
+    """
+
+    return int(os.getenv('SCRAPE_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+def get_cache_entry_path(
+    cache_dir: str,
+    url: str
+) -> str:
+    """
+    Arguments:
+    - cache_dir: Cache directory
+    - url: Url of cached response
+
+    Returns path to the cache entry (metadata) file for url
+    """
+
+    url_hash = hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    return os.path.join(cache_dir, 'entries', f"{url_hash}.json")
+
+def get_cache_object_path(
+    cache_dir: str,
+    body_hash: str
+) -> str:
+    """
+    Arguments:
+    - cache_dir: Cache directory
+    - body_hash: sha256 of the response body
+
+    Returns path to the compressed response body (content-addressed, so identical bodies are stored once)
+    """
+
+    return os.path.join(cache_dir, 'objects', body_hash[:2], f"{body_hash}.gz")
+
+def write_file_atomic(
+    path: str,
+    data: bytes
+):
+    """
+    Arguments:
+    - path: File path
+    - data: File content
+
+    Writes file via a temporary file so readers never see a partial write
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+def get_cache_entry(
+    url: str
+) -> Optional[Dict]:
+    """
+    Arguments:
+    - url: Url of cached response
+
+    Returns cache entry (metadata and 'body' bytes) for url, or None if not cached
+    """
+
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+
+    entry_path = get_cache_entry_path(cache_dir=cache_dir, url=url)
+
+    try:
+        with open(entry_path, 'r') as f:
+            entry = json.load(f)
+        with gzip.open(get_cache_object_path(cache_dir=cache_dir, body_hash=entry['body_hash']), 'rb') as f:
+            entry['body'] = f.read()
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+
+    # mark entry as recently used (for LRU eviction - the entry may have been evicted since it was read)
+    try:
+        os.utime(entry_path)
+    except FileNotFoundError:
+        pass
+
+    return entry
+
+def is_cache_entry_fresh(
+    entry: Dict,
+    max_age: float
+) -> bool:
+    """
+    Arguments:
+    - entry: Cache entry
+    - max_age: Number of seconds a response is served without revalidation
+
+    Returns True if the entry was validated within max_age seconds
+    """
+
+    validated_datetime = datetime.datetime.fromisoformat(entry['validated_datetime_utc'])
+    age = (datetime.datetime.now(datetime.timezone.utc) - validated_datetime).total_seconds()
+
+    return age < max_age
+
+def put_cache_entry(
+    url: str,
+    body: bytes,
+    encoding: Optional[str] = None,
+    content_type: Optional[str] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None
+):
+    """
+    Arguments:
+    - url: Url of response
+    - body: Response body (decoded bytes)
+    - encoding: Response text encoding
+    - content_type: Content-Type header
+    - etag: ETag header (sent as If-None-Match on revalidation)
+    - last_modified: Last-Modified header (sent as If-Modified-Since on revalidation)
+
+    Stores response in the cache (no-op if caching is disabled)
+    """
+
+    global _write_count
+
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return
+
+    # compress new body outside the lock
+    body_hash = hashlib.sha256(body).hexdigest()
+    object_path = get_cache_object_path(cache_dir=cache_dir, body_hash=body_hash)
+    body_compressed = None if os.path.exists(object_path) else gzip.compress(body)
+
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    entry = {
+        'url': url,
+        'body_hash': body_hash,
+        'encoding': encoding,
+        'content_type': content_type,
+        'etag': etag,
+        'last_modified': last_modified,
+        'fetched_datetime_utc': now,
+        'validated_datetime_utc': now,
+    }
+    with _cache_lock:
+
+        # store body once per content hash (an existing body is touched, so a running eviction keeps it)
+        try:
+            if body_compressed is None:
+                os.utime(object_path)
+        except FileNotFoundError:
+            body_compressed = gzip.compress(body)
+        if body_compressed is not None:
+            write_file_atomic(path=object_path, data=body_compressed)
+
+        # store entry pointing to body
+        write_file_atomic(
+            path=get_cache_entry_path(cache_dir=cache_dir, url=url),
+            data=json.dumps(entry).encode('utf-8')
+        )
+
+    # periodically enforce cache size
+    with _write_count_lock:
+        _write_count += 1
+        evict_flag = _write_count % _EVICT_CHECK_INTERVAL == 0
+    if evict_flag:
+        evict_cache(cache_dir=cache_dir, max_bytes=get_cache_max_bytes())
+
+def touch_cache_entry(
+    url: str,
+    entry: Dict
+):
+    """
+    Arguments:
+    - url: Url of cached response
+    - entry: Cache entry
+
+    Marks entry as revalidated now (after a 304 Not Modified)
+    """
+
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return
+
+    entry = {key: value for key, value in entry.items() if key != 'body'}
+    entry['validated_datetime_utc'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    with _cache_lock:
+        write_file_atomic(
+            path=get_cache_entry_path(cache_dir=cache_dir, url=url),
+            data=json.dumps(entry).encode('utf-8')
+        )
+
+def evict_cache(
+    cache_dir: str,
+    max_bytes: int
+):
+    """
+    Arguments:
+    - cache_dir: Cache directory
+    - max_bytes: Maximum size of the cache in bytes
+
+    Removes least recently used entries until the cache fits in max_bytes, then removes unreferenced bodies
+    - entries and bodies written or touched after eviction started are kept (they may belong to a concurrent put_cache_entry)
+    """
+
+    evict_start_time = time.time()
+
+    entry_dir = os.path.join(cache_dir, 'entries')
+    object_dir = os.path.join(cache_dir, 'objects')
+
+    # collect entries (most recently used first)
+    entry_list = []
+    for entry_file in os.scandir(entry_dir) if os.path.isdir(entry_dir) else []:
+        if not entry_file.name.endswith('.json'):
+            continue
+        try:
+            with open(entry_file.path, 'r') as f:
+                body_hash = json.load(f)['body_hash']
+            entry_list.append((entry_file.stat().st_mtime, entry_file.path, body_hash))
+        except (FileNotFoundError, ValueError, KeyError):
+            continue
+    entry_list.sort(reverse=True)
+
+    # collect bodies
+    object_size_dict = {}
+    for root, _, file_name_list in os.walk(object_dir):
+        for file_name in file_name_list:
+            if file_name.endswith('.gz'):
+                object_size_dict[file_name[:-len('.gz')]] = os.path.getsize(os.path.join(root, file_name))
+
+    # keep most recently used entries while they fit
+    total_bytes = 0
+    keep_body_hash_set = set()
+    evict_entry_list = []
+    for _, entry_path, body_hash in entry_list:
+        body_bytes = 0 if body_hash in keep_body_hash_set else object_size_dict.get(body_hash, 0)
+        if total_bytes + body_bytes <= max_bytes:
+            total_bytes += body_bytes
+            keep_body_hash_set.add(body_hash)
+        else:
+            evict_entry_list.append((entry_path, body_hash))
+
+    with _cache_lock:
+
+        # remove evicted entries (unless rewritten or used since eviction started)
+        evict_count = 0
+        for entry_path, body_hash in evict_entry_list:
+            try:
+                if os.stat(entry_path).st_mtime >= evict_start_time:
+                    keep_body_hash_set.add(body_hash)
+                    continue
+                os.remove(entry_path)
+                evict_count += 1
+            except FileNotFoundError:
+                continue
+
+        # remove bodies no longer referenced by an entry (unless written or touched since eviction started)
+        for body_hash in object_size_dict.keys() - keep_body_hash_set:
+            object_path = get_cache_object_path(cache_dir=cache_dir, body_hash=body_hash)
+            try:
+                if os.stat(object_path).st_mtime >= evict_start_time:
+                    continue
+                os.remove(object_path)
+            except FileNotFoundError:
+                continue
+
+    logging.info(f"Cache eviction: removed {evict_count} entries; cache size {total_bytes} bytes.")
@@ -0,0 +1,290 @@
+from typing import (
+    Dict,
+    Optional,
+    Tuple,
+)
+import logging
+import pandas as pd
+import psycopg2
+import threading
+
+# in-process cache of catalog metadata (read from pg_catalog instead of the slower INFORMATION_SCHEMA views)
+# - schema names known to exist
+# - column data types by (schema key, table name), in column order (None if the table does not exist)
+# - schema keys whose tables have all been read
+# - column data types of the temp table after the last schema check, by (target schema name, target table name, dataframe fingerprint)
+_schema_name_set = set()
+_schema_name_set_loaded_flag = False
+_table_column_dict = {}
+_table_schema_key_set = set()
+_verified_column_type_dict = {}
+_catalog_lock = threading.RLock()
+
+# column data types are named like INFORMATION_SCHEMA.COLUMNS.DATA_TYPE (e.g. 'bigint', 'timestamp with time zone')
+# - pg_temp is the connection's own temp schema
+TABLE_COLUMN_SQL = """
+    SELECT
+        cls.relname AS table_name,
+        att.attname AS column_name,
+        FORMAT_TYPE(att.atttypid, NULL) AS data_type
+    FROM pg_catalog.pg_class AS cls
+    INNER JOIN pg_catalog.pg_namespace AS nsp ON nsp.oid = cls.relnamespace
+    LEFT JOIN pg_catalog.pg_attribute AS att ON
+            att.attrelid = cls.oid
+        AND att.attnum > 0
+        AND NOT att.attisdropped
+    WHERE 1=1
+        AND (nsp.nspname = %(schema_name)s OR (%(schema_name)s = 'pg_temp' AND nsp.oid = PG_MY_TEMP_SCHEMA()))
+        AND cls.relkind IN ('r', 'p', 'v', 'm', 'f')
+        {table_filter}
+    ORDER BY cls.relname, att.attnum
+"""
+
+def get_schema_key(
+    connection: psycopg2.connect,
+    schema_name: str
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name
+
+    Returns key of the schema in the cache
+    - pg_temp (temp tables) is cached per connection session, since each session only sees its own temp tables
+    """
+
+    if schema_name == 'pg_temp':
+        return (schema_name, id(connection), connection.get_backend_pid())
+
+    return schema_name
+
+def schema_exists(
+    connection: psycopg2.connect,
+    schema_name: str
+) -> bool:
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name
+
+    Returns True if schema exists (schema names are read once per run)
+    """
+
+    global _schema_name_set_loaded_flag
+
+    with _catalog_lock:
+
+        if not _schema_name_set_loaded_flag:
+            cursor = connection.cursor()
+            cursor.execute("SELECT nspname FROM pg_catalog.pg_namespace")
+            _schema_name_set.update(row[0] for row in cursor.fetchall())
+            cursor.close()
+            _schema_name_set_loaded_flag = True
+
+        return schema_name in _schema_name_set
+
+def add_schema(
+    schema_name: str
+):
+    """
+    Arguments:
+    - schema_name: Schema name
+
+    Records schema as existing (after CREATE SCHEMA)
+    """
+
+    with _catalog_lock:
+        _schema_name_set.add(schema_name)
+
+def get_table_column_dict(
+    connection: psycopg2.connect,
+    schema_name: str,
+    table_name: str
+) -> Optional[Dict[str, str]]:
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name
+    - table_name: Table name
+
+    Returns data type by column name (in column order), or None if the table does not exist
+    - the first lookup in a schema reads the columns of all its tables in one query
+    """
+
+    schema_key = get_schema_key(
+        connection=connection,
+        schema_name=schema_name
+    )
+
+    with _catalog_lock:
+
+        if schema_key not in _table_schema_key_set:
+            cursor = connection.cursor()
+            cursor.execute(TABLE_COLUMN_SQL.format(table_filter=''), {'schema_name': schema_name})
+            row_list = cursor.fetchall()
+            cursor.close()
+
+            for row_table_name, column_name, data_type in row_list:
+                column_dict = _table_column_dict.setdefault((schema_key, row_table_name), {})
+                if column_name is not None:
+                    column_dict[column_name] = data_type
+            _table_schema_key_set.add(schema_key)
+            logging.info(f"Read catalog of schema {schema_name}: {len({row[0] for row in row_list})} tables.")
+
+        column_dict = _table_column_dict.get((schema_key, table_name))
+
+        return dict(column_dict) if column_dict is not None else None
+
+def refresh_table(
+    connection: psycopg2.connect,
+    schema_name: str,
+    table_name: str
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name
+    - table_name: Table name
+
+    Re-reads the columns of a table (after DDL changed it)
+    - schema checks verified for the table are forgotten
+    """
+
+    schema_key = get_schema_key(
+        connection=connection,
+        schema_name=schema_name
+    )
+
+    cursor = connection.cursor()
+    cursor.execute(
+        TABLE_COLUMN_SQL.format(table_filter='AND cls.relname = %(table_name)s'),
+        {'schema_name': schema_name, 'table_name': table_name}
+    )
+    row_list = cursor.fetchall()
+    cursor.close()
+
+    with _catalog_lock:
+        if row_list:
+            _table_column_dict[(schema_key, table_name)] = {
+                column_name: data_type for _, column_name, data_type in row_list
+                if column_name is not None
+            }
+        else:
+            _table_column_dict.pop((schema_key, table_name), None)
+        forget_verified_column_type_dict(schema_name=schema_name, table_name=table_name)
+
+def set_table(
+    connection: psycopg2.connect,
+    schema_name: str,
+    table_name: str,
+    column_dict: Dict[str, str]
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name
+    - table_name: Table name
+    - column_dict: Data type by column name (in column order)
+
+    Records columns of a table created with known column data types (after CREATE TABLE)
+    """
+
+    schema_key = get_schema_key(
+        connection=connection,
+        schema_name=schema_name
+    )
+
+    with _catalog_lock:
+        _table_column_dict[(schema_key, table_name)] = dict(column_dict)
+
+def remove_table(
+    connection: psycopg2.connect,
+    schema_name: str,
+    table_name: str
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name
+    - table_name: Table name
+
+    Records table as not existing (after DROP TABLE)
+    """
+
+    schema_key = get_schema_key(
+        connection=connection,
+        schema_name=schema_name
+    )
+
+    with _catalog_lock:
+        _table_column_dict.pop((schema_key, table_name), None)
+
+def get_df_fingerprint(
+    df: pd.DataFrame
+) -> Tuple:
+    """
+    Arguments:
+    - df: Pandas dataframe
+
+    Returns fingerprint of the dataframe schema: column names with their dtype and inferred type (ignoring nulls)
+    - dataframes with the same fingerprint create the same temp table, so they need the same schema changes
+    """
+
+    return tuple(
+        (col, str(df[col].dtype), pd.api.types.infer_dtype(df[col], skipna=True))
+        for col in df.columns
+    )
+
+def get_verified_column_type_dict(
+    schema_name: str,
+    table_name: str,
+    fingerprint: Tuple
+) -> Optional[Dict[str, str]]:
+    """
+    Arguments:
+    - schema_name: Target schema name
+    - table_name: Target table name
+    - fingerprint: Dataframe fingerprint (see get_df_fingerprint)
+
+    Returns temp table column data types that a dataframe with this fingerprint was merged with before, or None
+    """
+
+    with _catalog_lock:
+        column_type_dict = _verified_column_type_dict.get((schema_name, table_name, fingerprint))
+
+        return dict(column_type_dict) if column_type_dict is not None else None
+
+def set_verified_column_type_dict(
+    schema_name: str,
+    table_name: str,
+    fingerprint: Tuple,
+    column_type_dict: Dict[str, str]
+):
+    """
+    Arguments:
+    - schema_name: Target schema name
+    - table_name: Target table name
+    - fingerprint: Dataframe fingerprint (see get_df_fingerprint)
+    - column_type_dict: Temp table column data types after target table was created or altered
+
+    Records that the target table needs no schema changes for dataframes with this fingerprint
+    """
+
+    with _catalog_lock:
+        _verified_column_type_dict[(schema_name, table_name, fingerprint)] = dict(column_type_dict)
+
+def forget_verified_column_type_dict(
+    schema_name: str,
+    table_name: str
+):
+    """
+    Arguments:
+    - schema_name: Target schema name
+    - table_name: Target table name
+
+    Forgets schema checks verified for a target table
+    """
+
+    with _catalog_lock:
+        for key in [key for key in _verified_column_type_dict if key[:2] == (schema_name, table_name)]:
+            del _verified_column_type_dict[key]
@@ -0,0 +1,192 @@
+from psycopg2.extras import execute_values
+from typing import (
+    List,
+    Optional,
+)
+import logging
+import psycopg2
+
+# checkpoint states
+# - pending: key found, not processed yet
+# - fetched: data scraped, load in progress (left behind if a run stops mid-load)
+# - loaded: data merged into target table
+# - failed: fetch or load failed (retried with backoff until max attempts)
+CHECKPOINT_STATE_LIST = ['pending', 'fetched', 'loaded', 'failed']
+
+def create_checkpoint_table(
+    connection: psycopg2.connect,
+    schema_name: str
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name (meta schema)
+
+    Creates checkpoint table (if not exists) holding per-key state of resumable ingest jobs
+    """
+
+    # create cursor
+    cursor = connection.cursor()
+
+    create_table_sql = f"""
+        CREATE TABLE IF NOT EXISTS {schema_name}.ingest_checkpoints (
+            job_name TEXT NOT NULL,
+            checkpoint_key TEXT NOT NULL,
+            checkpoint_state TEXT NOT NULL,
+            attempt_count INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            next_attempt_datetime_utc TIMESTAMP,
+            insert_datetime_utc TIMESTAMP NOT NULL DEFAULT NOW(),
+            update_datetime_utc TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (job_name, checkpoint_key)
+        )
+    """
+    logging.info(f"Running statement: {create_table_sql}")
+    cursor.execute(create_table_sql)
+
+    # close cursor
+    cursor.close()
+
+def add_checkpoint_key_list(
+    connection: psycopg2.connect,
+    schema_name: str,
+    job_name: str,
+    key_list: List[str]
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name (meta schema)
+    - job_name: Ingest job name
+    - key_list: List of keys (e.g. urls)
+
+    Adds keys as pending (keys already checkpointed keep their state)
+    """
+
+    if not key_list:
+        return
+
+    # create cursor
+    cursor = connection.cursor()
+
+    insert_sql = f"""
+        INSERT INTO {schema_name}.ingest_checkpoints (job_name, checkpoint_key, checkpoint_state)
+        VALUES %s
+        ON CONFLICT (job_name, checkpoint_key) DO NOTHING
+    """
+    execute_values(cursor, insert_sql, [(job_name, key, 'pending') for key in key_list], page_size=1000)
+    logging.info(f"Added {cursor.rowcount} checkpoint keys for {job_name}.")
+
+    # close cursor
+    cursor.close()
+
+def get_checkpoint_key_list(
+    connection: psycopg2.connect,
+    schema_name: str,
+    job_name: str,
+    max_attempts: int
+) -> List[str]:
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name (meta schema)
+    - job_name: Ingest job name
+    - max_attempts: Number of failed attempts after which a key is no longer retried
+
+    Returns keys left to process:
+    - pending and fetched keys (never finished)
+    - failed keys whose backoff has passed and that have attempts left
+    """
+
+    # create cursor
+    cursor = connection.cursor()
+
+    select_sql = f"""
+        SELECT
+            checkpoint_key
+        FROM {schema_name}.ingest_checkpoints
+        WHERE 1=1
+            AND job_name = %s
+            AND (
+                checkpoint_state IN ('pending', 'fetched')
+                OR (
+                        checkpoint_state = 'failed'
+                    AND attempt_count < %s
+                    AND next_attempt_datetime_utc <= NOW()
+                )
+            )
+        ORDER BY checkpoint_key
+    """
+    cursor.execute(select_sql, (job_name, max_attempts))
+    key_list = [row[0] for row in cursor.fetchall()]
+
+    # close cursor
+    cursor.close()
+
+    return key_list
+
+def set_checkpoint_state(
+    connection: psycopg2.connect,
+    schema_name: str,
+    job_name: str,
+    key_list: List[str],
+    checkpoint_state: str,
+    error: Optional[str] = None,
+    backoff_seconds: int = 300,
+    max_backoff_seconds: int = 86400
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name (meta schema)
+    - job_name: Ingest job name
+    - key_list: List of keys
+    - checkpoint_state: New state (one of CHECKPOINT_STATE_LIST)
+    - error: Error message (for failed keys)
+    - backoff_seconds: Delay before the first retry of a failed key (doubles with each failed attempt)
+    - max_backoff_seconds: Maximum delay before retrying a failed key
+
+    Updates state of keys
+    - failed keys get their attempt count incremented and their next attempt pushed back exponentially
+    """
+
+    if checkpoint_state not in CHECKPOINT_STATE_LIST:
+        raise ValueError(f"Unknown checkpoint state: {checkpoint_state}")
+
+    if not key_list:
+        return
+
+    # create cursor
+    cursor = connection.cursor()
+
+    if checkpoint_state == 'failed':
+        update_sql = f"""
+            UPDATE {schema_name}.ingest_checkpoints
+            SET
+                checkpoint_state = 'failed',
+                attempt_count = attempt_count + 1,
+                last_error = %s,
+                next_attempt_datetime_utc = NOW() + LEAST(%s * POWER(2, attempt_count), %s) * INTERVAL '1 second',
+                update_datetime_utc = NOW()
+            WHERE 1=1
+                AND job_name = %s
+                AND checkpoint_key = ANY(%s)
+        """
+        cursor.execute(update_sql, (error, backoff_seconds, max_backoff_seconds, job_name, list(key_list)))
+    else:
+        update_sql = f"""
+            UPDATE {schema_name}.ingest_checkpoints
+            SET
+                checkpoint_state = %s,
+                last_error = NULL,
+                next_attempt_datetime_utc = NULL,
+                update_datetime_utc = NOW()
+            WHERE 1=1
+                AND job_name = %s
+                AND checkpoint_key = ANY(%s)
+        """
+        cursor.execute(update_sql, (checkpoint_state, job_name, list(key_list)))
+    logging.info(f"Set {cursor.rowcount} checkpoint keys for {job_name} to {checkpoint_state}.")
+
+    # close cursor
+    cursor.close()
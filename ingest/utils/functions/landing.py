@@ -0,0 +1,196 @@
+from typing import (
+    Dict,
+    List,
+    Optional,
+)
+import datetime
+import json
+import logging
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import threading
+import uuid
+
+# string columns stored dictionary-encoded (few distinct values repeated over many rows)
+LANDING_DICTIONARY_COLUMN_LIST = ['match_url', 'server', 'point_description']
+
+# parquet compression codec
+LANDING_COMPRESSION = 'zstd'
+
+# name of the manifest file (one json line per parquet file, in each table directory)
+LANDING_MANIFEST_FILE_NAME = '_manifest.jsonl'
+
+# serializes manifest appends of concurrent loaders
+_manifest_lock = threading.Lock()
+
+def get_landing_path() -> Optional[str]:
+    """
+    Returns directory of the parquet landing zone (set by PARQUET_LANDING_PATH), or None if the landing zone is disabled
+    """
+
+    landing_path = os.getenv('PARQUET_LANDING_PATH')
+
+    return landing_path or None
+
+def get_landing_table_path(
+    landing_path: str,
+    source_name: str,
+    table_name: str
+) -> str:
+    """
+    Arguments:
+    - landing_path: Landing zone directory
+    - source_name: Source name (e.g. tennisabstract)
+    - table_name: Table name
+
+    Returns directory holding the parquet files (in ingest_date=YYYY-MM-DD subdirectories) and manifest of a table
+    """
+
+    return os.path.join(landing_path, f"source={source_name}", f"table={table_name}")
+
+def get_landing_arrow_table(
+    df: pd.DataFrame
+) -> pa.Table:
+    """
+    Arguments:
+    - df: Pandas dataframe
+
+    Returns arrow table of the dataframe, with the string columns of LANDING_DICTIONARY_COLUMN_LIST dictionary-encoded
+    """
+
+    arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+
+    for i, field in enumerate(arrow_table.schema):
+        if field.name in LANDING_DICTIONARY_COLUMN_LIST and pa.types.is_string(field.type):
+            arrow_table = arrow_table.set_column(i, field.name, arrow_table.column(i).dictionary_encode())
+
+    return arrow_table
+
+def write_landing_df(
+    df: pd.DataFrame,
+    source_name: str,
+    table_name: str
+) -> Optional[str]:
+    """
+    Arguments:
+    - df: Pandas dataframe (one ingest batch)
+    - source_name: Source name (e.g. tennisabstract)
+    - table_name: Table name
+
+    Writes dataframe as a compressed parquet file to the landing zone and records it in the table's manifest
+    (no-op if the landing zone is disabled or the dataframe is empty)
+
+    Returns path of the parquet file written, or None
+    """
+
+    landing_path = get_landing_path()
+    if landing_path is None or df.empty:
+        return None
+
+    # get file path (partitioned by ingest date)
+    ingest_datetime = datetime.datetime.now(datetime.timezone.utc)
+    table_path = get_landing_table_path(
+        landing_path=landing_path,
+        source_name=source_name,
+        table_name=table_name
+    )
+    file_name = f"part-{ingest_datetime.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex}.parquet"
+    relative_file_path = os.path.join(f"ingest_date={ingest_datetime.date().isoformat()}", file_name)
+    file_path = os.path.join(table_path, relative_file_path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    # write via temporary file so readers never see a partial file
+    arrow_table = get_landing_arrow_table(df=df)
+    temp_file_path = f"{file_path}.tmp"
+    pq.write_table(
+        arrow_table,
+        temp_file_path,
+        compression=LANDING_COMPRESSION,
+        use_dictionary=[col for col in arrow_table.column_names if col in LANDING_DICTIONARY_COLUMN_LIST]
+    )
+    os.replace(temp_file_path, file_path)
+
+    # record file in manifest (after the file is in place, so the manifest only lists complete files)
+    manifest_record = {
+        'file_path': relative_file_path,
+        'ingest_datetime_utc': ingest_datetime.isoformat(),
+        'row_count': arrow_table.num_rows,
+        'file_size_bytes': os.path.getsize(file_path),
+        'column_type_dict': {field.name: str(field.type) for field in arrow_table.schema},
+    }
+    with _manifest_lock:
+        with open(os.path.join(table_path, LANDING_MANIFEST_FILE_NAME), 'a') as f:
+            f.write(json.dumps(manifest_record) + '\n')
+
+    logging.info(f"Wrote {arrow_table.num_rows} rows to landing zone: {file_path}")
+
+    return file_path
+
+def read_landing_manifest(
+    source_name: str,
+    table_name: str
+) -> List[Dict]:
+    """
+    Arguments:
+    - source_name: Source name (e.g. tennisabstract)
+    - table_name: Table name
+
+    Returns manifest records of the table's parquet files, in the order they were written (empty if none)
+    """
+
+    landing_path = get_landing_path()
+    if landing_path is None:
+        return []
+
+    table_path = get_landing_table_path(
+        landing_path=landing_path,
+        source_name=source_name,
+        table_name=table_name
+    )
+
+    try:
+        with open(os.path.join(table_path, LANDING_MANIFEST_FILE_NAME), 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def read_landing_df(
+    source_name: str,
+    table_name: str,
+    ingest_date_list: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Arguments:
+    - source_name: Source name (e.g. tennisabstract)
+    - table_name: Table name
+    - ingest_date_list: List of ingest dates (YYYY-MM-DD) to read (all if not passed)
+
+    Returns dataframe of the table's landed batches, in the order they were written (ready to ingest again)
+    - batches are read one by one, so batches written before a schema change still concatenate
+    - dictionary-encoded columns are decoded to plain strings
+    """
+
+    landing_path = get_landing_path()
+    table_path = get_landing_table_path(
+        landing_path=landing_path or '',
+        source_name=source_name,
+        table_name=table_name
+    )
+
+    df_list = []
+    for manifest_record in read_landing_manifest(source_name=source_name, table_name=table_name):
+        if ingest_date_list is not None and manifest_record['ingest_datetime_utc'][:10] not in ingest_date_list:
+            continue
+        arrow_table = pq.read_table(os.path.join(table_path, manifest_record['file_path']))
+        for i, field in enumerate(arrow_table.schema):
+            if pa.types.is_dictionary(field.type):
+                arrow_table = arrow_table.set_column(i, field.name, arrow_table.column(i).cast(field.type.value_type))
+        df_list.append(arrow_table.to_pandas())
+    logging.info(f"Read {len(df_list)} landed batches of {source_name}.{table_name}.")
+
+    if not df_list:
+        return pd.DataFrame()
+
+    return pd.concat(df_list, ignore_index=True)
@@ -0,0 +1,94 @@
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Tuple,
+)
+import asyncio
+import logging
+
+async def run_ingest_pipeline(
+    result_iter: AsyncIterator[Tuple[Dict, Any]],
+    record_func: Callable[[Dict, Any], List],
+    load_func: Callable[[List], None],
+    batch_size: int,
+    flush_interval: float,
+    max_queue_size: int
+) -> int:
+    """
+    Arguments:
+    - result_iter: Scrape results as (arg_dict, result), e.g. from scrape_async
+    - record_func: Maps one scrape result to its list of records (empty list to skip)
+    - load_func: Blocking load of a batch of records (e.g. dataframe + ingest_df_to_sql)
+    - batch_size: Number of records that triggers a load
+    - flush_interval: Maximum number of seconds records wait before being loaded
+    - max_queue_size: Maximum number of scrape results waiting to be batched
+
+    Streams scrape results into batched loads; returns number of records loaded
+    - loads run in a worker thread while scraping continues (one load at a time)
+    - when loads fall behind, the queue fills up and scraping pauses (memory stays bounded)
+    """
+
+    loop = asyncio.get_running_loop()
+
+    # bounded queue between scraping and loading
+    record_queue = asyncio.Queue(maxsize=max_queue_size)
+    producer_done = object()
+
+    async def produce():
+
+        try:
+            async for arg_dict, result in result_iter:
+                record_list = record_func(arg_dict, result)
+                if record_list:
+                    await record_queue.put(record_list)
+        finally:
+            await record_queue.put(producer_done)
+
+    producer_task = asyncio.create_task(produce())
+
+    # batch records; load when batch is full or has waited flush_interval seconds
+    batch_list = []
+    batch_start = loop.time()
+    load_count = 0
+
+    try:
+        while True:
+
+            # wait for next records (no longer than the current batch may wait)
+            timeout = max(batch_start + flush_interval - loop.time(), 0) if batch_list else None
+            try:
+                item = await asyncio.wait_for(record_queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is producer_done:
+                break
+
+            if item:
+                if not batch_list:
+                    batch_start = loop.time()
+                batch_list.extend(item)
+
+            if batch_list and (len(batch_list) >= batch_size or loop.time() - batch_start >= flush_interval):
+                logging.info(f"Loading batch of {len(batch_list)} records.")
+                await asyncio.to_thread(load_func, batch_list)
+                load_count += len(batch_list)
+                batch_list = []
+
+        # load remaining records
+        if batch_list:
+            logging.info(f"Loading batch of {len(batch_list)} records.")
+            await asyncio.to_thread(load_func, batch_list)
+            load_count += len(batch_list)
+
+    except BaseException:
+        producer_task.cancel()
+        raise
+
+    # surface scraping errors
+    await producer_task
+
+    return load_count
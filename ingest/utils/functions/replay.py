@@ -0,0 +1,153 @@
+from typing import (
+    Dict,
+    Optional,
+)
+from urllib.parse import (
+    quote,
+    urlparse,
+)
+import logging
+import mimetypes
+import os
+import tarfile
+import threading
+import uuid
+
+# open snapshot archive (tarfile is not thread-safe, so reads are serialized)
+_archive_dict = {}
+_archive_lock = threading.Lock()
+
+def get_replay_path() -> Optional[str]:
+    """
+    Returns snapshot directory or tarball to serve pages from (set by SCRAPE_REPLAY_PATH), or None if replay is disabled
+    """
+
+    replay_path = os.getenv('SCRAPE_REPLAY_PATH')
+
+    return replay_path or None
+
+def get_record_path() -> Optional[str]:
+    """
+    Returns directory to capture fetched pages into (set by SCRAPE_RECORD_PATH), or None if recording is disabled
+    """
+
+    record_path = os.getenv('SCRAPE_RECORD_PATH')
+
+    return record_path or None
+
+def get_snapshot_member_name(
+    url: str
+) -> str:
+    """
+    Arguments:
+    - url: Page url
+
+    Returns relative path of the page within a snapshot:
+    - https://www.tennisabstract.com/charting/ -> www.tennisabstract.com/charting/index.html
+    - https://www.tennisabstract.com/cgi-bin/player.cgi?p=RogerFederer -> www.tennisabstract.com/cgi-bin/player.cgi%3Fp=RogerFederer
+    """
+
+    url_parsed = urlparse(url)
+
+    path = url_parsed.path or '/'
+    if path.endswith('/'):
+        path = f"{path}index.html"
+
+    member_name = f"{url_parsed.netloc}{path}"
+    if url_parsed.query:
+        member_name = f"{member_name}%3F{quote(url_parsed.query, safe='=&')}"
+
+    return member_name
+
+def get_snapshot_content_type(
+    url: str
+) -> str:
+    """
+    Arguments:
+    - url: Page url
+
+    Returns Content-Type the page is served with (from file extension; defaults to text/html for .cgi and extensionless pages)
+    """
+
+    content_type = mimetypes.guess_type(urlparse(url).path)[0]
+    if content_type is None or content_type.startswith('application/x-'):
+        content_type = 'text/html'
+
+    return content_type
+
+def get_snapshot_archive(
+    replay_path: str
+) -> Dict:
+    """
+    Arguments:
+    - replay_path: Path to snapshot tarball
+
+    Returns dictionary with the open tarfile and its members by name (opened once per path)
+    """
+
+    if replay_path not in _archive_dict:
+        archive = tarfile.open(replay_path, 'r:*')
+        member_dict = {}
+        for member in archive.getmembers():
+            if member.isfile():
+                member_name = member.name.lstrip('./')
+                member_dict[member_name] = member
+                # allow the snapshot to be nested in a top-level directory
+                member_dict.setdefault(member_name.split('/', 1)[-1], member)
+        _archive_dict[replay_path] = {'archive': archive, 'member_dict': member_dict}
+        logging.info(f"Opened snapshot archive {replay_path} with {len(member_dict)} pages.")
+
+    return _archive_dict[replay_path]
+
+def read_snapshot_page(
+    url: str,
+    replay_path: str
+) -> Optional[bytes]:
+    """
+    Arguments:
+    - url: Page url
+    - replay_path: Snapshot directory or tarball (.tar, .tar.gz, .tgz)
+
+    Returns page content from the snapshot, or None if the page was not captured
+    """
+
+    member_name = get_snapshot_member_name(url=url)
+
+    # read from directory
+    if os.path.isdir(replay_path):
+        try:
+            with open(os.path.join(replay_path, member_name), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    # read from tarball
+    with _archive_lock:
+        snapshot_archive = get_snapshot_archive(replay_path=replay_path)
+        member = snapshot_archive['member_dict'].get(member_name)
+        if member is None:
+            return None
+        return snapshot_archive['archive'].extractfile(member).read()
+
+def write_snapshot_page(
+    url: str,
+    body: bytes,
+    record_path: str
+):
+    """
+    Arguments:
+    - url: Page url
+    - body: Page content
+    - record_path: Snapshot directory
+
+    Captures page into the snapshot directory
+    """
+
+    path = os.path.join(record_path, get_snapshot_member_name(url=url))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # write via temporary file so concurrent writers never leave a partial page
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(body)
+    os.replace(temp_path, path)
@@ -0,0 +1,82 @@
+from email.utils import parsedate_to_datetime
+from typing import (
+    Optional,
+)
+import datetime
+import random
+import requests
+
+# http statuses worth retrying (timeouts, throttling, server errors)
+RETRY_STATUS_CODE_LIST = [408, 425, 429, 500, 502, 503, 504]
+
+def get_retry_after(
+    response: Optional[requests.Response]
+) -> Optional[float]:
+    """
+    Arguments:
+    - response: HTTP response
+
+    Returns number of seconds from the Retry-After header (seconds or HTTP date), or None if not set
+    """
+
+    if response is None:
+        return None
+
+    retry_after = response.headers.get('Retry-After')
+    if not retry_after:
+        return None
+
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_after_datetime = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_after_datetime.tzinfo is None:
+        retry_after_datetime = retry_after_datetime.replace(tzinfo=datetime.timezone.utc)
+
+    return max((retry_after_datetime - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
+
+def is_retryable_error(
+    error: Exception
+) -> bool:
+    """
+    Arguments:
+    - error: Exception raised by a scrape attempt
+
+    Returns True if another attempt could succeed (False for client errors such as 404)
+    """
+
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRY_STATUS_CODE_LIST
+
+    return True
+
+def get_retry_delay(
+    attempt: int,
+    delay: float,
+    error: Optional[Exception] = None,
+    max_delay: float = 300
+) -> float:
+    """
+    Arguments:
+    - attempt: Number of failed attempts so far
+    - delay: Base delay (in seconds)
+    - error: Exception raised by the failed attempt
+    - max_delay: Maximum delay (in seconds)
+
+    Returns seconds to wait before the next attempt:
+    - Retry-After, if the host sent one (429/503)
+    - otherwise exponential backoff with jitter, so retrying workers do not hit the host in lockstep
+    """
+
+    retry_after = get_retry_after(response=getattr(error, 'response', None))
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+
+    backoff = min(delay * 2 ** (attempt - 1), max_delay)
+
+    return random.uniform(backoff / 2, backoff)
@@ -1,20 +1,228 @@
+from contextlib import contextmanager
+from ingest.utils.functions.cache import (
+    get_cache_entry,
+    get_cache_max_age,
+    is_cache_entry_fresh,
+    put_cache_entry,
+    touch_cache_entry,
+)
+from ingest.utils.functions.replay import (
+    get_record_path,
+    get_replay_path,
+    get_snapshot_content_type,
+    read_snapshot_page,
+    write_snapshot_page,
+)
+from ingest.utils.functions.retry import (
+    get_retry_after,
+)
+from ingest.utils.functions.throttle import (
+    get_host_throttle,
+)
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from typing import Optional
+from typing import (
+    Dict,
+    Iterator,
+    Optional,
+    Tuple,
+)
+from urllib3.util.request import ACCEPT_ENCODING
+import logging
+import os
+import queue
 import random
 import requests
 import re
+import threading
+
+# shared http session (created on first request, reused by all threads)
+_session = None
+_session_lock = threading.Lock()
+
+# shared selenium webdriver pool (created on first use, for pages that need javascript execution)
+_chromedriver_pool = None
+_chromedriver_pool_lock = threading.Lock()
+
+def create_session(
+    pool_connections: int,
+    pool_maxsize: int
+) -> requests.Session:
+    """
+    Arguments:
+    - pool_connections: Number of hosts to keep connection pools for
+    - pool_maxsize: Number of keep-alive connections to keep per host
+
+    Returns requests session with a sized connection pool
+    """
+
+    # create session
+    session = requests.Session()
+
+    # mount adapter with connection pool
+    # pool_block keeps the number of open connections at pool_maxsize when more threads than connections are making requests
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=True
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    # advertise every encoding urllib3 can decode (gzip, deflate and br/zstd if the packages are installed)
+    session.headers.update({'Accept-Encoding': ACCEPT_ENCODING})
+
+    return session
+
+def get_session() -> requests.Session:
+    """
+    Returns shared requests session (created on first call)
+    - pool size is set by SCRAPE_POOL_SIZE (default 20)
+    """
+
+    global _session
+
+    # create session once, even if multiple threads call at the same time
+    with _session_lock:
+        if _session is None:
+            _session = create_session(
+                pool_connections=int(os.getenv('SCRAPE_POOL_CONNECTIONS', 4)),
+                pool_maxsize=int(os.getenv('SCRAPE_POOL_SIZE', 20))
+            )
+
+    return _session
+
+def get_request_timeout() -> Tuple[float, float]:
+    """
+    Returns (connect, read) timeout in seconds
+    - set by SCRAPE_CONNECT_TIMEOUT (default 5) and SCRAPE_READ_TIMEOUT (default 30)
+    """
+
+    connect_timeout = float(os.getenv('SCRAPE_CONNECT_TIMEOUT', 5))
+    read_timeout = float(os.getenv('SCRAPE_READ_TIMEOUT', 30))
+
+    return (connect_timeout, read_timeout)
+
+def create_response(
+    url: str,
+    status_code: int,
+    body: bytes,
+    encoding: Optional[str] = None,
+    content_type: Optional[str] = None
+) -> requests.Response:
+    """
+    Arguments:
+    - url: Url of response
+    - status_code: HTTP status code
+    - body: Response body
+    - encoding: Response text encoding
+    - content_type: Content-Type header
+
+    Returns response built without a request (from the cache or a snapshot)
+    """
+
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response._content = body
+    response.encoding = encoding
+    if content_type:
+        response.headers['Content-Type'] = content_type
+
+    return response
 
 def make_request(
-    url: str
+    url: str,
+    timeout: Optional[Tuple[float, float]] = None,
+    use_cache: bool = True
 ):
     """
     Arguments:
     - url: Url for request
-    Returns a response
+    - timeout: (connect, read) timeout in seconds; defaults to get_request_timeout()
+    - use_cache: True/false flag to read from/write to the response cache (if SCRAPE_CACHE_DIR is set)
+    Returns a response (raises requests.HTTPError on 4xx/5xx status)
     """
 
+    # serve page from snapshot (replay mode)
+    replay_path = get_replay_path()
+    if replay_path:
+        response = make_replay_request(url=url, replay_path=replay_path)
+        response.raise_for_status()
+        return response
+
+    response = make_network_request(
+        url=url,
+        timeout=timeout,
+        use_cache=use_cache
+    )
+
+    # capture page into snapshot (record mode)
+    record_path = get_record_path()
+    if record_path and response.status_code == 200:
+        write_snapshot_page(url=url, body=response.content, record_path=record_path)
+
+    # raise on error status (so callers can decide whether to retry)
+    response.raise_for_status()
+
+    return response
+
+def make_replay_request(
+    url: str,
+    replay_path: str
+) -> requests.Response:
+    """
+    Arguments:
+    - url: Url for request
+    - replay_path: Snapshot directory or tarball
+
+    Returns response served from the snapshot (404 if the page was not captured)
+    """
+
+    body = read_snapshot_page(url=url, replay_path=replay_path)
+    if body is None:
+        logging.info(f"Page not found in snapshot: {url}")
+        return create_response(url=url, status_code=404, body=b'')
+
+    # decode text the same way requests does for a live response of this content type
+    content_type = get_snapshot_content_type(url=url)
+    response = create_response(
+        url=url,
+        status_code=200,
+        body=body,
+        encoding=requests.utils.get_encoding_from_headers({'content-type': content_type}),
+        content_type=content_type
+    )
+
+    return response
+
+def make_network_request(
+    url: str,
+    timeout: Optional[Tuple[float, float]],
+    use_cache: bool
+) -> requests.Response:
+    """
+    Arguments:
+    - url: Url for request
+    - timeout: (connect, read) timeout in seconds; defaults to get_request_timeout()
+    - use_cache: True/false flag to read from/write to the response cache (if SCRAPE_CACHE_DIR is set)
+
+    Returns response from the cache or the network
+    """
+
+    # serve fresh cached response without a request
+    cache_entry = get_cache_entry(url=url) if use_cache else None
+    if cache_entry and is_cache_entry_fresh(entry=cache_entry, max_age=get_cache_max_age()):
+        return create_response(
+            url=url,
+            status_code=200,
+            body=cache_entry['body'],
+            encoding=cache_entry['encoding'],
+            content_type=cache_entry['content_type']
+        )
+
     # add list of agents
     user_agent_list_desktop = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.5672.127 Safari/537.36",
@@ -44,11 +252,260 @@ def make_request(
         "Connection": "keep-alive",
     }
 
-    # make request
-    response = requests.get(url, headers=headers)
+    # revalidate cached response (conditional request)
+    if cache_entry:
+        if cache_entry['etag']:
+            headers['If-None-Match'] = cache_entry['etag']
+        if cache_entry['last_modified']:
+            headers['If-Modified-Since'] = cache_entry['last_modified']
+
+    # make request (over pooled keep-alive connection), throttled per host
+    session = get_session()
+    host_throttle = get_host_throttle(url=url)
+    host_throttle.acquire()
+    try:
+        response = session.get(
+            url,
+            headers=headers,
+            timeout=timeout or get_request_timeout()
+        )
+    except Exception:
+        host_throttle.release()
+        raise
+    host_throttle.release(
+        status_code=response.status_code,
+        retry_after=get_retry_after(response=response)
+    )
+
+    # cached response is still valid
+    if cache_entry and response.status_code == 304:
+        touch_cache_entry(url=url, entry=cache_entry)
+        return create_response(
+            url=url,
+            status_code=200,
+            body=cache_entry['body'],
+            encoding=cache_entry['encoding'],
+            content_type=cache_entry['content_type']
+        )
+
+    # store new response
+    if use_cache and response.status_code == 200:
+        put_cache_entry(
+            url=url,
+            body=response.content,
+            encoding=response.encoding,
+            content_type=response.headers.get('Content-Type'),
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
 
     return response
 
+# javascript variable assignment: var {var}{optional space}={optional space}{value};
+_JAVASCRIPT_VAR_PATTERN = re.compile(r"\bvar\s+(?P<var>[A-Za-z_$][\w$]*)\s*=\s*")
+# characters that can change scanning state outside of a string
+_JAVASCRIPT_TOKEN_PATTERN = re.compile(r"[\'\"`\[\](){};\n]|//|/\*|/")
+# characters that can end a string (per quote character)
+_JAVASCRIPT_STRING_TOKEN_PATTERN_DICT = {
+    quote: re.compile(fr"[\\{quote}]")
+    for quote in ["'", '"', '`']
+}
+# characters that can end a regex literal (or its character class)
+_JAVASCRIPT_REGEX_TOKEN_PATTERN = re.compile(r"[\\/\[\]\n]")
+# characters after which a '/' starts a regex literal (instead of a division)
+_JAVASCRIPT_REGEX_PRECEDING_CHAR_SET = set('(,=:[!&|?{};+-*%<>~^')
+# characters that continue an expression over a line break (at the end of a line or the start of the next one)
+_JAVASCRIPT_CONTINUATION_PRECEDING_CHAR_SET = set('+-*/%=&|^!~?:,.<>')
+_JAVASCRIPT_CONTINUATION_FOLLOWING_CHAR_SET = set('+-*/%=&|^?:,.<>')
+
+def get_javascript_previous_char(
+    content: str,
+    start: int,
+    end: int
+) -> str:
+    """
+    Arguments:
+    - content: web page content
+    - start: Index where the assigned value starts
+    - end: Index to look back from
+
+    Returns last character before end that is not a space (skipping block comments), or '' if there is none after start
+    """
+
+    pos = end - 1
+    while pos >= start:
+        if content[pos].isspace():
+            pos -= 1
+        elif content[pos] == '/' and content[pos - 1] == '*' and pos - 1 > start:
+            comment_start = content.rfind('/*', start, pos - 1)
+            if comment_start == -1:
+                return content[pos]
+            pos = comment_start - 1
+        else:
+            return content[pos]
+
+    return ''
+
+def get_javascript_next_char(
+    content: str,
+    start: int
+) -> str:
+    """
+    Arguments:
+    - content: web page content
+    - start: Index to look ahead from
+
+    Returns first character from start that is not a space (skipping comments), or '' if there is none
+    """
+
+    pos = start
+    while pos < len(content):
+        if content[pos].isspace():
+            pos += 1
+        elif content.startswith('//', pos):
+            line_end = content.find('\n', pos)
+            if line_end == -1:
+                return ''
+            pos = line_end + 1
+        elif content.startswith('/*', pos):
+            comment_end = content.find('*/', pos + 2)
+            if comment_end == -1:
+                return ''
+            pos = comment_end + 2
+        # closing script tag (not a comparison)
+        elif content.startswith('</', pos):
+            return ''
+        else:
+            return content[pos]
+
+    return ''
+
+def get_javascript_value_end(
+    content: str,
+    start: int
+) -> int:
+    """
+    Arguments:
+    - content: web page content
+    - start: Index where the assigned value starts
+
+    Returns index where the assigned value ends:
+    - the first ';' outside of strings, regex literals, brackets and comments
+    - or the first line break outside of them, unless the line ends or the next line starts with an operator (e.g. '+')
+    """
+
+    depth = 0
+    pos = start
+    line_comment_start = None
+
+    while True:
+
+        # jump to next character that can change state
+        token_match = _JAVASCRIPT_TOKEN_PATTERN.search(content, pos)
+        if token_match is None:
+            return len(content)
+        token = token_match.group()
+        pos = token_match.end()
+
+        # skip over string (handling escaped characters)
+        if token in _JAVASCRIPT_STRING_TOKEN_PATTERN_DICT:
+            string_token_pattern = _JAVASCRIPT_STRING_TOKEN_PATTERN_DICT[token]
+            while True:
+                string_token_match = string_token_pattern.search(content, pos)
+                if string_token_match is None:
+                    return len(content)
+                if string_token_match.group() == '\\':
+                    pos = string_token_match.end() + 1
+                    continue
+                pos = string_token_match.end()
+                break
+
+        # skip over comments (a line comment ends at the line break, which is handled next)
+        elif token == '//':
+            line_end = content.find('\n', pos)
+            if line_end == -1:
+                return token_match.start() if depth == 0 else len(content)
+            line_comment_start = token_match.start()
+            pos = line_end
+        elif token == '/*':
+            comment_end = content.find('*/', pos)
+            if comment_end == -1:
+                return len(content)
+            pos = comment_end + 2
+
+        # skip over regex literal (handling escaped characters and character classes; flags need no handling)
+        elif token == '/':
+            previous_char = get_javascript_previous_char(content=content, start=start, end=token_match.start())
+            if previous_char and previous_char not in _JAVASCRIPT_REGEX_PRECEDING_CHAR_SET:
+                continue
+            class_flag = False
+            while True:
+                regex_token_match = _JAVASCRIPT_REGEX_TOKEN_PATTERN.search(content, pos)
+                if regex_token_match is None:
+                    return len(content)
+                regex_token = regex_token_match.group()
+                # not a regex literal after all (unterminated on its line)
+                if regex_token == '\n':
+                    break
+                pos = regex_token_match.end()
+                if regex_token == '\\':
+                    pos += 1
+                elif regex_token == '[':
+                    class_flag = True
+                elif regex_token == ']':
+                    class_flag = False
+                elif not class_flag:
+                    break
+
+        # track brackets
+        elif token in '[({':
+            depth += 1
+        elif token in '])}':
+            depth = max(depth - 1, 0)
+
+        # end of statement at line break, unless the expression continues on the next line
+        elif token == '\n':
+            if depth == 0:
+                value_end = token_match.start() if line_comment_start is None else line_comment_start
+                previous_char = get_javascript_previous_char(content=content, start=start, end=value_end)
+                next_char = get_javascript_next_char(content=content, start=pos)
+                if previous_char not in _JAVASCRIPT_CONTINUATION_PRECEDING_CHAR_SET and next_char not in _JAVASCRIPT_CONTINUATION_FOLLOWING_CHAR_SET:
+                    return value_end
+            line_comment_start = None
+
+        # end of statement
+        elif depth == 0:
+            return token_match.start()
+
+def scrape_javascript_var_dict(
+    content: str
+) -> Dict[str, str]:
+    """
+    Arguments:
+    - content: web page content
+
+    Returns dictionary of every variable assigned in content (var {var} = {value};) and its value, in one pass
+    - if a variable is assigned more than once, the first value is kept
+    """
+
+    var_dict = {}
+    pos = 0
+
+    while True:
+
+        # find next assignment
+        var_match = _JAVASCRIPT_VAR_PATTERN.search(content, pos)
+        if var_match is None:
+            break
+
+        # read value (continue scanning after it, so assignments inside strings are never matched)
+        value_start = var_match.end()
+        value_end = get_javascript_value_end(content=content, start=value_start)
+        var_dict.setdefault(var_match.group('var'), content[value_start:value_end].strip())
+        pos = value_end + 1
+
+    return var_dict
+
 def scrape_javascript_var(
     content,
     var: str
@@ -62,9 +519,13 @@ def scrape_javascript_var(
     """
 
     # within page source, variable is of value: var {var}{optional space}={optional space}{value};
-    regex_pattern = fr"var {var}\s?=\s?(?P<{var}>.*);"
-    regex_var_match = re.search(regex_pattern, content)
-    val = regex_var_match.group(var) if regex_var_match else None
+    regex_var_match = re.search(fr"\bvar\s+{re.escape(var)}\s*=\s*", content)
+    if regex_var_match is None:
+        return None
+
+    value_start = regex_var_match.end()
+    value_end = get_javascript_value_end(content=content, start=value_start)
+    val = content[value_start:value_end].strip()
 
     return val
 
@@ -91,4 +552,126 @@ def create_chromedriver(
         service=webdriver_service,
         options=webdriver_options
     )
-    return driver
\ No newline at end of file
+    return driver
+
+class ChromedriverPool:
+    """
+    Pool of reusable selenium webdrivers (a driver is used by one caller at a time)
+    """
+
+    def __init__(
+        self,
+        webdriver_path: str,
+        pool_size: int,
+        max_pages_per_driver: int
+    ):
+        """
+        Arguments:
+        - webdriver_path: path to webdriver
+        - pool_size: Maximum number of drivers open at once
+        - max_pages_per_driver: Number of pages after which a driver is quit and replaced (caps browser memory growth)
+        """
+
+        self.webdriver_path = webdriver_path
+        self.max_pages_per_driver = max_pages_per_driver
+        self.idle_driver_queue = queue.LifoQueue()
+        self.driver_semaphore = threading.BoundedSemaphore(pool_size)
+
+    @contextmanager
+    def checkout(self) -> Iterator[webdriver.Chrome]:
+        """
+        Yields an idle driver (created if none is idle), waiting while pool_size drivers are checked out
+        """
+
+        with self.driver_semaphore:
+
+            # reuse idle driver or create new one
+            try:
+                driver, page_count = self.idle_driver_queue.get_nowait()
+            except queue.Empty:
+                logging.info("Creating chromedriver.")
+                driver, page_count = create_chromedriver(webdriver_path=self.webdriver_path), 0
+
+            try:
+                yield driver
+            except Exception:
+                # driver may be left in a bad state -> replace it
+                self.quit_driver(driver=driver)
+                raise
+
+            # recycle driver after max pages, else check it back in
+            page_count += 1
+            if page_count >= self.max_pages_per_driver:
+                logging.info(f"Recycling chromedriver after {page_count} pages.")
+                self.quit_driver(driver=driver)
+            else:
+                self.idle_driver_queue.put((driver, page_count))
+
+    def quit_driver(
+        self,
+        driver: webdriver.Chrome
+    ):
+        """
+        Arguments:
+        - driver: Selenium webdriver
+
+        Quits driver, ignoring errors from an already broken browser
+        """
+
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.info(f"Error encountered when quitting chromedriver: {e}")
+
+    def close(self):
+        """
+        Quits all idle drivers
+        """
+
+        while True:
+            try:
+                driver, _ = self.idle_driver_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.quit_driver(driver=driver)
+
+def get_chromedriver_pool() -> ChromedriverPool:
+    """
+    Returns shared chromedriver pool (created on first call)
+    - driver path is set by CHROMEDRIVER_PATH
+    - pool size is set by CHROMEDRIVER_POOL_SIZE (default 3)
+    - drivers are recycled after CHROMEDRIVER_MAX_PAGES pages (default 50)
+    """
+
+    global _chromedriver_pool
+
+    with _chromedriver_pool_lock:
+        if _chromedriver_pool is None:
+            _chromedriver_pool = ChromedriverPool(
+                webdriver_path=os.getenv('CHROMEDRIVER_PATH'),
+                pool_size=int(os.getenv('CHROMEDRIVER_POOL_SIZE', 3)),
+                max_pages_per_driver=int(os.getenv('CHROMEDRIVER_MAX_PAGES', 50))
+            )
+
+    return _chromedriver_pool
+
+@contextmanager
+def checkout_chromedriver() -> Iterator[webdriver.Chrome]:
+    """
+    Yields selenium webdriver checked out from the shared chromedriver pool
+    """
+
+    with get_chromedriver_pool().checkout() as driver:
+        yield driver
+
+def close_chromedrivers():
+    """
+    Quits all drivers in the shared chromedriver pool (if one was created)
+    """
+
+    global _chromedriver_pool
+
+    with _chromedriver_pool_lock:
+        if _chromedriver_pool is not None:
+            _chromedriver_pool.close()
+            _chromedriver_pool = None
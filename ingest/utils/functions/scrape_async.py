@@ -0,0 +1,196 @@
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from ingest.utils.functions.retry import (
+    get_retry_delay,
+    is_retryable_error,
+)
+from ingest.utils.functions.throttle import (
+    configure_host_throttle,
+)
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+)
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+
+def get_parse_process_count() -> int:
+    """
+    Returns number of parse processes (set by SCRAPE_PARSE_PROCESSES, default number of cores)
+    """
+
+    return int(os.getenv('SCRAPE_PARSE_PROCESSES', os.cpu_count() or 1))
+
+async def scrape_async(
+    func: Callable,
+    arg_dict_list: Iterable[Dict],
+    url_key: str,
+    max_concurrency: int,
+    requests_per_second: float,
+    parse_func: Optional[Callable] = None,
+    retries: int = 1,
+    delay: float = 0
+) -> AsyncIterator[Tuple[Dict, Any]]:
+    """
+    Arguments:
+    - func: Blocking scrape function (e.g. get_match_data), called as func(**arg_dict)
+    - arg_dict_list: Keyword arguments for each call
+    - url_key: Key in arg_dict holding the url (used for logging)
+    - max_concurrency: Maximum number of calls in flight (and of requests in flight, per host)
+    - requests_per_second: Maximum request starts per second, per host
+    - parse_func: Parse function (e.g. parse_match_data), called as parse_func(url, content) in a process pool (sized by get_parse_process_count)
+        - if set, func only fetches the page source (or returns None), so fetch threads never wait on parsing
+    - retries: Number of attempts per call (a call that raises a retryable error is attempted again)
+    - delay: Base time (in seconds) between attempts (backs off exponentially, with jitter, or as long as the host asked)
+        - the backoff is awaited in the event loop, so fetch threads keep fetching other urls meanwhile
+
+    Yields (arg_dict, result) as each call completes
+    - result is None if every attempt raised (or, with parse_func, if nothing was fetched or the parse raised)
+    """
+
+    # requests (including retries) are throttled per host in the fetch threads, adapting to the host's responses
+    configure_host_throttle(
+        requests_per_second=requests_per_second,
+        max_concurrency=max_concurrency
+    )
+    arg_dict_iter = iter(arg_dict_list)
+
+    # bounded queue: workers stop pulling new urls while results are not being consumed
+    result_queue = asyncio.Queue(maxsize=max_concurrency * 2)
+    worker_done = object()
+
+    # bounded parse backlog: workers stop fetching while the parse processes are behind
+    parse_semaphore = asyncio.Semaphore(max_concurrency * 2)
+    parse_task_set = set()
+
+    # retries waiting out their backoff
+    retry_task_set = set()
+
+    loop = asyncio.get_running_loop()
+
+    async def parse(
+        arg_dict: Dict,
+        content: str,
+        parse_executor: Executor
+    ):
+
+        try:
+            result = await loop.run_in_executor(parse_executor, functools.partial(parse_func, arg_dict[url_key], content))
+        except Exception as e:
+            logging.info(f"Failed to parse data for {arg_dict[url_key]} - Error: {e}")
+            result = None
+
+        await result_queue.put((arg_dict, result))
+
+    async def worker(
+        executor: ThreadPoolExecutor,
+        parse_executor: Executor
+    ):
+
+        # parse and retry tasks started by this worker
+        worker_task_set = set()
+
+        def parse_task_done(parse_task: asyncio.Task):
+            parse_task_set.discard(parse_task)
+            worker_task_set.discard(parse_task)
+            parse_semaphore.release()
+
+        def retry_task_done(retry_task: asyncio.Task):
+            retry_task_set.discard(retry_task)
+            worker_task_set.discard(retry_task)
+
+        async def fetch(
+            arg_dict: Dict,
+            attempt: int
+        ):
+
+            try:
+                result = await loop.run_in_executor(executor, functools.partial(func, **arg_dict))
+            except Exception as e:
+                attempt += 1
+                if attempt < retries and is_retryable_error(error=e):
+                    # back off in a task, so neither a fetch thread nor this worker waits (the worker goes on with the next url)
+                    retry_delay = get_retry_delay(attempt=attempt, delay=delay, error=e)
+                    logging.warning(f"Attempt {attempt} failed for {arg_dict[url_key]} - Retrying in {retry_delay:.1f} seconds. Error: {e}")
+                    retry_task = asyncio.create_task(retry(arg_dict=arg_dict, attempt=attempt, retry_delay=retry_delay))
+                    retry_task_set.add(retry_task)
+                    worker_task_set.add(retry_task)
+                    retry_task.add_done_callback(retry_task_done)
+                    return
+                logging.info(f"Failed to fetch data for {arg_dict[url_key]} after {attempt} attempts - Error: {e}")
+                result = None
+
+            if parse_func is None or result is None:
+                await result_queue.put((arg_dict, result))
+                return
+
+            # hand page source to the parse processes and go back to fetching
+            await parse_semaphore.acquire()
+            parse_task = asyncio.create_task(parse(arg_dict=arg_dict, content=result, parse_executor=parse_executor))
+            parse_task_set.add(parse_task)
+            worker_task_set.add(parse_task)
+            parse_task.add_done_callback(parse_task_done)
+
+        async def retry(
+            arg_dict: Dict,
+            attempt: int,
+            retry_delay: float
+        ):
+
+            await asyncio.sleep(retry_delay)
+            await fetch(arg_dict=arg_dict, attempt=attempt)
+
+        # pull next arguments until all have been handed out
+        for arg_dict in arg_dict_iter:
+            await fetch(arg_dict=arg_dict, attempt=0)
+
+        # wait for own retries and parses before reporting done (retries can start further parses)
+        while worker_task_set:
+            await asyncio.gather(*list(worker_task_set))
+        await result_queue.put(worker_done)
+
+    # dedicated process pool for parsing (CPU-bound work would serialize on the GIL in the fetch threads)
+    # with a single parse process there is nothing to gain, so pages are parsed in the fetch threads
+    parse_process_count = get_parse_process_count()
+    process_executor = ProcessPoolExecutor(
+        max_workers=parse_process_count,
+        mp_context=multiprocessing.get_context('spawn')
+    ) if parse_func and parse_process_count > 1 else None
+
+    # dedicated thread pool (the default executor is capped below typical concurrency levels)
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+
+            worker_task_list = [
+                asyncio.create_task(worker(executor=executor, parse_executor=process_executor or executor))
+                for _ in range(max_concurrency)
+            ]
+
+            try:
+                # stream results until every worker has finished
+                worker_done_count = 0
+                while worker_done_count < len(worker_task_list):
+                    item = await result_queue.get()
+                    if item is worker_done:
+                        worker_done_count += 1
+                        continue
+                    yield item
+
+            finally:
+                for task in [*worker_task_list, *parse_task_set, *retry_task_set]:
+                    task.cancel()
+
+    finally:
+        if process_executor is not None:
+            process_executor.shutdown(cancel_futures=True)
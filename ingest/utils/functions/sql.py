@@ -1,18 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from ingest.utils.functions.catalog import (
+    add_schema,
+    get_df_fingerprint,
+    get_table_column_dict,
+    get_verified_column_type_dict,
+    refresh_table,
+    remove_table,
+    schema_exists,
+    set_table,
+    set_verified_column_type_dict,
+)
 from typing import (
-    Any,
     Dict,
-    List
+    List,
+    Optional,
 )
-import datetime
+import io
 import logging
 import os
 import pandas as pd
 import psycopg2
+import psycopg2.extensions
+import threading
+import time
+
+def get_session_setting_dict() -> Dict[str, str]:
+    """
+    Returns session settings applied to every new connection (tuned for bulk loads):
+    - synchronous_commit: SQL_SYNCHRONOUS_COMMIT (default off - commits don't wait for the WAL flush; a crash can lose the last commits, never corrupt data)
+    - work_mem: SQL_WORK_MEM (default 64MB - memory for sorts/hashes in merges and anti-joins)
+    - statement_timeout: SQL_STATEMENT_TIMEOUT (default 30min - 0 disables; target table migrations use SQL_MIGRATION_STATEMENT_TIMEOUT)
+    - idle_in_transaction_session_timeout: SQL_IDLE_IN_TRANSACTION_SESSION_TIMEOUT (default 10min)
+    """
+
+    session_setting_dict = {
+        'synchronous_commit': os.getenv('SQL_SYNCHRONOUS_COMMIT', 'off'),
+        'work_mem': os.getenv('SQL_WORK_MEM', '64MB'),
+        'statement_timeout': os.getenv('SQL_STATEMENT_TIMEOUT', '30min'),
+        'idle_in_transaction_session_timeout': os.getenv('SQL_IDLE_IN_TRANSACTION_SESSION_TIMEOUT', '10min'),
+    }
+
+    return session_setting_dict
 
 def create_connection():
     """
     Create sql connection
+    - session settings (see get_session_setting_dict) are applied once, in a single round trip
+    - tcp keepalives let dropped connections (e.g. closed by the server) be detected instead of hanging
     """
 
     # create connection
@@ -21,22 +57,201 @@ def create_connection():
         user=os.getenv('USER'),
         password=os.getenv('PASSWORD'),
         host=os.getenv('HOST'),
-        port=os.getenv('PORT')
+        port=os.getenv('PORT'),
+        keepalives=1,
+        keepalives_idle=30,
+        keepalives_interval=10,
+        keepalives_count=3
     )
 
     # create cursor
     cursor = conn.cursor()
 
-    # allow write operations
+    # allow write operations and apply session settings
     conn.autocommit = True
-    cursor.execute("SET session characteristics AS transaction READ WRITE;")
-    cursor.execute("SET default_transaction_read_only = 'off';")
+    session_setting_sql = ' '.join(
+        [
+            "SET session characteristics AS transaction READ WRITE;",
+            "SET default_transaction_read_only = 'off';",
+        ] + [
+            f"SET {setting} = '{value}';" for setting, value in get_session_setting_dict().items()
+        ]
+    )
+    cursor.execute(session_setting_sql)
 
     # close cursor
     cursor.close()
     
     return conn
 
+class ConnectionPool:
+    """
+    Thread-safe pool of sql connections (created with create_connection) for concurrent loaders:
+    - connections are created on demand (up to max_size) and reused, so session setup runs once per connection
+    - connections idle for longer than max_idle_seconds are pinged on checkout and replaced if dropped
+    - broken connections are discarded when returned
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        max_idle_seconds: float = 60
+    ):
+        """
+        Arguments:
+        - max_size: Maximum number of connections (checkouts wait when all are in use) - defaults to SQL_POOL_MAX_SIZE (default 4)
+        - max_idle_seconds: Idle time after which a connection is checked before reuse
+        """
+
+        self.max_size = max_size or int(os.getenv('SQL_POOL_MAX_SIZE', 4))
+        self.max_idle_seconds = max_idle_seconds
+
+        # idle connections as (connection, time returned)
+        self.idle_connection_list = []
+        self.connection_count = 0
+        self.closed_flag = False
+        self.condition = threading.Condition()
+
+    def is_connection_alive(
+        self,
+        connection: psycopg2.extensions.connection
+    ) -> bool:
+        """
+        Arguments:
+        - connection: SQL database connection
+
+        Returns True if the connection answers a ping
+        """
+
+        if connection.closed:
+            return False
+
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+        return True
+
+    def discard(
+        self,
+        connection: psycopg2.extensions.connection
+    ):
+        """
+        Arguments:
+        - connection: SQL database connection (checked out of this pool)
+
+        Closes connection and frees its slot
+        """
+
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+        with self.condition:
+            self.connection_count -= 1
+            self.condition.notify()
+
+    def getconn(
+        self,
+        blocking: bool = True
+    ) -> Optional[psycopg2.extensions.connection]:
+        """
+        Arguments:
+        - blocking: Wait for a connection if all are in use (otherwise None is returned)
+
+        Returns a live connection (reused if one is idle, otherwise created)
+        """
+
+        while True:
+
+            with self.condition:
+                if self.closed_flag:
+                    raise psycopg2.InterfaceError("Connection pool is closed")
+
+                # wait for an idle connection or a free slot
+                while not self.idle_connection_list and self.connection_count >= self.max_size:
+                    if not blocking:
+                        return None
+                    self.condition.wait()
+
+                if self.idle_connection_list:
+                    connection, idle_since = self.idle_connection_list.pop()
+                else:
+                    self.connection_count += 1
+                    connection, idle_since = None, None
+
+            # create connection (outside the lock)
+            if connection is None:
+                try:
+                    return create_connection()
+                except Exception:
+                    with self.condition:
+                        self.connection_count -= 1
+                        self.condition.notify()
+                    raise
+
+            # reuse idle connection (checked first if idle for a while)
+            if time.monotonic() - idle_since < self.max_idle_seconds or self.is_connection_alive(connection=connection):
+                return connection
+
+            logging.warning("Dropped sql connection found in pool - reconnecting.")
+            self.discard(connection=connection)
+
+    def putconn(
+        self,
+        connection: psycopg2.extensions.connection
+    ):
+        """
+        Arguments:
+        - connection: SQL database connection (checked out of this pool)
+
+        Returns connection to the pool (discarded if broken or the pool is closed)
+        """
+
+        if not connection.closed and connection.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                pass
+
+        if self.closed_flag or connection.closed or connection.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            self.discard(connection=connection)
+            return
+
+        connection.autocommit = True
+        with self.condition:
+            self.idle_connection_list.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks out a connection for the duration of the block
+        """
+
+        connection = self.getconn()
+        try:
+            yield connection
+        finally:
+            self.putconn(connection=connection)
+
+    def close(self):
+        """
+        Closes idle connections (connections still checked out are closed when returned)
+        """
+
+        with self.condition:
+            self.closed_flag = True
+            idle_connection_list = self.idle_connection_list
+            self.idle_connection_list = []
+
+        for connection, _ in idle_connection_list:
+            self.discard(connection=connection)
+
 def create_schema(
     connection: psycopg2.connect,
     schema_name: str
@@ -46,25 +261,17 @@ def create_schema(
     - connection: SQL database connection
     - schema_name: schema
 
-    Creates schema if it does not exist
+    Creates schema if it does not exist (existence is checked against the catalog cache)
     """
 
     # create cursor
     cursor = connection.cursor()
 
-    # write query to check schema existence
-    schema_exists_sql = f"""
-        SELECT
-            COUNT(*) > 0 AS schema_exists_flag
-        FROM INFORMATION_SCHEMA.SCHEMATA
-        WHERE SCHEMA_NAME = '{schema_name}'
-        ;
-    """
-
-    # execute query
-    logging.info(f"Executing statement: {schema_exists_sql}")
-    cursor.execute(schema_exists_sql)
-    schema_exists_flag = cursor.fetchone()[0]
+    # check schema existence
+    schema_exists_flag = schema_exists(
+        connection=connection,
+        schema_name=schema_name
+    )
     logging.info(f"Schema {schema_name} exists: {schema_exists_flag}")
 
     # conditionally create schema
@@ -72,9 +279,10 @@ def create_schema(
         logging.info(f"Schema {schema_name} already exists.")
     else:
         # generate sql statement
-        create_schema_sql = f"CREATE SCHEMA {schema_name}"
+        create_schema_sql = f"CREATE SCHEMA IF NOT EXISTS {schema_name}"
         logging.info(f"Executing statement:\n {create_schema_sql}")
         cursor.execute(create_schema_sql)
+        add_schema(schema_name=schema_name)
     
     # close cursor
     cursor.close()
@@ -132,28 +340,162 @@ def get_table_column_list(
         # close cursor
         cursor.close()
 
-def infer_sql_type(python_dtype: Any):
+def get_missing_row_list(
+    connection: psycopg2.connect,
+    schema_name: str,
+    table_name: str,
+    row_list: List[Dict],
+    column_name_list: List[str],
+    where_clause_list: List[str] = ['1 = 1']
+) -> List[Dict]:
     """
     Arguments:
-    - python_dtype: python data type
+    - connection: SQL connection
+    - schema_name: Schema name
+    - table_name: Table name
+    - row_list: List of candidate rows (dicts with a value for each column)
+    - column_name_list: List of column names to match on
+    - where_clause_list: List of WHERE clause strings (applied to table)
 
-    Return (postgres) sql data type based on the python data type passed
+    Returns candidate rows (in their original order) with no matching row in table
+    - candidates are copied into a temp table (typed like the table) and anti-joined in the database (so the table is never pulled to the client)
     """
 
-    #  construct dictionary of type mappings
-    type_mapping_dict = {
-        bool: 'BOOLEAN',
-        datetime: 'TIMESTAMP',
-        float: 'FLOAT',
-        int: 'INTEGER',
-        str: 'TEXT',
-    }
+    if not row_list:
+        return []
+
+    # get data types of the columns in table (candidates are typed like the table, so comparisons can use its indexes)
+    column_data_type_dict = get_table_column_dict(
+        connection=connection,
+        schema_name=schema_name,
+        table_name=table_name
+    )
+
+    # all candidates are missing if table does not exist yet
+    if column_data_type_dict is None:
+        return list(row_list)
+
+    # create cursor
+    cursor = connection.cursor()
+
+    # create sql-like strings from list
+    candidate_table_name = f"candidate_{table_name}"
+    candidate_column_type_join = ', '.join([f"{col} {column_data_type_dict.get(col, 'text')}" for col in column_name_list])
+    column_join_str = ' AND '.join([f"tbl.{col} = cand.{col}" for col in column_name_list])
+    where_clause_join = ' AND '.join([f"({where_clause})" for where_clause in where_clause_list])
+
+    # load candidates into temp table (numbered to keep their order)
+    create_candidate_table_sql = f"""
+        DROP TABLE IF EXISTS pg_temp.{candidate_table_name};
+        CREATE TEMP TABLE {candidate_table_name} (row_num BIGINT, {candidate_column_type_join})
+    """
+    logging.info(f"Running statement: {create_candidate_table_sql}")
+    cursor.execute(create_candidate_table_sql)
 
-    # look up sql type; default to TEXT
-    sql_type = type_mapping_dict.get(type(python_dtype), 'TEXT')
+    candidate_df = pd.DataFrame(
+        [[row[col] for col in column_name_list] for row in row_list],
+        columns=column_name_list
+    )
+    candidate_df.insert(0, 'row_num', range(len(row_list)))
+    copy_df_to_table(
+        connection=connection,
+        df=candidate_df,
+        schema_name='pg_temp',
+        table_name=candidate_table_name
+    )
+
+    # anti-join candidates against table
+    select_sql = f"""
+        SELECT
+            cand.row_num
+        FROM pg_temp.{candidate_table_name} AS cand
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM {schema_name}.{table_name} AS tbl
+            WHERE 1=1
+                AND {column_join_str}
+                AND {where_clause_join}
+        )
+        ORDER BY cand.row_num
+    """
+    logging.info(f"Running select statement: {select_sql}")
+    cursor.execute(select_sql)
+    missing_row_list = [row_list[row[0]] for row in cursor.fetchall()]
+
+    # drop temp table
+    cursor.execute(f"DROP TABLE IF EXISTS pg_temp.{candidate_table_name}")
+
+    # close cursor
+    cursor.close()
+
+    return missing_row_list
+
+# sql data types by inferred pandas type (pd.api.types.infer_dtype)
+# - named like INFORMATION_SCHEMA.COLUMNS.DATA_TYPE / the catalog, so inferred and existing column types compare directly
+SQL_TYPE_DICT = {
+    'boolean': 'boolean',
+    'date': 'date',
+    'datetime': 'timestamp with time zone',
+    'datetime64': 'timestamp with time zone',
+    'decimal': 'numeric',
+    'floating': 'double precision',
+    'integer': 'bigint',
+    'integer-na': 'bigint',
+    'mixed-integer-float': 'double precision',
+    'string': 'text',
+}
+
+# sql data types (as named in INFORMATION_SCHEMA.COLUMNS) that can be widened to the next type without losing values
+# - any other pair of different types is widened to TEXT
+SQL_TYPE_WIDENING_LIST = ['smallint', 'integer', 'bigint', 'numeric', 'double precision']
+
+def infer_sql_type(column: pd.Series) -> str:
+    """
+    Arguments:
+    - column: Pandas column (series)
+
+    Return (postgres) sql data type based on the column's data type
+    - object columns are typed by their (non-null) values, so columns holding python ints, floats, bools stay typed after nulls are converted to None
+    - timezone-naive datetimes map to timestamp without time zone (so values are not shifted by the session time zone)
+    - default to text
+    """
+
+    # look up sql type by inferred type (ignoring nulls); all-null object columns are text (all-NaN float columns stay double precision)
+    inferred_type = pd.api.types.infer_dtype(column, skipna=True)
+    sql_type = SQL_TYPE_DICT.get(inferred_type, 'text')
+
+    # timezone-naive datetimes
+    if sql_type == 'timestamp with time zone':
+        if pd.api.types.is_datetime64_any_dtype(column.dtype):
+            timezone = getattr(column.dtype, 'tz', None)
+        else:
+            timezone = column.dropna().iloc[0].tzinfo
+        if timezone is None:
+            sql_type = 'timestamp without time zone'
 
     return sql_type
 
+def get_common_sql_type(
+    data_type: str,
+    other_data_type: str
+) -> str:
+    """
+    Arguments:
+    - data_type: SQL data type (as named in INFORMATION_SCHEMA.COLUMNS)
+    - other_data_type: SQL data type (as named in INFORMATION_SCHEMA.COLUMNS)
+
+    Returns the narrowest SQL data type both data types can be converted to without losing values
+    - numeric types widen along SQL_TYPE_WIDENING_LIST; any other mismatch widens to text
+    """
+
+    if data_type == other_data_type:
+        return data_type
+
+    if data_type in SQL_TYPE_WIDENING_LIST and other_data_type in SQL_TYPE_WIDENING_LIST:
+        return max(data_type, other_data_type, key=SQL_TYPE_WIDENING_LIST.index)
+
+    return 'text'
+
 def drop_table(
     connection: psycopg2.connect,
     schema_name: str,
@@ -176,11 +518,16 @@ def drop_table(
     logging.info(f"Running statement: {drop_table_sql}")
     cursor.execute(drop_table_sql)
     logging.info(f"Dropped table: {schema_name}.{table_name}")
+    remove_table(
+        connection=connection,
+        schema_name=schema_name,
+        table_name=table_name
+    )
 
     # close cursor
     cursor.close()
 
-def create_and_load_table(
+def insert_df_to_table(
     connection: psycopg2.connect,
     df: pd.DataFrame,
     schema_name: str,
@@ -193,44 +540,164 @@ def create_and_load_table(
     - schema_name: Schema name
     - table_name: Table name
 
-    Creates table (if not exists) and loads data (from dataframe)
-    - insert data into table
+    Loads data (from dataframe) into table with INSERT statements
     """
 
-    # get column data types
-    column_type_list = []
-    column_list = []
-    for col, dtype in df.dtypes.items():
-        sql_type = infer_sql_type(dtype)
-        column_list.append(col)
-        column_type_list.append(f"{col} {sql_type}")
-
     # inititialize cursor
     cursor = connection.cursor()
 
-    # create table
-    create_table_sql = f"CREATE TABLE IF NOT EXISTS {schema_name}.{table_name} ({', '.join(column_type_list)})"
-    logging.info(f"Running statement: {create_table_sql}")
-    cursor.execute(create_table_sql)
-
     # Insert data into table
+    column_list = list(df.columns)
     insert_sql = f"INSERT INTO {schema_name}.{table_name} ({', '.join(column_list)}) VALUES ({', '.join(['%s'] * len(column_list))})"
     logging.info(f"Running statement: {insert_sql}")
 
     # Use execute many for bulk insert
-    cursor.executemany(insert_sql, df.values.tolist())
+    # - missing values (None, NaN, pd.NA of nullable columns) are passed as None, since psycopg2 cannot adapt pd.NA
+    cursor.executemany(insert_sql, df.astype(object).where(pd.notnull(df), None).values.tolist())
     connection.commit()
 
     # closer cursor
     cursor.close()
 
+def copy_df_to_table(
+    connection: psycopg2.connect,
+    df: pd.DataFrame,
+    schema_name: str,
+    table_name: str
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - df: Pandas dataframe
+    - schema_name: Schema name
+    - table_name: Table name
+
+    Loads data (from dataframe) into table with COPY ... FROM STDIN (one round trip)
+    """
+
+    # write dataframe to in-memory csv
+    # nulls are written as unquoted \N so they stay distinct from empty strings
+    csv_buffer = io.StringIO()
+    df.to_csv(
+        csv_buffer,
+        index=False,
+        header=False,
+        na_rep='\\N'
+    )
+    csv_buffer.seek(0)
+
+    # inititialize cursor
+    cursor = connection.cursor()
+
+    # stream csv into table
+    column_list = list(df.columns)
+    copy_sql = f"COPY {schema_name}.{table_name} ({', '.join(column_list)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    logging.info(f"Running statement: {copy_sql}")
+    cursor.copy_expert(copy_sql, csv_buffer)
+    connection.commit()
+
+    # closer cursor
+    cursor.close()
+
+# CREATE TABLE keyword by table type
+# - temp: session-scoped (invisible to other connections, dropped when the session ends), not WAL-logged
+# - unlogged: visible to all connections, not WAL-logged (emptied after a crash)
+TABLE_TYPE_KEYWORD_DICT = {
+    'table': 'TABLE',
+    'temp': 'TEMP TABLE',
+    'unlogged': 'UNLOGGED TABLE',
+}
+
+def create_and_load_table(
+    connection: psycopg2.connect,
+    df: pd.DataFrame,
+    schema_name: str,
+    table_name: str,
+    load_method: str = 'insert',
+    column_type_dict: Optional[Dict[str, str]] = None,
+    table_type: str = 'table'
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - df: Pandas dataframe
+    - schema_name: Schema name (pg_temp for temp tables)
+    - table_name: Table name
+    - load_method: How data is loaded: 'insert' (executemany) or 'copy' (COPY ... FROM STDIN)
+    - column_type_dict: Column data types to use (inferred from the dataframe if not passed)
+    - table_type: Type of table created: 'table', 'temp' or 'unlogged'
+
+    Creates table (or empties it, if it exists with the same columns) and loads data (from dataframe)
+    - an existing table with other columns is dropped and created again
+    - insert data into table
+    """
+
+    # get column data types
+    column_type_dict = column_type_dict or {col: infer_sql_type(df[col]) for col in df.columns}
+    column_type_dict = {col: column_type_dict[col] for col in df.columns}
+
+    # get columns of existing table
+    existing_column_type_dict = get_table_column_dict(
+        connection=connection,
+        schema_name=schema_name,
+        table_name=table_name
+    )
+
+    # inititialize cursor
+    cursor = connection.cursor()
+
+    if existing_column_type_dict is not None and list(existing_column_type_dict.items()) == list(column_type_dict.items()):
+        # reuse table (TRUNCATE is cheaper than dropping and creating it again)
+        truncate_table_sql = f"TRUNCATE TABLE {schema_name}.{table_name}"
+        logging.info(f"Running statement: {truncate_table_sql}")
+        cursor.execute(truncate_table_sql)
+
+    else:
+        # drop table with other columns
+        if existing_column_type_dict is not None:
+            drop_table(
+                connection=connection,
+                schema_name=schema_name,
+                table_name=table_name
+            )
+
+        # create table
+        column_type_list = [f"{col} {data_type}" for col, data_type in column_type_dict.items()]
+        create_table_sql = f"CREATE {TABLE_TYPE_KEYWORD_DICT[table_type]} IF NOT EXISTS {schema_name}.{table_name} ({', '.join(column_type_list)})"
+        logging.info(f"Running statement: {create_table_sql}")
+        cursor.execute(create_table_sql)
+        set_table(
+            connection=connection,
+            schema_name=schema_name,
+            table_name=table_name,
+            column_dict=column_type_dict
+        )
+
+    # closer cursor
+    cursor.close()
+
+    # load data into table
+    load_function_dict = {
+        'copy': copy_df_to_table,
+        'insert': insert_df_to_table,
+    }
+    load_function_dict[load_method](
+        connection=connection,
+        df=df,
+        schema_name=schema_name,
+        table_name=table_name
+    )
+
 def create_or_alter_target_table(
     connection: psycopg2.connect,
     target_schema_name: str,
     target_table_name: str,
     source_schema_name: str,
     source_table_name: str,
-    drop_column_flag: bool
+    unique_column_list: List[str],
+    drop_column_flag: bool,
+    partition_column_name: Optional[str] = None,
+    partition_count: Optional[int] = None
 ):
     """
     Arguments:
@@ -239,64 +706,97 @@ def create_or_alter_target_table(
     - target_table_name: Target table name
     - source_schema_name: Schema name for source table
     - source_table_name: Source table name
+    - unique_column_list: List of fields that define uniqueness
     - drop_column_flag: True/false flag to determine column deletion from target table (true)
+    - partition_column_name: Column the target table is hash-partitioned on (not partitioned if not passed)
+    - partition_count: Number of hash partitions
 
     Based on source table columns, creates target table if it does not exist or alters target table columns
+    - adds the row hash column, hash partitioning and active unique index if the target table does not have them yet
     """
 
-    # create cursor
-    cursor = connection.cursor()
-
     # check if target table exists
-    target_table_exists_sql = f"""
-        SELECT
-            COUNT(*) > 0 AS target_table_exists_flag
-        FROM INFORMATION_SCHEMA.TABLES
-        WHERE
-                TABLE_SCHEMA = '{target_schema_name}'
-            AND TABLE_NAME = '{target_table_name}'
-        ;
-    """
-
-    # execute query for target table existence
-    logging.info(f"Executing statement: {target_table_exists_sql}")
-    cursor.execute(target_table_exists_sql)
-    target_table_exists_flag = cursor.fetchone()[0]
+    target_table_exists_flag = get_table_column_dict(
+        connection=connection,
+        schema_name=target_schema_name,
+        table_name=target_table_name
+    ) is not None
     logging.info(f"Target table {target_schema_name}.{target_table_name} exists: {target_table_exists_flag}")
 
-    # create or alter target table
-    if target_table_exists_flag:
-        logging.info(f"Altering target table: {target_schema_name}.{target_table_name}")
-        alter_target_table(
-            connection=connection,
-            target_schema_name=target_schema_name,
-            target_table_name=target_table_name,
-            source_schema_name=source_schema_name,
-            source_table_name=source_table_name,
-            drop_column_flag=drop_column_flag
-        )
-        logging.info(f"Target table altered as needed: {target_schema_name}.{target_table_name}")
-
-    else:
+    # create target table
+    if not target_table_exists_flag:
         logging.info(f"Creating target table: {target_schema_name}.{target_table_name}")
         create_target_table(
             connection=connection,
             target_schema_name=target_schema_name,
             target_table_name=target_table_name,
             source_schema_name=source_schema_name,
-            source_table_name=source_table_name
+            source_table_name=source_table_name,
+            partition_column_name=partition_column_name,
+            partition_count=partition_count
         )
         logging.info(f"Target table created: {target_schema_name}.{target_table_name}")
 
-    # close cursor
-    cursor.close()
+    # alter target table (compared in memory - no-op for a table just created from the source table)
+    logging.info(f"Altering target table: {target_schema_name}.{target_table_name}")
+    alter_target_table(
+        connection=connection,
+        target_schema_name=target_schema_name,
+        target_table_name=target_table_name,
+        source_schema_name=source_schema_name,
+        source_table_name=source_table_name,
+        drop_column_flag=drop_column_flag
+    )
+    logging.info(f"Target table altered as needed: {target_schema_name}.{target_table_name}")
+
+    # add row hash column, hash partitioning and active unique index (no-op once the table has them)
+    migrate_target_table(
+        connection=connection,
+        target_schema_name=target_schema_name,
+        target_table_name=target_table_name,
+        source_schema_name=source_schema_name,
+        source_table_name=source_table_name,
+        unique_column_list=unique_column_list,
+        partition_column_name=partition_column_name,
+        partition_count=partition_count
+    )
+
+def get_hash_partition_sql(
+    schema_name: str,
+    table_name: str,
+    partition_column_name: str,
+    partition_count: int
+) -> str:
+    """
+    Arguments:
+    - schema_name: Schema name
+    - table_name: Table name
+    - partition_column_name: Column the table is hash-partitioned on (must be part of the unique columns)
+    - partition_count: Number of hash partitions (named {table_name}_p{remainder})
+
+    Returns SQL to append to a CREATE TABLE statement, partitioning the table and creating its partitions
+    """
+
+    hash_partition_sql = f" PARTITION BY HASH ({partition_column_name});\n"
+    hash_partition_sql += ''.join([
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema_name}.{table_name}_p{remainder}
+        PARTITION OF {schema_name}.{table_name}
+        FOR VALUES WITH (MODULUS {partition_count}, REMAINDER {remainder});
+        """
+        for remainder in range(partition_count)
+    ])
+
+    return hash_partition_sql
 
 def create_target_table(
     connection: psycopg2.connect,
     target_schema_name: str,
     target_table_name: str,
     source_schema_name: str,
-    source_table_name: str
+    source_table_name: str,
+    partition_column_name: Optional[str] = None,
+    partition_count: Optional[int] = None
 ):
     """
     Arguments:
@@ -305,46 +805,23 @@ def create_target_table(
     - target_table_name: Target table name
     - source_schema_name: Schema name for source table
     - source_table_name: Source table name
+    - partition_column_name: Column the target table is hash-partitioned on (not partitioned if not passed)
+    - partition_count: Number of hash partitions (named {target_table_name}_p{remainder})
 
     Based on source table columns, creates target table
     """
 
-    # create cursor
-    cursor = connection.cursor()
-
-    # generate sql statemet to get source table column names and data types
-    source_table_columns_sql = f"""
-        WITH
-            -- select columns from source table
-            columns_source AS (
-                SELECT
-                    CONCAT(COLUMN_NAME, ' ', DATA_TYPE) AS column_name_data_type
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE
-                        TABLE_SCHEMA = '{source_schema_name}'
-                    AND TABLE_NAME = '{source_table_name}'
-            ),
-            columns_concat AS (
-                -- combine columns into string
-                SELECT
-                    STRING_AGG(column_name_data_type, ', ') AS column_name_data_type_agg
-                FROM columns_source
-            ),
-            final AS (
-                SELECT * FROM columns_concat
-            )
-        SELECT * FROM final
-            
-    """
-
-    # execute query for source table columns
-    logging.info(f"Executing statement: {source_table_columns_sql}")
-    cursor.execute(source_table_columns_sql)
-    column_name_data_type_agg = cursor.fetchone()[0]
+    # get source table column names and data types
+    source_column_dict = get_table_column_dict(
+        connection=connection,
+        schema_name=source_schema_name,
+        table_name=source_table_name
+    )
+    column_name_data_type_agg = ', '.join([f"{col} {data_type}" for col, data_type in source_column_dict.items()])
 
     # generate sql to create target table (includes audit fields)
     create_target_table_sql = f"""
-        CREATE TABLE {target_schema_name}.{target_table_name}
+        CREATE TABLE IF NOT EXISTS {target_schema_name}.{target_table_name}
         (
             {column_name_data_type_agg},
             audit_field_active_flag BOOLEAN,
@@ -353,26 +830,48 @@ def create_target_table(
             audit_field_end_datetime_utc TIMESTAMP,
             audit_field_insert_datetime_utc TIMESTAMP,
             audit_field_update_datetime_utc TIMESTAMP,
-            audit_field_delete_datetime_utc TIMESTAMP
+            audit_field_delete_datetime_utc TIMESTAMP,
+            audit_field_row_hash TEXT
         )
     """
 
+    # generate sql to partition target table (the partition column must be part of the unique columns)
+    if partition_column_name and partition_count:
+        create_target_table_sql += get_hash_partition_sql(
+            schema_name=target_schema_name,
+            table_name=target_table_name,
+            partition_column_name=partition_column_name,
+            partition_count=partition_count
+        )
+
+    # create cursor
+    cursor = connection.cursor()
+
     # execute query for target table creation
     logging.info(f"Executing statement: {create_target_table_sql}")
-    cursor.execute(create_target_table_sql)
-    connection.commit()
+    with transaction(connection=connection):
+        cursor.execute(create_target_table_sql)
 
     # close cursor
     cursor.close()
 
+    # update catalog cache
+    refresh_table(
+        connection=connection,
+        schema_name=target_schema_name,
+        table_name=target_table_name
+    )
+
     
-def alter_target_table(
+def migrate_target_table(
     connection: psycopg2.connect,
     target_schema_name: str,
     target_table_name: str,
     source_schema_name: str,
     source_table_name: str,
-    drop_column_flag: bool
+    unique_column_list: List[str],
+    partition_column_name: Optional[str] = None,
+    partition_count: Optional[int] = None
 ):
     """
     Arguments:
@@ -381,88 +880,261 @@ def alter_target_table(
     - target_table_name: Target table name
     - source_schema_name: Schema name for source table
     - source_table_name: Source table name
-    - drop_column_flag: True/false flag to determine column deletion from target table (true)
-
-    Based on source table columns, creates target table
+    - unique_column_list: List of fields that define uniqueness
+    - partition_column_name: Column the target table is hash-partitioned on (not partitioned if not passed)
+    - partition_count: Number of hash partitions
+
+    Adds ingest-managed schema features to target table (if missing):
+    - audit_field_row_hash: stored hash of the non-unique columns (backfilled for active rows)
+    - hash partitioning: an unpartitioned table is copied into a partitioned table of the same name
+      (the old table, renamed to {target_table_name}_unpartitioned, is dropped once the row counts match -
+      unless views depend on it, since they stay bound to it until recreated, e.g. by the next dbt run)
+    - unique index on the unique columns of active rows, covering the row hash (used by merges)
+
+    Runs with statement_timeout set to SQL_MIGRATION_STATEMENT_TIMEOUT (default 0 - disabled) for the migration transaction only,
+    since backfilling and copying a large table can take longer than the session's statement_timeout
     """
 
+    # check if target table has row hash column
+    row_hash_column_exists_flag = 'audit_field_row_hash' in get_table_column_dict(
+        connection=connection,
+        schema_name=target_schema_name,
+        table_name=target_table_name
+    )
+
     # create cursor
     cursor = connection.cursor()
 
-    # generate query to compare columns between source and target tables
-    columns_compare_sql = f"""
-        WITH
-            -- select columns from source table
-            columns_source AS (
-                SELECT
-                    COLUMN_NAME,
-                    DATA_TYPE
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE
-                        TABLE_SCHEMA = '{source_schema_name}'
-                    AND TABLE_NAME = '{source_table_name}'
-            ),
-            -- select columns from target table
-            columns_target AS (
-                SELECT
-                    COLUMN_NAME,
-                    DATA_TYPE
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE
-                        TABLE_SCHEMA = '{target_schema_name}'
-                    AND TABLE_NAME = '{target_table_name}'
-            ),
-            -- compare columns
-            columns_joined AS (
-                SELECT
-                    columns_target.COLUMN_NAME AS target_column_name,
-                    columns_target.DATA_TYPE AS target_data_type,
-                    columns_source.COLUMN_NAME AS source_column_name,
-                    columns_source.DATA_TYPE AS source_data_type,
-                    CASE
-                        WHEN (columns_target.COLUMN_NAME IS NULL) AND (columns_source.COLUMN_NAME IS NULL) THEN 'No Change'
-                        WHEN (columns_target.COLUMN_NAME IS NULL) THEN 'Add'
-                        WHEN (columns_source.COLUMN_NAME IS NULL) AND ({drop_column_flag} = TRUE) THEN 'Drop'
-                        WHEN (columns_target.DATA_TYPE != columns_source.DATA_TYPE) THEN 'Alter'
-                        ELSE 'No Change'
-                    END AS column_comparison_type
-                FROM columns_target
-                FULL OUTER JOIN columns_source ON columns_target.COLUMN_NAME = columns_source.COLUMN_NAME
-            ),
-            -- generate ALTER TABLE statements
-            alter_table_statements AS (
+    # check if target table needs to be partitioned
+    partition_migration_flag = False
+    if partition_column_name and partition_count:
+        cursor.execute(
+            """
+            SELECT
+                cls.relkind
+            FROM pg_catalog.pg_class AS cls
+            JOIN pg_catalog.pg_namespace AS nsp ON nsp.oid = cls.relnamespace
+            WHERE 1=1
+                AND nsp.nspname = %s
+                AND cls.relname = %s
+            """,
+            (target_schema_name, target_table_name)
+        )
+        partition_migration_flag = cursor.fetchone()[0] == 'r'
+
+    with transaction(connection=connection):
+
+        # lift statement timeout (until the transaction ends)
+        cursor.execute(f"SET LOCAL statement_timeout = '{os.getenv('SQL_MIGRATION_STATEMENT_TIMEOUT', '0')}'")
+
+        # add and backfill row hash column
+        if not row_hash_column_exists_flag:
+
+            # get non-unique columns from source table (the columns merges hash)
+            source_column_dict = get_table_column_dict(
+                connection=connection,
+                schema_name=source_schema_name,
+                table_name=source_table_name
+            )
+            non_unique_column_list = [col for col in source_column_dict if col not in unique_column_list]
+
+            add_row_hash_column_sql = f"ALTER TABLE {target_schema_name}.{target_table_name} ADD COLUMN audit_field_row_hash TEXT"
+            logging.info(f"Running statement: {add_row_hash_column_sql}")
+            cursor.execute(add_row_hash_column_sql)
+
+            # close duplicate active rows (keeping the latest) so the unique index can be built
+            close_duplicate_row_sql = f"""
+                UPDATE {target_schema_name}.{target_table_name} AS tgt
+                SET
+                    audit_field_active_flag = FALSE,
+                    audit_field_end_datetime_utc = NOW()
+                FROM (
+                    SELECT
+                        ctid,
+                        ROW_NUMBER() OVER (PARTITION BY {', '.join(unique_column_list)} ORDER BY audit_field_start_datetime_utc DESC, ctid DESC) AS row_num
+                    FROM {target_schema_name}.{target_table_name}
+                    WHERE audit_field_active_flag = TRUE
+                ) AS dup
+                WHERE 1=1
+                    AND tgt.ctid = dup.ctid
+                    AND dup.row_num > 1
+            """
+            logging.info(f"Running statement: {close_duplicate_row_sql}")
+            cursor.execute(close_duplicate_row_sql)
+            logging.info(f"Closed duplicate rows: {cursor.rowcount}")
+
+            backfill_row_hash_sql = f"""
+                UPDATE {target_schema_name}.{target_table_name} AS tgt
+                SET audit_field_row_hash = {get_row_hash_sql(column_list=non_unique_column_list, table_alias='tgt')}
+                WHERE tgt.audit_field_active_flag = TRUE
+            """
+            logging.info(f"Running statement: {backfill_row_hash_sql}")
+            cursor.execute(backfill_row_hash_sql)
+
+        # copy rows into hash-partitioned table (the active unique index is created on it below)
+        if partition_migration_flag:
+            unpartitioned_table_name = f"{target_table_name}_unpartitioned"
+            migrate_partition_sql = f"""
+                ALTER TABLE {target_schema_name}.{target_table_name} RENAME TO {unpartitioned_table_name};
+                ALTER INDEX IF EXISTS {target_schema_name}.{target_table_name}_active_unique_idx RENAME TO {unpartitioned_table_name}_active_unique_idx;
+                CREATE TABLE {target_schema_name}.{target_table_name} (LIKE {target_schema_name}.{unpartitioned_table_name} INCLUDING DEFAULTS)
+            """
+            migrate_partition_sql += get_hash_partition_sql(
+                schema_name=target_schema_name,
+                table_name=target_table_name,
+                partition_column_name=partition_column_name,
+                partition_count=partition_count
+            )
+            logging.info(f"Running statement: {migrate_partition_sql}")
+            cursor.execute(migrate_partition_sql)
+
+            copy_row_sql = f"INSERT INTO {target_schema_name}.{target_table_name} SELECT * FROM {target_schema_name}.{unpartitioned_table_name}"
+            logging.info(f"Running statement: {copy_row_sql}")
+            cursor.execute(copy_row_sql)
+            copied_row_count = cursor.rowcount
+
+            # check all rows were copied (otherwise the migration is rolled back)
+            cursor.execute(f"SELECT COUNT(*) FROM {target_schema_name}.{unpartitioned_table_name}")
+            unpartitioned_row_count = cursor.fetchone()[0]
+            if copied_row_count != unpartitioned_row_count:
+                raise ValueError(f"Copied {copied_row_count} of {unpartitioned_row_count} rows from {target_schema_name}.{unpartitioned_table_name} into partitioned {target_schema_name}.{target_table_name}.")
+            logging.info(f"Copied rows into partitioned table: {copied_row_count}")
+
+            cursor.execute(f"ANALYZE {target_schema_name}.{target_table_name}")
+
+            # drop old table unless views depend on it
+            cursor.execute(
+                """
                 SELECT
-                    *,
-                    CONCAT(
-                        'ALTER TABLE ', '{target_schema_name}', '.', '{target_table_name}', ' ',
-                        CASE
-                            WHEN column_comparison_type = 'Add' THEN CONCAT('ADD ', source_column_name, ' ', source_data_type)
-                            WHEN column_comparison_type = 'Alter' THEN CONCAT('ALTER COLUMN ', target_column_name, ' ', source_data_type)
-                            WHEN column_comparison_type = 'Drop' THEN CONCAT('DROP COLUMN ', target_column_name)
-                            ELSE NULL
-                        END
-                    ) AS alter_table_statement
-                FROM columns_joined
-                WHERE column_comparison_type != 'No Change'
-            ),
-            final AS (
-                SELECT * FROM alter_table_statements
+                    COUNT(DISTINCT rw.ev_class)
+                FROM pg_catalog.pg_depend AS dep
+                JOIN pg_catalog.pg_rewrite AS rw ON rw.oid = dep.objid
+                WHERE 1=1
+                    AND dep.classid = 'pg_catalog.pg_rewrite'::REGCLASS
+                    AND dep.refobjid = %s::REGCLASS
+                    AND rw.ev_class <> dep.refobjid
+                """,
+                (f"{target_schema_name}.{unpartitioned_table_name}",)
             )
-        SELECT * FROM final
+            dependent_view_count = cursor.fetchone()[0]
+            if dependent_view_count == 0:
+                drop_unpartitioned_table_sql = f"DROP TABLE {target_schema_name}.{unpartitioned_table_name}"
+                logging.info(f"Running statement: {drop_unpartitioned_table_sql}")
+                cursor.execute(drop_unpartitioned_table_sql)
+            else:
+                logging.warning(f"Partitioned {target_schema_name}.{target_table_name} - kept {target_schema_name}.{unpartitioned_table_name} since {dependent_view_count} views depend on it; drop it once they are recreated.")
+
+        # create active unique index
+        create_index_sql = f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS {target_table_name}_active_unique_idx
+            ON {target_schema_name}.{target_table_name} ({', '.join(unique_column_list)})
+            INCLUDE (audit_field_row_hash)
+            WHERE audit_field_active_flag = TRUE
+        """
+        logging.info(f"Running statement: {create_index_sql}")
+        cursor.execute(create_index_sql)
+
+    # close cursor
+    cursor.close()
+
+    # update catalog cache
+    if not row_hash_column_exists_flag or partition_migration_flag:
+        refresh_table(
+            connection=connection,
+            schema_name=target_schema_name,
+            table_name=target_table_name
+        )
+
+def alter_target_table(
+    connection: psycopg2.connect,
+    target_schema_name: str,
+    target_table_name: str,
+    source_schema_name: str,
+    source_table_name: str,
+    drop_column_flag: bool
+):
+    """
+    Arguments:
+    - connection: SQL database connection
+    - target_schema_name: Schema name for target table
+    - target_table_name: Target table name
+    - source_schema_name: Schema name for source table
+    - source_table_name: Source table name
+    - drop_column_flag: True/false flag to determine column deletion from target table (true)
+
+    Based on source table columns, alters target table columns
+    - columns with different data types are converted to a common type that holds the values of both (see get_common_sql_type):
+      the target column is widened if needed, and the source column is converted to the target's type, so merges compare like types
+    - target columns are never narrowed (e.g. a TEXT column stays TEXT when a batch only holds integers),
+      nor widened by source columns holding only nulls
     """
 
-    # execute query for column_comparisons
-    logging.info(f"Executing statement: {columns_compare_sql}")
-    cursor.execute(columns_compare_sql)
-    columns_compare_results = cursor.fetchall()
+    # create cursor
+    cursor = connection.cursor()
+
+    # get columns of source and target tables (from catalog cache)
+    source_column_dict = get_table_column_dict(
+        connection=connection,
+        schema_name=source_schema_name,
+        table_name=source_table_name
+    )
+    target_column_dict = get_table_column_dict(
+        connection=connection,
+        schema_name=target_schema_name,
+        table_name=target_table_name
+    )
 
-    # convert results to list of dictionaries instead of list of tuples
-    columns_compare_results_keys = [desc[0] for desc in cursor.description]
-    columns_compare_results_list = [dict(zip(columns_compare_results_keys, row)) for row in columns_compare_results]
+    # compare columns and generate ALTER TABLE statements
+    columns_compare_results_list = []
+    for column_name in list(target_column_dict) + [col for col in source_column_dict if col not in target_column_dict]:
+        target_data_type = target_column_dict.get(column_name)
+        source_data_type = source_column_dict.get(column_name)
+        if target_data_type is None:
+            column_comparison_type = 'Add'
+            alter_table_statement = f"ALTER TABLE {target_schema_name}.{target_table_name} ADD {column_name} {source_data_type}"
+        elif source_data_type is None and drop_column_flag and not column_name.startswith('audit_field_'):
+            column_comparison_type = 'Drop'
+            alter_table_statement = f"ALTER TABLE {target_schema_name}.{target_table_name} DROP COLUMN {column_name}"
+        elif source_data_type is not None and target_data_type != source_data_type:
+            column_comparison_type = 'Alter'
+            alter_table_statement = None
+        else:
+            continue
+        columns_compare_results_list.append({
+            'target_column_name': column_name if target_data_type is not None else None,
+            'target_data_type': target_data_type,
+            'source_column_name': column_name if source_data_type is not None else None,
+            'source_data_type': source_data_type,
+            'column_comparison_type': column_comparison_type,
+            'alter_table_statement': alter_table_statement,
+        })
 
     # loop through list and execute ALTER TABLE statement
     for columns_compare_result in columns_compare_results_list:
 
+        # convert target and/or source column to the common data type
+        if columns_compare_result['column_comparison_type'] == 'Alter':
+            column_name = columns_compare_result['target_column_name']
+            common_data_type = get_common_sql_type(
+                data_type=columns_compare_result['target_data_type'],
+                other_data_type=columns_compare_result['source_data_type']
+            )
+
+            # source columns without values (typed as TEXT) take the target's type instead of widening it
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {source_schema_name}.{source_table_name} WHERE {column_name} IS NOT NULL)")
+            if not cursor.fetchone()[0]:
+                common_data_type = columns_compare_result['target_data_type']
+
+            for schema_name, table_name, data_type in [
+                (target_schema_name, target_table_name, columns_compare_result['target_data_type']),
+                (source_schema_name, source_table_name, columns_compare_result['source_data_type']),
+            ]:
+                if data_type != common_data_type:
+                    alter_table_statement = f"ALTER TABLE {schema_name}.{table_name} ALTER COLUMN {column_name} TYPE {common_data_type} USING {column_name}::{common_data_type}"
+                    logging.info(f"Running statement: {alter_table_statement}")
+                    cursor.execute(alter_table_statement)
+            continue
+
         # parse out ALTER TABLE statement
         alter_table_statement = columns_compare_result['alter_table_statement']
         logging.info(f"Running statement: {alter_table_statement}")
@@ -473,6 +1145,63 @@ def alter_target_table(
     # close cursor
     cursor.close()
 
+    # update catalog cache
+    if columns_compare_results_list:
+        for schema_name, table_name in [(target_schema_name, target_table_name), (source_schema_name, source_table_name)]:
+            refresh_table(
+                connection=connection,
+                schema_name=schema_name,
+                table_name=table_name
+            )
+
+
+def get_row_hash_sql(
+    column_list: List[str],
+    table_alias: str
+) -> str:
+    """
+    Arguments:
+    - column_list: List of columns to hash
+    - table_alias: Alias of the table the columns belong to
+
+    Returns SQL expression hashing the text values of the columns:
+    - null values are left out of the hash, so adding a (null) column does not change existing hashes
+    - values are hashed as text, so changing a column's data type does not change existing hashes
+    """
+
+    # jsonb_build_object accepts at most 100 arguments -> build objects of 50 columns and concatenate
+    column_pair_list = [f"'{col}', {table_alias}.{col}::TEXT" for col in column_list]
+    jsonb_object_list = [
+        f"JSONB_BUILD_OBJECT({', '.join(column_pair_list[i:i + 50])})"
+        for i in range(0, len(column_pair_list), 50)
+    ] or ["'{}'::JSONB"]
+
+    row_hash_sql = f"MD5(JSONB_STRIP_NULLS({' || '.join(jsonb_object_list)})::TEXT)"
+
+    return row_hash_sql
+
+@contextmanager
+def transaction(
+    connection: psycopg2.connect
+):
+    """
+    Arguments:
+    - connection: SQL database connection (in autocommit mode)
+
+    Runs the statements executed inside the block in a single transaction (rolled back on error)
+    """
+
+    autocommit_flag = connection.autocommit
+    connection.autocommit = False
+
+    try:
+        yield
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.autocommit = autocommit_flag
 
 def merge_target_table(
     connection: psycopg2.connect,
@@ -490,9 +1219,13 @@ def merge_target_table(
     - target_table_name: Target table name
     - source_schema_name: Schema name for source table
     - source_table_name: Source table name
+    - unique_column_list: List of fields that define uniqueness
     - delete_row_flag: True/false flag to determine row deletion from target table (true)
 
     Based on source table rows, handles row inserts, updates, deletes for target table
+    - rows are matched on the (typed) unique columns and compared on the stored hash of the non-unique columns
+    - inserts skip keys that already have an active row (via the active unique index)
+    - all statements run in a single transaction
     """
 
     # create cursor
@@ -503,78 +1236,22 @@ def merge_target_table(
     source_alias = 'src'
 
     # get list of columns from source table (for use in INSERT/UPDATE statements)
-    source_column_sql = f"""
-        SELECT
-            COLUMN_NAME
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE
-                TABLE_SCHEMA = '{source_schema_name}'
-            AND TABLE_NAME = '{source_table_name}'
-    """
-    cursor.execute(source_column_sql)
-    source_column_list = [row[0] for row in cursor.fetchall()]
+    source_column_list = list(
+        get_table_column_dict(
+            connection=connection,
+            schema_name=source_schema_name,
+            table_name=source_table_name
+        )
+    )
 
     # generate strings for unique/nonunique columns
     source_column_str = ', '.join(source_column_list)
     source_column_str_w_source_alias = ', '.join([f"{source_alias}.{col}" for col in source_column_list])
-    unique_column_concat_str = "CONCAT_WS('_', " + ', '.join(unique_column_list) + ")"
-    unique_column_concat_str_w_target_alias = "CONCAT_WS('_', " + ', '.join([f"{target_alias}.{col}" for col in unique_column_list]) + ")"
-    unique_column_concat_str_w_source_alias = "CONCAT_WS('_', " + ', '.join([f"{source_alias}.{col}" for col in unique_column_list]) + ")"
+    unique_column_str = ', '.join(unique_column_list)
+    unique_column_str_w_target_alias = ', '.join([f"{target_alias}.{col}" for col in unique_column_list])
+    unique_column_join_str = ' AND '.join([f"{target_alias}.{col} = {source_alias}.{col}" for col in unique_column_list])
     non_unique_column_list = list(filter(lambda col: col not in unique_column_list, source_column_list))
-    non_unique_column_concat_str = "CONCAT_WS('_', " + ', '.join(non_unique_column_list) + ")"
-
-
-    # create view to store comparison results
-    comparison_schema_name = source_schema_name
-    comparison_table_name = f"compare_{target_table_name}"
-    create_comparison_table_sql = f"""
-        CREATE TABLE IF NOT EXISTS {comparison_schema_name}.{comparison_table_name} AS
-            WITH
-                {target_alias} AS (
-                    SELECT
-                        {unique_column_concat_str} AS unique_id,
-                        {non_unique_column_concat_str} AS compare_id
-                    FROM {target_schema_name}.{target_table_name}
-                    WHERE audit_field_active_flag = TRUE
-                ),
-                {source_alias} AS (
-                    SELECT
-                        {unique_column_concat_str} AS unique_id,
-                        {non_unique_column_concat_str} AS compare_id
-                    FROM {source_schema_name}.{source_table_name}
-                ),
-                joined AS (
-                    SELECT
-                        {target_alias}.unique_id AS target_unique_id,
-                        {target_alias}.compare_id AS target_compare_id,
-                        {source_alias}.unique_id AS source_unique_id,
-                        {source_alias}.compare_id AS source_compare_id,
-                        CASE
-                            WHEN 1=1
-                                AND ({target_alias}.unique_id IS NULL)
-                                AND ({source_alias}.unique_id IS NOT NULL) 
-                            THEN 'insert'
-                            WHEN 1=1
-                                AND ({source_alias}.unique_id IS NULL)
-                                AND ({target_alias}.unique_id IS NOT NULL)
-                                AND ({delete_row_flag} = TRUE)
-                            THEN 'delete'
-                            WHEN 1=1
-                                AND ({target_alias}.unique_id = {source_alias}.unique_id)
-                                AND ({target_alias}.compare_id != {source_alias}.compare_id) 
-                            THEN 'update'
-                            ELSE 'no change'
-                        END AS row_comparison
-                        FROM {target_alias}
-                        FULL OUTER JOIN {source_alias} USING (unique_id)
-                )
-            SELECT
-                *
-            FROM joined
-            WHERE row_comparison != 'no change'
-    """
-    logging.info(f"Running create comparison table sql: {create_comparison_table_sql}")
-    cursor.execute(create_comparison_table_sql)
+    source_row_hash_str = get_row_hash_sql(column_list=non_unique_column_list, table_alias=source_alias)
 
     # handle deletes
     delete_sql = f"""
@@ -584,77 +1261,140 @@ def merge_target_table(
             audit_field_record_type = 'delete',
             audit_field_end_datetime_utc = NOW(),
             audit_field_delete_datetime_utc = NOW()
-        FROM {comparison_schema_name}.{comparison_table_name} AS compare
         WHERE 1=1
             AND ({target_alias}.audit_field_active_flag = TRUE)
-            AND {unique_column_concat_str_w_target_alias} = compare.target_unique_id
-            AND compare.row_comparison = 'delete'
-    """
-    logging.info(f"Running delete statement: {delete_sql}")
-    cursor.execute(delete_sql)
-
-    # handle updates
-    update_existing_sql = f"""
-        UPDATE {target_schema_name}.{target_table_name} AS {target_alias}
-        SET
-                audit_field_active_flag = FALSE,
-                audit_field_end_datetime_utc = NOW(),
-                audit_field_update_datetime_utc = NOW()
-            FROM {comparison_schema_name}.{comparison_table_name} AS compare
-            WHERE 1=1
-                AND ({target_alias}.audit_field_active_flag = TRUE)
-                AND {unique_column_concat_str_w_target_alias} = compare.target_unique_id
-                AND compare.row_comparison = 'update'
+            AND NOT EXISTS (
+                SELECT 1
+                FROM {source_schema_name}.{source_table_name} AS {source_alias}
+                WHERE {unique_column_join_str}
+            )
     """
-    logging.info(f"Running update existing statement: {update_existing_sql}")
-    cursor.execute(update_existing_sql)
 
-    update_new_sql = f"""
-        INSERT INTO {target_schema_name}.{target_table_name} ({source_column_str}, audit_field_active_flag, audit_field_record_type, audit_field_start_datetime_utc, audit_field_insert_datetime_utc)
+    # handle updates (close changed rows and insert their new version)
+    update_sql = f"""
+        WITH
+            updated AS (
+                UPDATE {target_schema_name}.{target_table_name} AS {target_alias}
+                SET
+                    audit_field_active_flag = FALSE,
+                    audit_field_end_datetime_utc = NOW(),
+                    audit_field_update_datetime_utc = NOW()
+                FROM {source_schema_name}.{source_table_name} AS {source_alias}
+                WHERE 1=1
+                    AND ({target_alias}.audit_field_active_flag = TRUE)
+                    AND {unique_column_join_str}
+                    AND {target_alias}.audit_field_row_hash IS DISTINCT FROM {source_row_hash_str}
+                RETURNING {unique_column_str_w_target_alias}
+            )
+        INSERT INTO {target_schema_name}.{target_table_name} ({source_column_str}, audit_field_active_flag, audit_field_record_type, audit_field_start_datetime_utc, audit_field_insert_datetime_utc, audit_field_row_hash)
         SELECT
             {source_column_str_w_source_alias},
             TRUE AS audit_field_active_flag,
             'update' AS audit_field_record_type,
             NOW() AS audit_field_start_datetime_utc,
-            NOW() AS audit_field_insert_datetime_utc
+            NOW() AS audit_field_insert_datetime_utc,
+            {source_row_hash_str} AS audit_field_row_hash
         FROM {source_schema_name}.{source_table_name} AS {source_alias}
-        LEFT JOIN {comparison_schema_name}.{comparison_table_name} AS compare
-        ON {unique_column_concat_str_w_source_alias} = compare.source_unique_id
-        WHERE compare.row_comparison = 'update'
+        INNER JOIN updated USING ({unique_column_str})
+        ON CONFLICT ({unique_column_str}) WHERE audit_field_active_flag = TRUE DO NOTHING
     """
-    logging.info(f"Running update new statement: {update_new_sql}")
-    cursor.execute(update_new_sql)
 
-    # handle inserts
+    # handle inserts (rows without an active version; updated rows already have their new version)
     insert_sql = f"""
-        INSERT INTO {target_schema_name}.{target_table_name} ({source_column_str}, audit_field_active_flag, audit_field_record_type, audit_field_start_datetime_utc, audit_field_insert_datetime_utc)
+        INSERT INTO {target_schema_name}.{target_table_name} ({source_column_str}, audit_field_active_flag, audit_field_record_type, audit_field_start_datetime_utc, audit_field_insert_datetime_utc, audit_field_row_hash)
         SELECT
             {source_column_str_w_source_alias},
             TRUE AS audit_field_active_flag,
             'insert' AS audit_field_record_type,
             NOW() AS audit_field_start_datetime_utc,
-            NOW() AS audit_field_insert_datetime_utc
+            NOW() AS audit_field_insert_datetime_utc,
+            {source_row_hash_str} AS audit_field_row_hash
         FROM {source_schema_name}.{source_table_name} AS {source_alias}
-        LEFT JOIN {comparison_schema_name}.{comparison_table_name} AS compare
-        ON {unique_column_concat_str_w_source_alias} = compare.source_unique_id
-        WHERE compare.row_comparison = 'insert'
+        ON CONFLICT ({unique_column_str}) WHERE audit_field_active_flag = TRUE DO NOTHING
     """
-    logging.info(f"Running insert statement: {insert_sql}")
-    cursor.execute(insert_sql)
 
-    # drop comparison table
-    drop_comparison_table_sql = f"""
-        DROP TABLE {comparison_schema_name}.{comparison_table_name}
+    # refresh source table statistics (so the planner joins from the small source side)
+    analyze_sql = f"ANALYZE {source_schema_name}.{source_table_name}"
+    logging.info(f"Running statement: {analyze_sql}")
+    cursor.execute(analyze_sql)
+
+    # run merge in a single transaction
+    with transaction(connection=connection):
+
+        if delete_row_flag:
+            logging.info(f"Running delete statement: {delete_sql}")
+            cursor.execute(delete_sql)
+            logging.info(f"Deleted rows: {cursor.rowcount}")
+
+        logging.info(f"Running update statement: {update_sql}")
+        cursor.execute(update_sql)
+        logging.info(f"Updated rows: {cursor.rowcount}")
+
+        logging.info(f"Running insert statement: {insert_sql}")
+        cursor.execute(insert_sql)
+        logging.info(f"Inserted rows: {cursor.rowcount}")
+
+    # close cursor
+    cursor.close()
+
+# sql to find the hash partition of each value (partitions are read from the catalog, so any modulus works)
+HASH_PARTITION_SQL = """
+    SELECT
+        val,
+        child.relname AS partition_table_name
+    FROM UNNEST(%(value_list)s::{data_type}[]) AS val
+    CROSS JOIN pg_catalog.pg_inherits AS inh
+    INNER JOIN pg_catalog.pg_class AS child ON child.oid = inh.inhrelid
+    CROSS JOIN LATERAL REGEXP_MATCH(
+        PG_GET_EXPR(child.relpartbound, child.oid),
+        'modulus (\\d+), remainder (\\d+)'
+    ) AS bound
+    WHERE 1=1
+        AND inh.inhparent = %(table_name)s::REGCLASS
+        AND SATISFIES_HASH_PARTITION(inh.inhparent, bound[1]::INT, bound[2]::INT, val)
+"""
+
+def get_hash_partition_dict(
+    connection: psycopg2.connect,
+    schema_name: str,
+    table_name: str,
+    column_name: str,
+    value_list: List
+) -> Dict:
     """
-    logging.info(f"Running drop comparison table sql: {drop_comparison_table_sql}")
-    cursor.execute(drop_comparison_table_sql)
+    Arguments:
+    - connection: SQL database connection
+    - schema_name: Schema name
+    - table_name: Table name (hash-partitioned on column_name)
+    - column_name: Partition column name
+    - value_list: List of (non-null) partition column values
 
-    # commit
-    connection.commit()
+    Returns partition table name by value (empty if the table is not hash-partitioned)
+    """
+
+    # get data type of the partition column (values are hashed as that type)
+    column_data_type_dict = get_table_column_dict(
+        connection=connection,
+        schema_name=schema_name,
+        table_name=table_name
+    )
+    if not value_list or not column_data_type_dict or column_name not in column_data_type_dict:
+        return {}
+
+    # create cursor
+    cursor = connection.cursor()
+
+    cursor.execute(
+        HASH_PARTITION_SQL.format(data_type=column_data_type_dict[column_name]),
+        {'value_list': list(value_list), 'table_name': f"{schema_name}.{table_name}"}
+    )
+    partition_dict = dict(cursor.fetchall())
 
     # close cursor
     cursor.close()
 
+    return partition_dict
+
 def ingest_df_to_sql(
     connection: psycopg2.connect,
     df: pd.DataFrame,
@@ -664,7 +1404,13 @@ def ingest_df_to_sql(
     temp_table_name: str,
     unique_column_list: List[str],
     drop_column_flag: bool,
-    delete_row_flag: bool
+    delete_row_flag: bool,
+    load_method: str = 'insert',
+    temp_table_type: str = 'temp',
+    partition_column_name: Optional[str] = None,
+    partition_count: Optional[int] = None,
+    connection_pool: Optional[ConnectionPool] = None,
+    partition_connection_count: Optional[int] = None
 ):
     """
     Arguments:
@@ -672,53 +1418,181 @@ def ingest_df_to_sql(
     - df: Pandas dataframe
     - target_schema_name: Schema name for target table
     - target_table_name: Target table name
-    - temp_schema_name: Schema name for temp table
+    - temp_schema_name: Schema name for temp table (only used by unlogged temp tables)
     - temp_table_name: Temp table name
     - unique_column_list: List of fields that define uniqueness
     - drop_column_flag: True/false flag to determine column deletion from target table (true)
     - delete_row_flag: True/false flag to determine row deletion from target table (true)
+    - load_method: How the temp table is loaded: 'insert' (executemany) or 'copy' (COPY ... FROM STDIN)
+    - temp_table_type: Type of temp table:
+      - 'temp': TEMP table of the connection's session (concurrent jobs each get their own)
+      - 'unlogged': UNLOGGED table in temp_schema_name (for poolers that do not keep sessions, e.g. transaction mode)
+    - partition_column_name: Column (one of the unique columns) the target table is hash-partitioned on
+    - partition_count: Number of hash partitions (an existing unpartitioned target table is migrated, see migrate_target_table)
+    - connection_pool: Pool the connection came from (partitions are merged concurrently over its free connections)
+    - partition_connection_count: Maximum number of extra pool connections used to merge partitions (all free connections if not passed)
 
     Ingests dataframe data into database:
     - create temp table using dataframe data
+      (reused with TRUNCATE by later dataframes with the same schema on the same connection)
     - create or alter target table using temp table schema
+      (skipped when a dataframe with the same schema fingerprint was ingested into the target table before in this run)
     - merge records from temp table into target table, handling inserts, (type II) updates, deletes
+      (rows with a null value in a unique column are dropped with a warning, since they cannot be matched)
+      (for a hash-partitioned target table without row deletion, rows are merged straight into their partitions,
+      one transaction per partition - unless the temp table was already loaded with the whole dataframe to create or alter the target table)
     """
 
+    # get temp table schema
+    if temp_table_type == 'temp':
+        temp_schema_name = 'pg_temp'
+
+    # drop rows with a null unique value (they never match the target row on merge, so each load would add another active row)
+    null_unique_row_mask = df[unique_column_list].isnull().any(axis=1)
+    if null_unique_row_mask.any():
+        logging.warning(f"Dropping {null_unique_row_mask.sum()} rows with null values in unique columns ({', '.join(unique_column_list)}) before merging into {target_schema_name}.{target_table_name}.")
+        df = df[~null_unique_row_mask]
+
+    # get temp table column types of earlier dataframes with the same schema (None if target table needs checking)
+    fingerprint = get_df_fingerprint(df=df)
+    column_type_dict = get_verified_column_type_dict(
+        schema_name=target_schema_name,
+        table_name=target_table_name,
+        fingerprint=fingerprint
+    )
+
     # convert null values to SQL-compatible null values
     df = df.where(pd.notnull(df), None)
-    
-    # drop temp table
-    drop_table(
-        connection=connection,
-        schema_name=temp_schema_name,
-        table_name=temp_table_name
-    )
-    
-    # create temp table
-    create_and_load_table(
-        connection=connection,
-        df=df,
-        schema_name=temp_schema_name,
-        table_name=temp_table_name
-    )
 
-    # create or alter target table
-    create_or_alter_target_table(
-        connection=connection,
-        target_schema_name=target_schema_name,
-        target_table_name=target_table_name,
-        source_schema_name=temp_schema_name,
-        source_table_name=temp_table_name,
-        drop_column_flag=drop_column_flag
-    )
+    # create or alter target table (using the whole dataframe as source table)
+    temp_table_loaded_flag = column_type_dict is None
+    if column_type_dict is None:
+        create_and_load_table(
+            connection=connection,
+            df=df,
+            schema_name=temp_schema_name,
+            table_name=temp_table_name,
+            load_method=load_method,
+            table_type=temp_table_type
+        )
+        create_or_alter_target_table(
+            connection=connection,
+            target_schema_name=target_schema_name,
+            target_table_name=target_table_name,
+            source_schema_name=temp_schema_name,
+            source_table_name=temp_table_name,
+            unique_column_list=unique_column_list,
+            drop_column_flag=drop_column_flag,
+            partition_column_name=partition_column_name,
+            partition_count=partition_count
+        )
+        column_type_dict = get_table_column_dict(
+            connection=connection,
+            schema_name=temp_schema_name,
+            table_name=temp_table_name
+        )
+        set_verified_column_type_dict(
+            schema_name=target_schema_name,
+            table_name=target_table_name,
+            fingerprint=fingerprint,
+            column_type_dict=column_type_dict
+        )
+    else:
+        logging.info(f"Target table {target_schema_name}.{target_table_name} schema already matches dataframe schema.")
+
+    # get partition of each row
+    # - deletes need the whole source table, so they merge into the parent table
+    # - a temp table already loaded with the whole dataframe is merged into the parent table instead of being loaded again per partition
+    partition_dict = {}
+    if partition_column_name and not delete_row_flag and not temp_table_loaded_flag:
+        partition_dict = get_hash_partition_dict(
+            connection=connection,
+            schema_name=target_schema_name,
+            table_name=target_table_name,
+            column_name=partition_column_name,
+            value_list=df[partition_column_name].dropna().unique().tolist()
+        )
 
     # merge into target table
-    merge_target_table(
-        connection=connection,
-        target_schema_name=target_schema_name,
-        target_table_name=target_table_name,
-        source_schema_name=temp_schema_name,
-        source_table_name=temp_table_name,
-        unique_column_list=unique_column_list,
-        delete_row_flag=delete_row_flag
-    )
+    if not partition_dict:
+        if not temp_table_loaded_flag:
+            create_and_load_table(
+                connection=connection,
+                df=df,
+                schema_name=temp_schema_name,
+                table_name=temp_table_name,
+                load_method=load_method,
+                column_type_dict=column_type_dict,
+                table_type=temp_table_type
+            )
+        merge_target_table(
+            connection=connection,
+            target_schema_name=target_schema_name,
+            target_table_name=target_table_name,
+            source_schema_name=temp_schema_name,
+            source_table_name=temp_table_name,
+            unique_column_list=unique_column_list,
+            delete_row_flag=delete_row_flag
+        )
+        return
+
+    # split dataframe by partition (rows without a partition value are merged into the parent table)
+    partition_table_name_series = df[partition_column_name].map(partition_dict).fillna(target_table_name)
+    partition_df_list = list(df.groupby(partition_table_name_series, sort=True))
+
+    def merge_partition_df_list(partition_connection, partition_df_sublist):
+
+        for partition_table_name, partition_df in partition_df_sublist:
+
+            # load partition rows into their own temp table (e.g. tennisabstract_match_points_p3)
+            partition_temp_table_name = f"{temp_table_name}{partition_table_name[len(target_table_name):]}"
+            create_and_load_table(
+                connection=partition_connection,
+                df=partition_df,
+                schema_name=temp_schema_name,
+                table_name=partition_temp_table_name,
+                load_method=load_method,
+                column_type_dict=column_type_dict,
+                table_type=temp_table_type
+            )
+
+            # merge into partition
+            merge_target_table(
+                connection=partition_connection,
+                target_schema_name=target_schema_name,
+                target_table_name=partition_table_name,
+                source_schema_name=temp_schema_name,
+                source_table_name=partition_temp_table_name,
+                unique_column_list=unique_column_list,
+                delete_row_flag=delete_row_flag
+            )
+
+    # get extra connections (only connections free right now, so concurrent loaders never wait on each other)
+    extra_connection_count = len(partition_df_list) - 1
+    if partition_connection_count is not None:
+        extra_connection_count = min(extra_connection_count, partition_connection_count)
+    extra_connection_list = []
+    while connection_pool is not None and len(extra_connection_list) < extra_connection_count:
+        extra_connection = connection_pool.getconn(blocking=False)
+        if extra_connection is None:
+            break
+        extra_connection_list.append(extra_connection)
+    logging.info(f"Merging {len(partition_df_list)} partitions of {target_schema_name}.{target_table_name} over {len(extra_connection_list) + 1} connections.")
+
+    # merge partitions (each connection merges every n-th partition, the calling thread uses its own connection)
+    try:
+        with ThreadPoolExecutor(max_workers=max(len(extra_connection_list), 1)) as partition_executor:
+            future_list = [
+                partition_executor.submit(
+                    merge_partition_df_list,
+                    extra_connection,
+                    partition_df_list[i + 1::len(extra_connection_list) + 1]
+                )
+                for i, extra_connection in enumerate(extra_connection_list)
+            ]
+            merge_partition_df_list(connection, partition_df_list[::len(extra_connection_list) + 1])
+            for future in future_list:
+                future.result()
+    finally:
+        for extra_connection in extra_connection_list:
+            connection_pool.putconn(connection=extra_connection)
@@ -0,0 +1,111 @@
+from ingest.utils.functions.tennisabstract.match_points import (
+    parse_match_point_data,
+)
+from ingest.utils.functions.tennisabstract.matches import (
+    get_match_data_url,
+    get_match_page_content,
+    parse_match_data,
+)
+from typing import (
+    Dict,
+    Optional,
+)
+import logging
+
+def parse_match_page_data(
+    match_url: str,
+    content: str
+) -> Dict:
+    """
+    Arguments:
+    - match_url: match link
+    - content: match page source
+
+    Returns dictionary of match data and match point data from page source:
+    - match_data: dictionary of match information (from url, plus page data if any was scraped)
+    - match_point_data_list: list of dictionaries of match point data
+    """
+
+    # get match data from url and page
+    match_data_dict = parse_match_data(
+        match_url=match_url,
+        content=content
+    )
+
+    # get match point data from page
+    try:
+        match_point_data_list = parse_match_point_data(
+            match_url=match_url,
+            content=content
+        )
+    except Exception as e:
+        logging.info(f"Error getting point data for {match_url}: {e}")
+        match_point_data_list = []
+
+    match_page_data_dict = {
+        'match_data': match_data_dict,
+        'match_point_data_list': match_point_data_list,
+    }
+
+    return match_page_data_dict
+
+def get_match_page_data(
+    match_url: str,
+    retries: int,
+    delay: int
+) -> Dict:
+    """
+    Arguments:
+    - match_url: match link
+    - retries: Number of retry attempts
+    - delay: Base time (in seconds) between retries (backs off exponentially, with jitter)
+
+    Returns dictionary of match data and match point data, fetching the match page once
+    """
+
+    # get the page source
+    content = get_match_page_content(
+        match_url=match_url,
+        retries=retries,
+        delay=delay
+    )
+    if content is None:
+        # Return url data if all retries fail
+        logging.info(f"Returning url data")
+        return {
+            'match_data': get_match_data_url(match_url=match_url),
+            'match_point_data_list': [],
+        }
+
+    return parse_match_page_data(
+        match_url=match_url,
+        content=content
+    )
+
+def get_match_page_record(
+    match_url: str,
+    match_page_data: Optional[Dict],
+    match_data_missing_flag: bool
+) -> Dict:
+    """
+    Arguments:
+    - match_url: match link
+    - match_page_data: Dictionary of match data and match point data (None if the page could not be fetched or parsed)
+    - match_data_missing_flag: True/false flag for a match missing from the matches table
+
+    Returns dictionary of match data and match point data to load:
+    - match_data: match data (url data if the page could not be fetched or parsed),
+      or None for a match already in the matches table (refetched for its points only, so the stored match row is never replaced)
+    - match_point_data_list: list of dictionaries of match point data
+    """
+
+    if match_page_data is None:
+        match_page_data = {
+            'match_data': get_match_data_url(match_url=match_url),
+            'match_point_data_list': [],
+        }
+
+    if not match_data_missing_flag:
+        match_page_data = {**match_page_data, 'match_data': None}
+
+    return match_page_data
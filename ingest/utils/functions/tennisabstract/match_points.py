@@ -0,0 +1,139 @@
+from bs4 import BeautifulSoup
+from ingest.utils.functions.scrape import (
+    scrape_javascript_var,
+)
+from ingest.utils.functions.tennisabstract.matches import (
+    get_match_page_content,
+)
+from typing import (
+    List,
+)
+import logging
+import lxml.html
+
+def get_pointlog_row_list_lxml(
+    pointlog_raw: str
+) -> List[List[str]]:
+    """
+    Arguments:
+    - pointlog_raw: pointlog html table
+
+    Returns text of each cell per row (after 1st tr - headers), parsed with lxml
+    - cell text is stripped and joined the same way as BeautifulSoup's get_text(strip=True)
+    """
+
+    pointlog_tree = lxml.html.fragment_fromstring(pointlog_raw, create_parent='div')
+    pointlog_tr_list = list(pointlog_tree.iter('tr'))[1:]
+
+    pointlog_row_list = [
+        [''.join(text.strip() for text in td.itertext()) for td in tr.iter('td')]
+        for tr in pointlog_tr_list
+    ]
+
+    return pointlog_row_list
+
+def get_pointlog_row_list_bs4(
+    pointlog_raw: str
+) -> List[List[str]]:
+    """
+    Arguments:
+    - pointlog_raw: pointlog html table
+
+    Returns text of each cell per row (after 1st tr - headers), parsed with BeautifulSoup (html.parser)
+    """
+
+    pointlog_soup = BeautifulSoup(pointlog_raw, 'html.parser')
+    pointlog_tr_list = pointlog_soup.find_all('tr')[1:]
+
+    pointlog_row_list = [
+        [td.get_text(strip=True) for td in tr.find_all('td')]
+        for tr in pointlog_tr_list
+    ]
+
+    return pointlog_row_list
+
+# pointlog parsers by name
+POINTLOG_PARSER_DICT = {
+    'lxml': get_pointlog_row_list_lxml,
+    'html.parser': get_pointlog_row_list_bs4,
+}
+
+def parse_match_point_data(
+    match_url: str,
+    content: str,
+    parser: str = 'lxml'
+) -> List:
+    """
+    Arguments:
+    - match_url: match link
+    - content: match page source
+    - parser: HTML parser for the pointlog: 'lxml' (fast) or 'html.parser' (BeautifulSoup)
+
+    Returns list of dictionaries of match point data from page source
+    """
+
+    # initialize data
+    match_point_list = []
+
+    # get the pointlog data
+    pointlog_raw = scrape_javascript_var(
+        content=content,
+        var='pointlog'
+    )
+
+    # extract the cell text of each row (one pass per row)
+    pointlog_row_list = POINTLOG_PARSER_DICT[parser](pointlog_raw)
+
+    # filter out empty rows
+    pointlog_row_list = [
+        td_text_list for td_text_list in pointlog_row_list
+        if all(td_text_list)
+    ]
+
+    # loop through row list
+    for index, td_text_list in enumerate(pointlog_row_list):
+        point_data = {
+            'match_url': match_url,
+            'point_number': index + 1,
+            'server': td_text_list[0],
+            'sets': td_text_list[1],
+            'games': td_text_list[2],
+            'points': td_text_list[3],
+            'point_description': td_text_list[4],
+        }
+        match_point_list.append(point_data)
+
+    return match_point_list
+
+def get_match_point_data(
+    match_url: str,
+    retries: int,
+    delay: int
+) -> List:
+    """
+    Arguments:
+    - match_url: match link
+    - retries: Number of retry attempts
+    - delay: Base time (in seconds) between retries (backs off exponentially, with jitter)
+
+    Returns list of dictionaries of match point data
+    """
+
+    # get the page source
+    content = get_match_page_content(
+        match_url=match_url,
+        retries=retries,
+        delay=delay
+    )
+    if content is None:
+        logging.info(f"Returning empty list")
+        return []
+
+    try:
+        return parse_match_point_data(
+            match_url=match_url,
+            content=content
+        )
+    except Exception as e:
+        logging.info(f"Error getting point data for {match_url}: {e}")
+        return []
@@ -1,12 +1,19 @@
 from bs4 import BeautifulSoup
+from ingest.utils.functions.retry import (
+    get_retry_delay,
+    is_retryable_error,
+)
 from ingest.utils.functions.scrape import (
     make_request,
 )
 from typing import (
     Dict,
     List,
+    Optional,
 )
 import logging
+import lxml.etree
+import lxml.html
 import re
 import time
 
@@ -63,69 +70,197 @@ def get_match_data_url(
 
     return match_data_dict
 
-def get_match_data_scraped(
+# match result (b): <winner> d. <loser> score
+MATCH_RESULT_PATTERN = re.compile(r".+\sd\.\s.+\s.+")
+
+def get_element_string(
+    element: lxml.html.HtmlElement
+) -> Optional[str]:
+    """
+    Arguments:
+    - element: lxml element
+
+    Returns the element's only string (like BeautifulSoup's .string), or None if it has no or several children
+    - an element holding a single child element with a single string returns that string
+    """
+
+    child_list = list(element)
+
+    if not child_list:
+        return element.text
+
+    if len(child_list) == 1 and not element.text and not child_list[0].tail:
+        return get_element_string(element=child_list[0])
+
+    return None
+
+def parse_match_data_scraped(
+    content: str,
+    parser: str = 'lxml'
+) -> Dict:
+    """
+    Arguments:
+    - content: match page source
+    - parser: HTML parser: 'lxml' (fast) or 'html.parser' (BeautifulSoup)
+
+    Returns dictionary of match information from page source
+    """
+
+    # initialize data
+    match_dict = {}
+
+    # parse page source
+    if parser == 'lxml':
+        try:
+            page = lxml.html.document_fromstring(content)
+        except lxml.etree.ParserError as e:
+            logging.info(f"Error encountered when parsing page: {e}")
+            page = None
+    else:
+        soup = BeautifulSoup(content, 'html.parser')
+
+    # get the match title (<title>): <match info>: <player1> vs <player2> Detailed Stats | Tennis Abstract
+    try:
+        if parser == 'lxml':
+            match_title_text = page.find('.//title').text_content()
+        else:
+            match_title_text = soup.find('title').text
+        match_title = match_title_text.split(' Detailed Stats | Tennis Abstract')[0]
+    except Exception as e:
+        logging.info(f"Error encountered when getting data for variable match_title: {e}")
+        match_title = None
+    match_dict["match_title"] = match_title
+
+    # get the match result (b): <winner> d. <loser> score
+    try:
+        if parser == 'lxml':
+            match_result = next(
+                b for b in page.iter('b')
+                if MATCH_RESULT_PATTERN.search(get_element_string(element=b) or '')
+            ).text_content()
+        else:
+            match_result = soup.find('b', string=MATCH_RESULT_PATTERN).text
+    except Exception as e:
+        logging.info(f"Error encountered when getting data for variable match_result: {e}")
+        match_result = None
+    match_dict["match_result"] = match_result
+
+    return match_dict
+
+def fetch_match_page_content(
+    match_url: str
+) -> str:
+    """
+    Arguments:
+    - match_url: match link
+
+    Returns match page source (single attempt - raises if the page could not be fetched, so the caller can retry)
+    """
+
+    # navigate to the page
+    response = make_request(url=match_url)
+
+    return response.text
+
+def get_match_page_content(
     match_url: str,
     retries: int,
     delay: int
-) -> Dict:
+) -> Optional[str]:
     """
     Arguments:
     - match_url: match link
     - retries: Number of retry attempts
-    - delay: Time (in seconds) between retries
+    - delay: Base time (in seconds) between retries (backs off exponentially, with jitter)
 
-    Returns dictionary of match information from url
+    Returns match page source, or None if the page could not be fetched
     """
 
-    # initialize data
-    match_dict = {}
-
     attempt = 0
 
     while attempt < retries:
 
         try:
 
-            # navigate to the page
-            response = make_request(url=match_url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-                
-            # get the match title (<title>): <match info>: <player1> vs <player2> Detailed Stats | Tennis Abstract
-            try:
-                match_title = soup.find('title').text.split(' Detailed Stats | Tennis Abstract')[0]
-            except Exception as e:
-                logging.info(f"Error encountered when getting data for variable match_title: {e}")
-                match_title = None
-            match_dict["match_title"] = match_title
-
-            # get the match result (b): <winner> d. <loser> score
-            try:
-                match_result = soup.find('b', string=re.compile(r".+\sd\.\s.+\s.+")).text
-            except Exception as e:
-                logging.info(f"Error encountered when getting data for variable match_result: {e}")
-                match_result = None
-            match_dict["match_result"] = match_result
-
-            # check if all values in dict are None -> return empty dict
-            if all(value is None for value in match_dict.values()):
-                logging.info(f"All values None for {match_url} - Returning empty dictionary.")
-                return {}
-
-            # return dictionary if data successfully extracted
-            return match_dict
+            return fetch_match_page_content(match_url=match_url)
 
         except Exception as e:
             attempt += 1
             logging.warning(f"Attempt {attempt} failed for {match_url}: {e}")
+            if not is_retryable_error(error=e):
+                logging.error(f"Not retrying {match_url}.")
+                break
             if attempt < retries:
-                logging.info(f"Retrying in {delay} seconds...")
-                time.sleep(delay)  # Delay before retrying
+                # back off exponentially with jitter (or as long as the host asked)
+                retry_delay = get_retry_delay(attempt=attempt, delay=delay, error=e)
+                logging.info(f"Retrying in {retry_delay:.1f} seconds...")
+                time.sleep(retry_delay)  # Delay before retrying
             else:
                 logging.error(f"Max retries reached for {match_url}.")
 
-    # Return empty dictionary if all retries fail
-    logging.info(f"Returning empty dictionary")
-    return {}
+    # Return None if all retries fail
+    logging.info(f"Returning no page source")
+    return None
+
+def get_match_data_scraped(
+    match_url: str,
+    retries: int,
+    delay: int
+) -> Dict:
+    """
+    Arguments:
+    - match_url: match link
+    - retries: Number of retry attempts
+    - delay: Base time (in seconds) between retries (backs off exponentially, with jitter)
+
+    Returns dictionary of match information from url
+    """
+
+    # get the page source
+    content = get_match_page_content(
+        match_url=match_url,
+        retries=retries,
+        delay=delay
+    )
+    if content is None:
+        logging.info(f"Returning empty dictionary")
+        return {}
+
+    match_dict = parse_match_data_scraped(content=content)
+
+    # check if all values in dict are None -> return empty dict
+    if all(value is None for value in match_dict.values()):
+        logging.info(f"All values None for {match_url} - Returning empty dictionary.")
+        return {}
+
+    return match_dict
+
+def parse_match_data(
+    match_url: str,
+    content: str
+) -> Dict:
+    """
+    Arguments:
+    - match_url: match link
+    - content: match page source
+
+    Returns dictionary of match information from url and page source
+    """
+
+    match_data_dict_scraped = parse_match_data_scraped(content=content)
+
+    # check if all values in dict are None -> keep url data only
+    if all(value is None for value in match_data_dict_scraped.values()):
+        logging.info(f"All values None for {match_url} - Returning url data.")
+        match_data_dict_scraped = {}
+
+    # combine dictionaries
+    match_data_dict = {
+        **get_match_data_url(match_url=match_url),
+        **match_data_dict_scraped,
+    }
+
+    return match_data_dict
 
 def get_match_data(
     match_url: str,
@@ -136,7 +271,7 @@ def get_match_data(
     Arguments:
     - match_url: match link
     - retries: Number of retry attempts
-    - delay: Time (in seconds) between retries
+    - delay: Base time (in seconds) between retries (backs off exponentially, with jitter)
 
     Returns dictionary of match information from url
     """
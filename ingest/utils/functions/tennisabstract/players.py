@@ -0,0 +1,289 @@
+from bs4 import BeautifulSoup
+from ingest.utils.functions.replay import (
+    get_replay_path,
+)
+from ingest.utils.functions.retry import (
+    get_retry_delay,
+    is_retryable_error,
+)
+from ingest.utils.functions.scrape import (
+    checkout_chromedriver,
+    make_request,
+    scrape_javascript_var,
+    scrape_javascript_var_dict,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from typing import (
+    Dict,
+    List,
+    Optional,
+)
+import ast
+import logging
+import re
+import time
+
+def create_player_url(
+    player_gender: str,
+    player_name: str
+) -> str:
+    """
+    Arguments:
+    - player_gender: gender (M or W)
+    - player_name: player full name
+
+    Returns url
+    """
+
+    # format parts of url string
+    url_player_str = 'player' if player_gender == 'M' else 'wplayer'
+    url_player_name = player_name.replace(' ', '')
+
+    player_url = f"https://www.tennisabstract.com/cgi-bin/{url_player_str}.cgi?p={url_player_name}"
+
+    return player_url
+
+def get_player_url_list() -> List[Dict]:
+    """
+    Returns list of player urls from source (url)
+    """
+
+    # retrieve url page
+    player_list_url = 'https://www.tennisabstract.com/jsplayers/mwplayerlist.js'
+    response = make_request(player_list_url)
+    
+    # retrieve list-like string
+    player_list_val = scrape_javascript_var(
+                content=response.text,
+                var='playerlist'
+    )
+    # convert to list
+    player_list = ast.literal_eval(player_list_val)
+
+    # loop through each element and create url
+    player_url_list = []
+    for player in player_list:
+
+        # each element in list is of format: (<gender>) <name>)
+        regex_pattern = r'(?P<gender>\((.*?)\))\s*(?P<name>.*)'
+        regex_match = re.search(regex_pattern, player)
+        gender = regex_match.group('gender').strip('()')
+        name = regex_match.group('name')
+
+        # create url
+        player_url = create_player_url(
+            player_gender=gender,
+            player_name=name
+        )
+        player_url_dict = {}
+        player_url_dict['player_url'] = player_url
+        player_url_list.append(player_url_dict)
+
+    return player_url_list
+
+def get_player_data_url(
+    player_url: str
+) -> Dict:
+    """
+    Arguments:
+    - player_url: player link
+
+    Returns dictionary of player information from url
+    """
+
+    # get player data
+    player_data_dict = {}
+    player_data_dict['player_url'] = player_url
+    player_data_dict['player_gender'] = 'W' if 'wplayer' in player_url else 'M'
+
+    return player_data_dict
+
+# variables scraped from the player page javascript
+PLAYER_VAR_LIST = ['nameparam', 'fullname', 'lastname', 'currentrank', 'peakrank', 'peakfirst', 'peaklast', 'dob', 'ht', 'hand', 'backhand', 'country', 'shortlist', 'careerjs', 'active', 'lastdate', 'twitter', 'current_dubs', 'peak_dubs', 'peakfirst_dubs', 'liverank', 'chartagg', 'photog', 'photog_credit', 'photog_link', 'itf_id', 'atp_id', 'dc_id', 'wiki_id']
+
+def parse_player_script_content(
+    page_source: str
+) -> Optional[str]:
+    """
+    Arguments:
+    - page_source: player page source
+
+    Returns content of the player page <script language='JavaScript'> tag, or None if the tag is missing
+    """
+
+    soup = BeautifulSoup(page_source, 'html.parser')
+    script_tag = soup.find('script', attrs={'language': 'JavaScript'})
+    if script_tag is None:
+        return None
+
+    script_content = script_tag.string or ''
+
+    return script_content
+
+def render_player_script_content(
+    player_url: str
+) -> str:
+    """
+    Arguments:
+    - player_url: player link
+
+    Returns content of the player page <script language='JavaScript'> tag after rendering the page in the browser
+    """
+
+    with checkout_chromedriver() as driver:
+
+        # navigate to the page
+        driver.get(player_url)
+
+        # wait for the page to fully render (ensure JavaScript is executed)
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.XPATH, "//script[@language='JavaScript']"))
+        )
+        # locate script tag
+        script_tag = driver.find_element(By.XPATH, "//script[@language='JavaScript']")
+        script_content = script_tag.get_attribute("innerHTML")
+
+    return script_content
+
+def parse_player_data_scraped(
+    script_content: str
+) -> Dict:
+    """
+    Arguments:
+    - script_content: player page javascript
+
+    Returns dictionary of player information from page javascript
+    """
+
+    # read every variable in one pass
+    script_var_dict = scrape_javascript_var_dict(content=script_content)
+
+    # keep variables to be retrieved
+    player_dict = {var: script_var_dict.get(var) for var in PLAYER_VAR_LIST}
+
+    return player_dict
+
+def fetch_player_data_scraped(
+    player_url: str
+) -> Dict:
+    """
+    Arguments:
+    - player_url: player link
+
+    Returns dictionary of player information from url (single attempt - raises if the page could not be fetched, so the caller can retry)
+    - reads the page javascript over plain http; renders the page in the browser only if the variables are not in the page source
+    """
+
+    # get the page source
+    response = make_request(url=player_url)
+    script_content = parse_player_script_content(page_source=response.text)
+    player_dict = parse_player_data_scraped(script_content=script_content or '')
+
+    # fall back to the browser if the variables are not in the page source (no browser in replay mode)
+    if all(value is None for value in player_dict.values()) and not get_replay_path():
+        logging.info(f"No player variables in page source for {player_url} - Rendering page in browser.")
+        script_content = render_player_script_content(player_url=player_url)
+        player_dict = parse_player_data_scraped(script_content=script_content)
+
+    # check if all values in dict are None -> return empty dict
+    if all(value is None for value in player_dict.values()):
+        logging.info(f"All values None for {player_url} - Returning empty dictionary.")
+        return {}
+
+    # return dictionary if data successfully extracted
+    return player_dict
+
+def get_player_data_scraped(
+    player_url: str,
+    retries: int,
+    delay: int
+) -> Dict:
+    """
+    Arguments:
+    - player_url: player link
+    - retries: Number of retry attempts
+    - delay: Base time (in seconds) between retries (backs off exponentially, with jitter)
+
+    Returns dictionary of player information from url
+    - reads the page javascript over plain http; renders the page in the browser only if the variables are not in the page source
+    """
+
+    attempt = 0
+
+    while attempt < retries:
+
+        try:
+
+            return fetch_player_data_scraped(player_url=player_url)
+
+        except Exception as e:
+            attempt += 1
+            logging.warning(f"Attempt {attempt} failed for {player_url}: {e}")
+            if not is_retryable_error(error=e):
+                logging.error(f"Not retrying {player_url}.")
+                break
+            if attempt < retries:
+                # back off exponentially with jitter (or as long as the host asked)
+                retry_delay = get_retry_delay(attempt=attempt, delay=delay, error=e)
+                logging.info(f"Retrying in {retry_delay:.1f} seconds...")
+                time.sleep(retry_delay)  # Delay before retrying
+            else:
+                logging.error(f"Max retries reached for {player_url}.")
+
+    # Return empty dictionary if all retries fail
+    logging.info(f"Returning empty dictionary")
+    return {}
+
+def fetch_player_data(
+    player_url: str
+) -> Dict:
+    """
+    Arguments:
+    - player_url: player link
+
+    Returns dictionary of player information from url (single attempt - raises if the page could not be fetched, so the caller can retry)
+    """
+
+    # combine player data from url and from webscrape
+    player_data_dict = {
+        **get_player_data_url(player_url=player_url),
+        **fetch_player_data_scraped(player_url=player_url),
+    }
+
+    return player_data_dict
+
+def get_player_data(
+    player_url: str,
+    retries: int,
+    delay: int 
+) -> Dict:
+    """
+    Arguments:
+    - player_url: player link
+    - retries: Number of retry attempts
+    - delay: Base time (in seconds) between retries (backs off exponentially, with jitter)
+
+    Returns dictionary of player information from url
+    """
+
+
+    # get player data from url
+    player_data_dict_url = get_player_data_url(
+        player_url=player_url
+    )
+    # get player data from webscrape
+    player_data_dict_scraped = get_player_data_scraped(
+        player_url=player_url,
+        retries=retries,
+        delay=delay
+    )
+
+    # combine dictionaries
+    player_data_dict = {
+        **player_data_dict_url,
+        **player_data_dict_scraped,
+    }
+
+    return player_data_dict
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+# version of the point description parsing (bump when the logic changes so dbt recomputes older rows)
+POINT_DESCRIPTION_PARSER_VERSION = 1
+
+# columns added by the point description parsing
+POINT_DESCRIPTION_COLUMN_LIST = [
+    'number_of_shots_in_point',
+    'last_shot_in_point',
+    'point_result',
+    'rally_length',
+    'point_winner_rally_role',
+    'point_description_parser_version',
+]
+
+# point descriptions without a rally
+POINT_DESCRIPTION_NO_RALLY_LIST = ['Point penalty.', 'Unknown.']
+
+# point outcomes (a point description must contain one of these, case-insensitive)
+POINT_OUTCOME_LIST = ['ace', 'double fault', 'forced error', 'unforced error', 'service winner', 'winner']
+
+# point results hit by the player who won the point / lost the point
+POINT_RESULT_WINNER_LIST = ['ace', 'service winner', 'winner']
+POINT_RESULT_ERROR_LIST = ['double fault', 'forced error', 'unforced error']
+
+def parse_point_description(
+    point_description: pd.Series
+) -> pd.DataFrame:
+    """
+    Arguments:
+    - point_description: Point descriptions (semicolon-separated shots of the rally)
+
+    Returns dataframe (same index) of rally data parsed from the point descriptions
+    - mirrors the point description logic of int_tennisabstract__match_points
+    - point_winner_rally_role is 'server' or 'receiver' (the receiver's name comes from the match)
+    """
+
+    description = point_description.astype('string')
+    description_lower = description.str.lower()
+
+    # nullify point description if not valid
+    # - no rally occurred/recorded
+    # - rally resulted in a 'challenge'
+    # - rally does not contain an 'outcome' string
+    valid_flag = (
+        ~description.isin(POINT_DESCRIPTION_NO_RALLY_LIST)
+        & ~description_lower.str.contains('challenge was incorrect', regex=False)
+        & description_lower.str.contains('|'.join(POINT_OUTCOME_LIST), regex=True)
+    ).fillna(False).astype(bool)
+    description = description.where(valid_flag)
+
+    # get number of shots (separated by ';') and last shot in rally
+    number_of_shots_in_point = (description.str.count(';') + 1).astype('Int64')
+    last_shot_in_point = description.str.rsplit(';', n=1).str[-1].str.strip(' ')
+
+    # get last shot outcome: last ',' element, without '.' and anything from '(' on
+    point_result = (
+        last_shot_in_point
+        .str.rsplit(',', n=1).str[-1]
+        .str.replace('.', '', regex=False)
+        .str.split('(', n=1).str[0]
+        .str.strip(' ')
+    )
+    point_result = point_result.mask(point_result == '')
+
+    winner_flag = point_result.isin(POINT_RESULT_WINNER_LIST).to_numpy(dtype=bool)
+    error_flag = point_result.isin(POINT_RESULT_ERROR_LIST).to_numpy(dtype=bool)
+    shot_count = number_of_shots_in_point.to_numpy(dtype='float64', na_value=np.nan)
+    odd_flag = shot_count % 2 == 1
+    even_flag = shot_count % 2 == 0
+
+    # get rally length (errors don't count as shots in the rally)
+    rally_length = pd.Series(
+        np.select([error_flag, winner_flag], [shot_count - 1, shot_count], default=np.nan),
+        index=point_description.index
+    ).astype('Int64')
+
+    # get point winner from rally
+    # - odd length: server hit last shot
+    # - even length: receiver hit last shot
+    point_result_array = point_result.to_numpy(dtype=object, na_value=None)
+    point_winner_rally_role = pd.Series(
+        np.select(
+            [
+                odd_flag & winner_flag,
+                odd_flag & error_flag,
+                even_flag & (point_result_array == 'winner'),
+                even_flag & np.isin(point_result_array, ['forced error', 'unforced error']),
+            ],
+            ['server', 'receiver', 'receiver', 'server'],
+            default=None
+        ),
+        index=point_description.index,
+        dtype='string'
+    )
+
+    return pd.DataFrame({
+        'number_of_shots_in_point': number_of_shots_in_point,
+        'last_shot_in_point': last_shot_in_point,
+        'point_result': point_result,
+        'rally_length': rally_length,
+        'point_winner_rally_role': point_winner_rally_role,
+        'point_description_parser_version': POINT_DESCRIPTION_PARSER_VERSION,
+    }, index=point_description.index)
+
+def add_point_description_columns(
+    match_point_data_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Arguments:
+    - match_point_data_df: Dataframe of match point data (with point_description column)
+
+    Returns dataframe with rally data parsed from point descriptions added as columns
+    """
+
+    return pd.concat(
+        [
+            match_point_data_df,
+            parse_point_description(point_description=match_point_data_df['point_description']),
+        ],
+        axis=1
+    )
@@ -0,0 +1,191 @@
+from typing import (
+    Optional,
+)
+from urllib.parse import urlparse
+import logging
+import os
+import threading
+import time
+
+# http statuses that mean the host wants us to slow down
+THROTTLE_STATUS_CODE_LIST = [429, 503]
+
+class HostThrottle:
+    """
+    Adaptive per-host throttle shared by all fetch threads:
+    - token bucket spacing out request starts (up to requests_per_second)
+    - concurrency limit on requests in flight (up to max_concurrency)
+    - both are halved when the host throttles (429/503) and grow back with successful (2xx/304) requests (AIMD)
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        max_concurrency: int,
+        min_requests_per_second: float = 0.2
+    ):
+        """
+        Arguments:
+        - requests_per_second: Maximum request starts per second
+        - max_concurrency: Maximum number of requests in flight
+        - min_requests_per_second: Rate the throttle never drops below
+        """
+
+        self.max_requests_per_second = requests_per_second
+        self.min_requests_per_second = min(min_requests_per_second, requests_per_second)
+        self.max_concurrency = max_concurrency
+
+        # current (adaptive) limits
+        self.requests_per_second = requests_per_second
+        self.concurrency = max_concurrency
+
+        # token bucket (burst of up to one second of requests)
+        self.tokens = 1.0
+        self.token_datetime = time.monotonic()
+        self.pause_until = 0.0
+
+        self.in_flight = 0
+        self.success_count = 0
+        self.condition = threading.Condition()
+
+    def set_limits(
+        self,
+        requests_per_second: float,
+        max_concurrency: int
+    ):
+        """
+        Arguments:
+        - requests_per_second: Maximum request starts per second
+        - max_concurrency: Maximum number of requests in flight
+
+        Changes maximum limits (current limits are capped to them)
+        """
+
+        with self.condition:
+            self.max_requests_per_second = requests_per_second
+            self.min_requests_per_second = min(self.min_requests_per_second, requests_per_second)
+            self.max_concurrency = max_concurrency
+            self.requests_per_second = min(self.requests_per_second, requests_per_second)
+            self.concurrency = min(self.concurrency, max_concurrency)
+            self.condition.notify_all()
+
+    def acquire(self):
+        """
+        Waits for a concurrency slot and a token
+        """
+
+        with self.condition:
+
+            # wait for concurrency slot
+            while self.in_flight >= self.concurrency:
+                self.condition.wait()
+            self.in_flight += 1
+
+            # wait for token (the slot is held while waiting, so waiters queue up in order)
+            while True:
+                now = time.monotonic()
+                if now < self.pause_until:
+                    wait = self.pause_until - now
+                else:
+                    capacity = max(1.0, self.requests_per_second)
+                    self.tokens = min(capacity, self.tokens + (now - self.token_datetime) * self.requests_per_second)
+                    self.token_datetime = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.requests_per_second
+                self.condition.wait(timeout=wait)
+
+    def release(
+        self,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ):
+        """
+        Arguments:
+        - status_code: HTTP status code of the finished request (None if the request raised)
+        - retry_after: Seconds the host asked us to wait (Retry-After header)
+
+        Frees concurrency slot and adapts limits to the outcome of the request
+        """
+
+        with self.condition:
+
+            self.in_flight -= 1
+
+            if status_code in THROTTLE_STATUS_CODE_LIST:
+                # multiplicative decrease
+                self.requests_per_second = max(self.min_requests_per_second, self.requests_per_second / 2)
+                self.concurrency = max(1, self.concurrency // 2)
+                self.tokens = min(self.tokens, 0.0)
+                self.success_count = 0
+                if retry_after:
+                    self.pause_until = max(self.pause_until, time.monotonic() + retry_after)
+                logging.warning(
+                    f"Throttled ({status_code}) - lowering to {self.requests_per_second:.2f} requests/second, concurrency {self.concurrency}."
+                )
+
+            elif status_code is not None and (200 <= status_code < 300 or status_code == 304):
+                # additive increase (one step per round of successful requests - client errors such as 404 do not count)
+                self.success_count += 1
+                if self.success_count >= self.concurrency:
+                    self.success_count = 0
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self.requests_per_second = min(
+                        self.max_requests_per_second,
+                        self.requests_per_second + self.max_requests_per_second / 10
+                    )
+
+            self.condition.notify_all()
+
+# throttles by host
+_host_throttle_dict = {}
+_host_throttle_lock = threading.Lock()
+_host_throttle_config = {}
+
+def configure_host_throttle(
+    requests_per_second: float,
+    max_concurrency: int
+):
+    """
+    Arguments:
+    - requests_per_second: Maximum request starts per second, per host
+    - max_concurrency: Maximum number of requests in flight, per host
+
+    Sets maximum limits for all hosts (including hosts already throttled)
+    """
+
+    with _host_throttle_lock:
+        _host_throttle_config['requests_per_second'] = requests_per_second
+        _host_throttle_config['max_concurrency'] = max_concurrency
+        for host_throttle in _host_throttle_dict.values():
+            host_throttle.set_limits(
+                requests_per_second=requests_per_second,
+                max_concurrency=max_concurrency
+            )
+
+def get_host_throttle(
+    url: str
+) -> HostThrottle:
+    """
+    Arguments:
+    - url: Url about to be requested
+
+    Returns throttle for the url's host (created on first use)
+    - limits default to SCRAPE_REQUESTS_PER_SECOND (default 5) and SCRAPE_MAX_CONCURRENCY (default 10)
+    """
+
+    host = urlparse(url).netloc
+
+    with _host_throttle_lock:
+        if host not in _host_throttle_dict:
+            _host_throttle_dict[host] = HostThrottle(
+                requests_per_second=_host_throttle_config.get(
+                    'requests_per_second', float(os.getenv('SCRAPE_REQUESTS_PER_SECOND', 5))
+                ),
+                max_concurrency=_host_throttle_config.get(
+                    'max_concurrency', int(os.getenv('SCRAPE_MAX_CONCURRENCY', 10))
+                )
+            )
+
+        return _host_throttle_dict[host]
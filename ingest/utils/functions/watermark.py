@@ -0,0 +1,82 @@
+from typing import (
+    Optional,
+    Set,
+)
+import json
+import logging
+import os
+import uuid
+
+def get_watermark_dir() -> Optional[str]:
+    """
+    Returns directory holding local watermarks (set by INGEST_WATERMARK_DIR), or None if watermarks are disabled
+    """
+
+    watermark_dir = os.getenv('INGEST_WATERMARK_DIR')
+
+    return watermark_dir or None
+
+def get_watermark_path(
+    watermark_dir: str,
+    name: str
+) -> str:
+    """
+    Arguments:
+    - watermark_dir: Watermark directory
+    - name: Watermark name (e.g. schema.table)
+
+    Returns path to the watermark file
+    """
+
+    return os.path.join(watermark_dir, f"{name}.json")
+
+def read_watermark(
+    name: str
+) -> Set[str]:
+    """
+    Arguments:
+    - name: Watermark name (e.g. schema.table)
+
+    Returns set of keys already confirmed as ingested (empty if watermarks are disabled or none were recorded)
+    """
+
+    watermark_dir = get_watermark_dir()
+    if watermark_dir is None:
+        return set()
+
+    try:
+        with open(get_watermark_path(watermark_dir=watermark_dir, name=name), 'r') as f:
+            key_set = set(json.load(f))
+    except (FileNotFoundError, ValueError):
+        return set()
+
+    logging.info(f"Read watermark {name} with {len(key_set)} keys.")
+
+    return key_set
+
+def write_watermark(
+    name: str,
+    key_set: Set[str]
+):
+    """
+    Arguments:
+    - name: Watermark name (e.g. schema.table)
+    - key_set: Set of keys confirmed as ingested
+
+    Stores watermark (no-op if watermarks are disabled)
+    """
+
+    watermark_dir = get_watermark_dir()
+    if watermark_dir is None:
+        return
+
+    path = get_watermark_path(watermark_dir=watermark_dir, name=name)
+    os.makedirs(watermark_dir, exist_ok=True)
+
+    # write via temporary file so an interrupted run never leaves a partial watermark
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(sorted(key_set), f)
+    os.replace(temp_path, path)
+
+    logging.info(f"Wrote watermark {name} with {len(key_set)} keys.")
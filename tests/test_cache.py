@@ -0,0 +1,54 @@
+from ingest.utils.functions import cache
+from ingest.utils.functions.cache import (
+    evict_cache,
+    get_cache_entry,
+    get_cache_entry_path,
+    put_cache_entry,
+)
+import os
+
+def test_cache_entry_round_trip(tmp_path, monkeypatch):
+
+    monkeypatch.setenv('SCRAPE_CACHE_DIR', str(tmp_path))
+
+    put_cache_entry(url='https://example.com/a', body=b'page a', etag='"a"')
+    entry = get_cache_entry(url='https://example.com/a')
+
+    assert entry['body'] == b'page a'
+    assert entry['etag'] == '"a"'
+    assert get_cache_entry(url='https://example.com/b') is None
+
+def test_entry_evicted_after_read_is_still_served(tmp_path, monkeypatch):
+
+    monkeypatch.setenv('SCRAPE_CACHE_DIR', str(tmp_path))
+    put_cache_entry(url='https://example.com/a', body=b'page a')
+    entry_path = get_cache_entry_path(cache_dir=str(tmp_path), url='https://example.com/a')
+
+    # evict entry right after it was read (before it is marked as used)
+    json_load = cache.json.load
+
+    def json_load_then_evict(f):
+        entry = json_load(f)
+        os.remove(entry_path)
+        return entry
+
+    monkeypatch.setattr(cache.json, 'load', json_load_then_evict)
+
+    assert get_cache_entry(url='https://example.com/a')['body'] == b'page a'
+
+def test_eviction_removes_least_recently_used_entries(tmp_path, monkeypatch):
+
+    monkeypatch.setenv('SCRAPE_CACHE_DIR', str(tmp_path))
+    for i, url in enumerate(['https://example.com/old', 'https://example.com/new']):
+        put_cache_entry(url=url, body=os.urandom(1000))
+        entry_path = get_cache_entry_path(cache_dir=str(tmp_path), url=url)
+        os.utime(entry_path, (1000 + i, 1000 + i))
+    for root, _, file_name_list in os.walk(os.path.join(tmp_path, 'objects')):
+        for file_name in file_name_list:
+            os.utime(os.path.join(root, file_name), (1000, 1000))
+
+    evict_cache(cache_dir=str(tmp_path), max_bytes=1500)
+
+    assert get_cache_entry(url='https://example.com/old') is None
+    assert get_cache_entry(url='https://example.com/new') is not None
+    assert sum(len(file_name_list) for _, _, file_name_list in os.walk(os.path.join(tmp_path, 'objects'))) == 1
@@ -0,0 +1,88 @@
+from ingest.utils.functions.pipeline import (
+    run_ingest_pipeline,
+)
+import asyncio
+import time
+
+def run_pipeline(
+    result_iter,
+    load_func,
+    batch_size: int,
+    flush_interval: float,
+    max_queue_size: int = 10
+) -> int:
+    """
+    Runs run_ingest_pipeline with one record per scrape result; returns number of records loaded
+    """
+
+    return asyncio.run(run_ingest_pipeline(
+        result_iter=result_iter,
+        record_func=lambda arg_dict, result: [result] if result is not None else [],
+        load_func=load_func,
+        batch_size=batch_size,
+        flush_interval=flush_interval,
+        max_queue_size=max_queue_size
+    ))
+
+def test_flush_by_batch_size():
+
+    async def result_iter():
+        for i in range(10):
+            yield {'url': i}, i
+        # skipped result
+        yield {'url': 10}, None
+
+    batch_list = []
+    load_count = run_pipeline(result_iter=result_iter(), load_func=batch_list.append, batch_size=4, flush_interval=60)
+
+    assert batch_list == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert load_count == 10
+
+def test_flush_by_interval():
+
+    load_time_list = []
+
+    async def result_iter():
+        yield {'url': 0}, 0
+        await asyncio.sleep(0.3)
+        # first record was loaded while waiting for the next one
+        assert load_time_list
+        yield {'url': 1}, 1
+
+    batch_list = []
+
+    def load_func(batch):
+        load_time_list.append(time.monotonic())
+        batch_list.append(batch)
+
+    start = time.monotonic()
+    load_count = run_pipeline(result_iter=result_iter(), load_func=load_func, batch_size=100, flush_interval=0.1)
+
+    assert batch_list == [[0], [1]]
+    assert load_count == 2
+    assert 0.1 <= load_time_list[0] - start < 0.3
+
+def test_scraping_pauses_when_loads_fall_behind():
+
+    max_queue_size = 2
+    produced_count = 0
+    loaded_count = 0
+    max_lead = 0
+
+    async def result_iter():
+        nonlocal produced_count, max_lead
+        for i in range(20):
+            produced_count += 1
+            max_lead = max(max_lead, produced_count - loaded_count)
+            yield {'url': i}, i
+
+    def load_func(batch):
+        nonlocal loaded_count
+        time.sleep(0.02)
+        loaded_count += len(batch)
+
+    load_count = run_pipeline(result_iter=result_iter(), load_func=load_func, batch_size=1, flush_interval=60, max_queue_size=max_queue_size)
+
+    assert load_count == 20
+    # queued results, plus the batch being loaded and the result waiting to be queued
+    assert max_lead <= max_queue_size + 2
@@ -0,0 +1,36 @@
+from ingest.utils.functions.scrape import (
+    scrape_javascript_var,
+    scrape_javascript_var_dict,
+)
+import pytest
+
+@pytest.mark.parametrize('content, var_dict', [
+    # statements end at ';' or a line break
+    ("var a = 1;\nvar b = 'x;y'\nvar c = [1, ';', {d: 2}];", {'a': '1', 'b': "'x;y'", 'c': "[1, ';', {d: 2}]"}),
+    # regex literals (escapes, character classes and flags)
+    ("var x = /ab;c/;", {'x': '/ab;c/'}),
+    ("var x = /a\\/;b/g; var y = 2;", {'x': '/a\\/;b/g', 'y': '2'}),
+    ("var x = /[/;]+/i;", {'x': '/[/;]+/i'}),
+    ("var x = s.replace(/;/g, '');", {'x': "s.replace(/;/g, '')"}),
+    # divisions
+    ("var x = 6 / 3; var y = (a + b) / 2 / c;", {'x': '6 / 3', 'y': '(a + b) / 2 / c'}),
+    # values continued over line breaks (operator at the end of a line or the start of the next one)
+    ("var x = 'a' +\n  'b';\nvar y = 1", {'x': "'a' +\n  'b'", 'y': '1'}),
+    ("var x = 'a'\n  + 'b'\nvar y = 1", {'x': "'a'\n  + 'b'", 'y': '1'}),
+    ("var x = 'a' + // note\n  'b'\nvar y = 1", {'x': "'a' + // note\n  'b'", 'y': '1'}),
+    ("var x = 'a' /* note */\nvar y = 1", {'x': "'a' /* note */", 'y': '1'}),
+    # line comments end the value
+    ("var x = 1 // note\nvar y = 2", {'x': '1', 'y': '2'}),
+    # closing script tag after a value without ';'
+    ("var x = 1\n</script>", {'x': '1'}),
+])
+def test_javascript_var_dict(content, var_dict):
+
+    assert scrape_javascript_var_dict(content=content) == var_dict
+
+def test_javascript_var_assignment_in_string_is_not_matched():
+
+    content = "var a = 'var b = 1;';\nvar c = 2;"
+
+    assert scrape_javascript_var_dict(content=content) == {'a': "'var b = 1;'", 'c': '2'}
+    assert scrape_javascript_var(content=content, var='c') == '2'
@@ -0,0 +1,83 @@
+from ingest.utils.functions.scrape_async import (
+    scrape_async,
+)
+import asyncio
+import requests
+import threading
+import time
+
+def get_http_error(
+    status_code: int
+) -> requests.HTTPError:
+    """
+    Returns HTTPError of a response with status_code
+    """
+
+    response = requests.Response()
+    response.status_code = status_code
+
+    return requests.HTTPError(f"{status_code} Error", response=response)
+
+async def collect(result_iter):
+
+    return [item async for item in result_iter]
+
+def test_retryable_errors_are_retried_without_holding_fetch_threads():
+
+    attempt_dict = {}
+    lock = threading.Lock()
+
+    def fetch(url):
+        with lock:
+            attempt_dict[url] = attempt_dict.get(url, 0) + 1
+            attempt = attempt_dict[url]
+        if url.startswith('busy') and attempt == 1:
+            raise get_http_error(status_code=503)
+        if url.startswith('missing'):
+            raise get_http_error(status_code=404)
+        return url.upper()
+
+    url_list = [f"busy{i}" for i in range(8)] + [f"ok{i}" for i in range(4)] + ['missing']
+
+    start = time.monotonic()
+    result_list = asyncio.run(collect(scrape_async(
+        func=fetch,
+        arg_dict_list=({'url': url} for url in url_list),
+        url_key='url',
+        max_concurrency=2,
+        requests_per_second=1000,
+        retries=3,
+        delay=0.4
+    )))
+    elapsed = time.monotonic() - start
+
+    result_dict = {arg_dict['url']: result for arg_dict, result in result_list}
+    assert result_dict == {**{url: url.upper() for url in url_list if url != 'missing'}, 'missing': None}
+
+    # retryable errors are attempted again, client errors are not
+    assert all(attempt_dict[f"busy{i}"] == 2 for i in range(8))
+    assert attempt_dict['missing'] == 1
+
+    # backoffs (0.2-0.4 seconds each) overlap, instead of queueing up in the 2 workers (at least 4 * 0.2 seconds)
+    assert elapsed < 0.7
+
+def test_failed_calls_yield_none_after_all_attempts():
+
+    attempt_list = []
+
+    def fetch(url):
+        attempt_list.append(url)
+        raise get_http_error(status_code=503)
+
+    result_list = asyncio.run(collect(scrape_async(
+        func=fetch,
+        arg_dict_list=[{'url': 'down'}],
+        url_key='url',
+        max_concurrency=1,
+        requests_per_second=1000,
+        retries=3,
+        delay=0.01
+    )))
+
+    assert result_list == [({'url': 'down'}, None)]
+    assert len(attempt_list) == 3
@@ -0,0 +1,577 @@
+from ingest.utils.functions import sql
+from ingest.utils.functions.sql import (
+    SQL_TYPE_DICT,
+    ConnectionPool,
+    alter_target_table,
+    get_common_sql_type,
+    get_hash_partition_dict,
+    get_row_hash_sql,
+    infer_sql_type,
+    ingest_df_to_sql,
+    merge_target_table,
+    migrate_target_table,
+)
+import datetime
+import decimal
+import numpy as np
+import pandas as pd
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+class FakeCursor:
+    """
+    Cursor recording the statements executed on its connection
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = 0
+
+    def execute(self, statement, params=None):
+        self.connection.execute(statement=statement, params=params)
+
+    def fetchone(self):
+        return self.connection.fetchone_list.pop(0)
+
+    def fetchall(self):
+        return self.connection.fetchall_list.pop(0)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    """
+    Connection recording statements as (normalized sql, autocommit flag at execution), plus COMMIT/ROLLBACK
+    - fetchone_list: rows returned by fetchone, in order
+    - fetchall_list: row lists returned by fetchall, in order
+    - error_statement_prefix: statements starting with it raise (to test rollbacks and dropped connections)
+    """
+
+    def __init__(self, fetchone_list=None, fetchall_list=None, error_statement_prefix=None):
+        self.autocommit = True
+        self.closed = 0
+        self.info = type('ConnectionInfo', (), {'transaction_status': psycopg2.extensions.TRANSACTION_STATUS_IDLE})()
+        self.statement_list = []
+        self.fetchone_list = list(fetchone_list or [])
+        self.fetchall_list = list(fetchall_list or [])
+        self.params_list = []
+        self.error_statement_prefix = error_statement_prefix
+
+    def execute(self, statement, params=None):
+        statement = ' '.join(statement.split())
+        self.statement_list.append((statement, self.autocommit))
+        self.params_list.append(params)
+        if self.error_statement_prefix and statement.startswith(self.error_statement_prefix):
+            raise psycopg2.OperationalError(f"Failed: {statement}")
+
+    def cursor(self):
+        return FakeCursor(connection=self)
+
+    def commit(self):
+        self.statement_list.append(('COMMIT', self.autocommit))
+
+    def rollback(self):
+        self.statement_list.append(('ROLLBACK', self.autocommit))
+        self.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+    def get_statement_list(self, prefix):
+        return [statement for statement, _ in self.statement_list if statement.startswith(prefix)]
+
+@pytest.fixture
+def table_column_dict(monkeypatch):
+    """
+    Catalog of (schema name, table name) -> column data types, read by the sql functions instead of the database
+    """
+
+    table_column_dict = {}
+    monkeypatch.setattr(sql, 'get_table_column_dict', lambda connection, schema_name, table_name: table_column_dict.get((schema_name, table_name)))
+    monkeypatch.setattr(sql, 'refresh_table', lambda connection, schema_name, table_name: None)
+
+    return table_column_dict
+
+def test_row_hash_sql():
+
+    assert get_row_hash_sql(column_list=['a', 'b'], table_alias='src') == (
+        "MD5(JSONB_STRIP_NULLS(JSONB_BUILD_OBJECT('a', src.a::TEXT, 'b', src.b::TEXT))::TEXT)"
+    )
+
+    # null values are stripped, so a new (null) column does not change the hash; no columns hash an empty object
+    assert get_row_hash_sql(column_list=[], table_alias='src') == "MD5(JSONB_STRIP_NULLS('{}'::JSONB)::TEXT)"
+
+    # jsonb_build_object takes at most 100 arguments -> objects of 50 columns are concatenated
+    row_hash_sql = get_row_hash_sql(column_list=[f"c{i}" for i in range(120)], table_alias='tgt')
+    assert row_hash_sql.count('JSONB_BUILD_OBJECT(') == 3
+    assert row_hash_sql.count(' || ') == 2
+    assert "'c119', tgt.c119::TEXT" in row_hash_sql
+
+@pytest.mark.parametrize('delete_row_flag', [False, True])
+def test_merge_runs_in_one_transaction(table_column_dict, delete_row_flag):
+
+    table_column_dict[('pg_temp', 'points')] = {'match_url': 'text', 'point_number': 'bigint', 'server': 'text'}
+    connection = FakeConnection()
+
+    merge_target_table(
+        connection=connection,
+        target_schema_name='ing',
+        target_table_name='points',
+        source_schema_name='pg_temp',
+        source_table_name='points',
+        unique_column_list=['match_url', 'point_number'],
+        delete_row_flag=delete_row_flag
+    )
+
+    # source statistics are refreshed outside the transaction; delete, update and insert run inside it, then commit once
+    statement_type_list = [(statement.split()[0], autocommit) for statement, autocommit in connection.statement_list]
+    assert statement_type_list == [
+        ('ANALYZE', True),
+        *([('UPDATE', False)] if delete_row_flag else []),
+        ('WITH', False),
+        ('INSERT', False),
+        ('COMMIT', False),
+    ]
+    assert connection.autocommit is True
+
+def test_merge_matches_typed_keys_and_compares_row_hash(table_column_dict):
+
+    table_column_dict[('pg_temp', 'points')] = {'match_url': 'text', 'point_number': 'bigint', 'server': 'text', 'shots': 'bigint'}
+    connection = FakeConnection()
+
+    merge_target_table(
+        connection=connection,
+        target_schema_name='ing',
+        target_table_name='points',
+        source_schema_name='pg_temp',
+        source_table_name='points',
+        unique_column_list=['match_url', 'point_number'],
+        delete_row_flag=True
+    )
+    delete_sql, = connection.get_statement_list('UPDATE')
+    update_sql, = connection.get_statement_list('WITH')
+    insert_sql, = connection.get_statement_list('INSERT')
+    source_row_hash_sql = get_row_hash_sql(column_list=['server', 'shots'], table_alias='src')
+
+    # keys are compared in their own types (no casts, so the active unique index can be used)
+    key_join_sql = 'tgt.match_url = src.match_url AND tgt.point_number = src.point_number'
+    assert key_join_sql in delete_sql
+    assert key_join_sql in update_sql
+    assert 'tgt.match_url::TEXT' not in update_sql and 'CONCAT_WS' not in update_sql
+
+    # changed rows are found by the stored hash of the non-unique columns, and their new version stores the new hash
+    assert f"tgt.audit_field_row_hash IS DISTINCT FROM {source_row_hash_sql}" in update_sql
+    assert f"{source_row_hash_sql} AS audit_field_row_hash" in update_sql
+    assert f"{source_row_hash_sql} AS audit_field_row_hash" in insert_sql
+
+    # only active rows are closed, and inserts skip keys with an active row
+    assert 'tgt.audit_field_active_flag = TRUE' in delete_sql
+    assert 'tgt.audit_field_active_flag = TRUE' in update_sql
+    assert insert_sql.endswith('ON CONFLICT (match_url, point_number) WHERE audit_field_active_flag = TRUE DO NOTHING')
+
+def test_merge_rolls_back_on_error(table_column_dict):
+
+    table_column_dict[('pg_temp', 'points')] = {'match_url': 'text', 'point_number': 'bigint', 'server': 'text'}
+    connection = FakeConnection(error_statement_prefix='INSERT')
+
+    with pytest.raises(psycopg2.OperationalError):
+        merge_target_table(
+            connection=connection,
+            target_schema_name='ing',
+            target_table_name='points',
+            source_schema_name='pg_temp',
+            source_table_name='points',
+            unique_column_list=['match_url', 'point_number'],
+            delete_row_flag=False
+        )
+
+    # the update is rolled back with the failed insert
+    assert [statement.split()[0] for statement, _ in connection.statement_list] == ['ANALYZE', 'WITH', 'INSERT', 'ROLLBACK']
+    assert connection.autocommit is True
+
+def test_source_key_is_cast_to_target_type(table_column_dict):
+
+    table_column_dict[('ing', 'points')] = {'match_url': 'text', 'point_number': 'double precision'}
+    table_column_dict[('pg_temp', 'points')] = {'match_url': 'text', 'point_number': 'bigint'}
+    # source column holds values
+    connection = FakeConnection(fetchone_list=[(True,)])
+
+    alter_target_table(
+        connection=connection,
+        target_schema_name='ing',
+        target_table_name='points',
+        source_schema_name='pg_temp',
+        source_table_name='points',
+        drop_column_flag=False
+    )
+
+    # source key is converted to the (wider) target type, so merges join like types
+    assert connection.get_statement_list('ALTER') == [
+        'ALTER TABLE pg_temp.points ALTER COLUMN point_number TYPE double precision USING point_number::double precision',
+    ]
+
+def migrate_points_table(connection):
+    """
+    Runs migrate_target_table for a points table partitioned on match_url
+    """
+
+    migrate_target_table(
+        connection=connection,
+        target_schema_name='ing',
+        target_table_name='points',
+        source_schema_name='pg_temp',
+        source_table_name='points',
+        unique_column_list=['match_url', 'point_number'],
+        partition_column_name='match_url',
+        partition_count=4
+    )
+
+def test_migration_adds_row_hash_partitions_and_active_index(table_column_dict):
+
+    table_column_dict[('ing', 'points')] = {'match_url': 'text', 'point_number': 'bigint', 'server': 'text', 'audit_field_active_flag': 'boolean'}
+    table_column_dict[('pg_temp', 'points')] = {'match_url': 'text', 'point_number': 'bigint', 'server': 'text'}
+    # target table is a plain (unpartitioned) table; all of its (0) rows are copied and no views depend on it
+    connection = FakeConnection(fetchone_list=[('r',), (0,), (0,)])
+
+    migrate_points_table(connection=connection)
+
+    relkind_sql, *statement_list = [statement for statement, _ in connection.statement_list]
+    assert relkind_sql.startswith('SELECT cls.relkind')
+
+    # statement timeout is lifted for the migration transaction only
+    assert statement_list[0] == "SET LOCAL statement_timeout = '0'"
+    assert statement_list[1] == 'ALTER TABLE ing.points ADD COLUMN audit_field_row_hash TEXT'
+
+    # duplicate active rows are closed (latest kept) before the unique index is built
+    assert statement_list[2] == (
+        'UPDATE ing.points AS tgt SET audit_field_active_flag = FALSE, audit_field_end_datetime_utc = NOW() '
+        'FROM ( SELECT ctid, ROW_NUMBER() OVER (PARTITION BY match_url, point_number ORDER BY audit_field_start_datetime_utc DESC, ctid DESC) AS row_num '
+        'FROM ing.points WHERE audit_field_active_flag = TRUE ) AS dup '
+        'WHERE 1=1 AND tgt.ctid = dup.ctid AND dup.row_num > 1'
+    )
+
+    # active rows get the hash merges compare (over the non-unique source columns)
+    assert statement_list[3] == (
+        f"UPDATE ing.points AS tgt SET audit_field_row_hash = {get_row_hash_sql(column_list=['server'], table_alias='tgt')} "
+        'WHERE tgt.audit_field_active_flag = TRUE'
+    )
+
+    # rows are copied into a hash-partitioned table of the same name, then the old table is dropped
+    assert statement_list[4].startswith('ALTER TABLE ing.points RENAME TO points_unpartitioned;')
+    assert 'CREATE TABLE ing.points (LIKE ing.points_unpartitioned INCLUDING DEFAULTS) PARTITION BY HASH (match_url);' in statement_list[4]
+    assert 'PARTITION OF ing.points FOR VALUES WITH (MODULUS 4, REMAINDER 3);' in statement_list[4]
+    assert statement_list[5] == 'INSERT INTO ing.points SELECT * FROM ing.points_unpartitioned'
+    assert statement_list[6] == 'SELECT COUNT(*) FROM ing.points_unpartitioned'
+    assert statement_list[7] == 'ANALYZE ing.points'
+    assert statement_list[8].startswith('SELECT COUNT(DISTINCT rw.ev_class)')
+    assert statement_list[9] == 'DROP TABLE ing.points_unpartitioned'
+
+    assert statement_list[10] == (
+        'CREATE UNIQUE INDEX IF NOT EXISTS points_active_unique_idx ON ing.points (match_url, point_number) '
+        'INCLUDE (audit_field_row_hash) WHERE audit_field_active_flag = TRUE'
+    )
+
+    # all steps run in one transaction
+    assert [autocommit for _, autocommit in connection.statement_list[1:]] == [False] * 12
+    assert statement_list[11:] == ['COMMIT']
+
+def test_partition_migration_keeps_old_table_with_dependent_views(table_column_dict):
+
+    table_column_dict[('ing', 'points')] = {'match_url': 'text', 'point_number': 'bigint', 'server': 'text', 'audit_field_row_hash': 'text'}
+    # one view depends on the old table
+    connection = FakeConnection(fetchone_list=[('r',), (0,), (1,)])
+
+    migrate_points_table(connection=connection)
+
+    assert connection.get_statement_list('DROP') == []
+    assert connection.statement_list[-1] == ('COMMIT', False)
+
+def test_partition_migration_rolls_back_on_row_count_mismatch(table_column_dict):
+
+    table_column_dict[('ing', 'points')] = {'match_url': 'text', 'point_number': 'bigint', 'server': 'text', 'audit_field_row_hash': 'text'}
+    # old table holds more rows than were copied
+    connection = FakeConnection(fetchone_list=[('r',), (5,)])
+
+    with pytest.raises(ValueError):
+        migrate_points_table(connection=connection)
+
+    assert connection.get_statement_list('DROP') == []
+    assert connection.statement_list[-1] == ('ROLLBACK', False)
+
+def test_migration_is_idempotent(table_column_dict):
+
+    # target table as left by a first migration: row hash column added and partitioned
+    table_column_dict[('ing', 'points')] = {'match_url': 'text', 'point_number': 'bigint', 'server': 'text', 'audit_field_row_hash': 'text'}
+    table_column_dict[('pg_temp', 'points')] = {'match_url': 'text', 'point_number': 'bigint', 'server': 'text'}
+    connection = FakeConnection(fetchone_list=[('p',)])
+
+    migrate_points_table(connection=connection)
+
+    # only the (no-op) index statement runs again
+    statement_list = [statement for statement, _ in connection.statement_list]
+    assert statement_list[0].startswith('SELECT cls.relkind')
+    assert statement_list[1].startswith('SET LOCAL statement_timeout')
+    assert statement_list[2].startswith('CREATE UNIQUE INDEX IF NOT EXISTS points_active_unique_idx')
+    assert statement_list[3:] == ['COMMIT']
+
+@pytest.mark.parametrize('column, sql_type', [
+    (pd.Series([1, 2], dtype='int64'), 'bigint'),
+    (pd.Series([1, None], dtype='Int64'), 'bigint'),
+    (pd.Series([1, None], dtype='object'), 'bigint'),
+    (pd.Series([1.5, np.nan]), 'double precision'),
+    (pd.Series([1, 2.5, None], dtype='object'), 'double precision'),
+    (pd.Series([decimal.Decimal('1.5'), None], dtype='object'), 'numeric'),
+    (pd.Series([True, False]), 'boolean'),
+    (pd.Series([True, None], dtype='object'), 'boolean'),
+    (pd.Series([datetime.date(2024, 1, 1), None], dtype='object'), 'date'),
+    (pd.Series(pd.to_datetime(['2024-01-01', None])), 'timestamp without time zone'),
+    (pd.Series(pd.to_datetime(['2024-01-01', None]).tz_localize('UTC')), 'timestamp with time zone'),
+    (pd.Series([datetime.datetime(2024, 1, 1), None], dtype='object'), 'timestamp without time zone'),
+    (pd.Series([datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc), None], dtype='object'), 'timestamp with time zone'),
+    (pd.Series(['a', None], dtype='object'), 'text'),
+    (pd.Series([1, 'a'], dtype='object'), 'text'),
+    (pd.Series([None, None], dtype='object'), 'text'),
+    (pd.Series([np.nan, np.nan]), 'double precision'),
+])
+def test_infer_sql_type(column, sql_type):
+
+    assert infer_sql_type(column=column) == sql_type
+
+@pytest.mark.parametrize('data_type, other_data_type, common_sql_type', [
+    ('bigint', 'bigint', 'bigint'),
+    ('smallint', 'integer', 'integer'),
+    ('integer', 'bigint', 'bigint'),
+    ('bigint', 'numeric', 'numeric'),
+    ('integer', 'double precision', 'double precision'),
+    ('numeric', 'double precision', 'double precision'),
+    ('boolean', 'bigint', 'text'),
+    ('timestamp without time zone', 'timestamp with time zone', 'text'),
+    ('date', 'text', 'text'),
+    ('double precision', 'text', 'text'),
+])
+def test_get_common_sql_type(data_type, other_data_type, common_sql_type):
+
+    # order of the types does not matter
+    assert get_common_sql_type(data_type=data_type, other_data_type=other_data_type) == common_sql_type
+    assert get_common_sql_type(data_type=other_data_type, other_data_type=data_type) == common_sql_type
+
+def test_sql_type_dict_types_widen_to_text():
+
+    # every inferred type either widens to the other or to text, so altering a column never fails on types
+    for data_type in SQL_TYPE_DICT.values():
+        assert get_common_sql_type(data_type=data_type, other_data_type='text') == 'text'
+        for other_data_type in SQL_TYPE_DICT.values():
+            assert get_common_sql_type(data_type=data_type, other_data_type=other_data_type) in {data_type, other_data_type, 'text'}
+
+@pytest.fixture
+def created_connection_list(monkeypatch):
+    """
+    Connections created by the pool (create_connection returns fake connections)
+    """
+
+    created_connection_list = []
+
+    def create_connection():
+        connection = FakeConnection()
+        created_connection_list.append(connection)
+        return connection
+
+    monkeypatch.setattr(sql, 'create_connection', create_connection)
+
+    return created_connection_list
+
+def test_pool_reuses_connections_up_to_max_size(created_connection_list):
+
+    pool = ConnectionPool(max_size=2)
+
+    connection = pool.getconn()
+    other_connection = pool.getconn()
+    assert connection is not other_connection
+
+    # pool is full
+    assert pool.getconn(blocking=False) is None
+
+    # returned connection is reused (not recreated)
+    pool.putconn(connection=connection)
+    assert pool.getconn(blocking=False) is connection
+    assert len(created_connection_list) == 2
+
+def test_pool_frees_slot_when_connecting_fails(monkeypatch):
+
+    def create_connection():
+        raise psycopg2.OperationalError("Connection refused")
+
+    monkeypatch.setattr(sql, 'create_connection', create_connection)
+    pool = ConnectionPool(max_size=1)
+
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert pool.connection_count == 0
+
+def test_pool_discards_broken_connections(created_connection_list):
+
+    pool = ConnectionPool(max_size=1)
+
+    # closed connection is discarded; its slot is used for a new connection
+    connection = pool.getconn()
+    connection.close()
+    pool.putconn(connection=connection)
+    assert pool.connection_count == 0
+    assert pool.getconn(blocking=False) is not connection
+
+    # connection left in a transaction is rolled back before reuse
+    connection = created_connection_list[-1]
+    connection.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    connection.autocommit = False
+    pool.putconn(connection=connection)
+    assert connection.statement_list == [('ROLLBACK', False)]
+    assert pool.getconn(blocking=False) is connection
+    assert connection.autocommit is True
+
+def test_pool_reconnects_dropped_idle_connections(created_connection_list):
+
+    # idle connections are always pinged
+    pool = ConnectionPool(max_size=1, max_idle_seconds=0)
+    connection = pool.getconn()
+    pool.putconn(connection=connection)
+
+    # connection dropped by the server while idle
+    connection.error_statement_prefix = 'SELECT 1'
+
+    new_connection = pool.getconn()
+    assert new_connection is not connection
+    assert connection.closed
+    assert len(created_connection_list) == 2
+    assert pool.connection_count == 1
+
+    # live idle connection passes the ping and is reused
+    pool.putconn(connection=new_connection)
+    assert pool.getconn() is new_connection
+    assert new_connection.statement_list == [('SELECT 1', True)]
+
+def test_hash_partition_dict(table_column_dict):
+
+    table_column_dict[('ing', 'points')] = {'match_url': 'text', 'point_number': 'bigint'}
+    connection = FakeConnection(fetchall_list=[[('a', 'points_p0'), ('b', 'points_p3')]])
+
+    partition_dict = get_hash_partition_dict(
+        connection=connection,
+        schema_name='ing',
+        table_name='points',
+        column_name='match_url',
+        value_list=['a', 'b']
+    )
+
+    assert partition_dict == {'a': 'points_p0', 'b': 'points_p3'}
+
+    # values are hashed as the partition column type, by the partition bounds of the table
+    statement, = connection.get_statement_list('SELECT')
+    assert 'FROM UNNEST(%(value_list)s::text[]) AS val' in statement
+    assert 'AND inh.inhparent = %(table_name)s::REGCLASS' in statement
+    assert 'AND SATISFIES_HASH_PARTITION(inh.inhparent, bound[1]::INT, bound[2]::INT, val)' in statement
+    assert connection.params_list == [{'value_list': ['a', 'b'], 'table_name': 'ing.points'}]
+
+    # no values or no table -> no partitions (and no query)
+    assert get_hash_partition_dict(connection=connection, schema_name='ing', table_name='points', column_name='match_url', value_list=[]) == {}
+    assert get_hash_partition_dict(connection=connection, schema_name='ing', table_name='games', column_name='match_url', value_list=['a']) == {}
+    assert len(connection.statement_list) == 1
+
+class FakeConnectionPool:
+    """
+    Pool handing out free_connection_count fake connections without waiting, recording returned connections
+    """
+
+    def __init__(self, free_connection_count):
+        self.free_connection_list = [FakeConnection() for _ in range(free_connection_count)]
+        self.returned_connection_list = []
+
+    def getconn(self, blocking=True):
+        assert not blocking
+        return self.free_connection_list.pop(0) if self.free_connection_list else None
+
+    def putconn(self, connection):
+        self.returned_connection_list.append(connection)
+
+@pytest.fixture
+def partition_merge_list(monkeypatch):
+    """
+    Partition merges of ingest_df_to_sql as (connection, partition table name, merged match urls)
+    - the target table is known (schema checks are skipped) and match urls a-e hash to partitions p0-p2 (e is not mapped)
+    """
+
+    partition_merge_list = []
+    temp_table_df_dict = {}
+
+    def create_and_load_table(connection, df, schema_name, table_name, **kwargs):
+        temp_table_df_dict[(connection, table_name)] = df
+
+    def merge_target_table(connection, target_table_name, source_table_name, **kwargs):
+        match_url_list = sorted(temp_table_df_dict[(connection, source_table_name)]['match_url'])
+        partition_merge_list.append((connection, target_table_name, match_url_list))
+
+    monkeypatch.setattr(sql, 'get_verified_column_type_dict', lambda schema_name, table_name, fingerprint: {'match_url': 'text', 'point_number': 'bigint'})
+    monkeypatch.setattr(sql, 'get_hash_partition_dict', lambda connection, schema_name, table_name, column_name, value_list: {
+        'a': 'points_p0', 'b': 'points_p1', 'c': 'points_p2', 'd': 'points_p0',
+    })
+    monkeypatch.setattr(sql, 'create_and_load_table', create_and_load_table)
+    monkeypatch.setattr(sql, 'merge_target_table', merge_target_table)
+
+    return partition_merge_list
+
+def ingest_points_df(connection, connection_pool, partition_connection_count=None):
+    """
+    Runs ingest_df_to_sql for points of match urls a-e into a points table partitioned on match_url
+    """
+
+    ingest_df_to_sql(
+        connection=connection,
+        df=pd.DataFrame({'match_url': ['a', 'b', 'c', 'd', 'e', 'a'], 'point_number': [1, 1, 1, 1, 1, 2]}),
+        target_schema_name='ing',
+        target_table_name='points',
+        temp_schema_name='ing_temp',
+        temp_table_name='points_temp',
+        unique_column_list=['match_url', 'point_number'],
+        drop_column_flag=False,
+        delete_row_flag=False,
+        partition_column_name='match_url',
+        partition_count=3,
+        connection_pool=connection_pool,
+        partition_connection_count=partition_connection_count
+    )
+
+def test_rows_are_merged_into_their_partitions(partition_merge_list):
+
+    connection = FakeConnection()
+    connection_pool = FakeConnectionPool(free_connection_count=1)
+    extra_connection = connection_pool.free_connection_list[0]
+
+    ingest_points_df(connection=connection, connection_pool=connection_pool)
+
+    # each partition is merged once with its rows (unmapped values go to the parent table),
+    # every second partition over the extra connection
+    assert sorted(partition_merge_list, key=lambda partition_merge: partition_merge[1]) == [
+        (connection, 'points', ['e']),
+        (extra_connection, 'points_p0', ['a', 'a', 'd']),
+        (connection, 'points_p1', ['b']),
+        (extra_connection, 'points_p2', ['c']),
+    ]
+    assert connection_pool.returned_connection_list == [extra_connection]
+
+@pytest.mark.parametrize('free_connection_count, partition_connection_count', [(0, None), (3, 0)])
+def test_partitions_are_merged_on_own_connection_without_free_connections(partition_merge_list, free_connection_count, partition_connection_count):
+
+    connection = FakeConnection()
+    connection_pool = FakeConnectionPool(free_connection_count=free_connection_count)
+
+    ingest_points_df(connection=connection, connection_pool=connection_pool, partition_connection_count=partition_connection_count)
+
+    # all partitions are merged, in order, by the calling thread
+    assert [(partition_connection, partition_table_name) for partition_connection, partition_table_name, _ in partition_merge_list] == [
+        (connection, 'points'),
+        (connection, 'points_p0'),
+        (connection, 'points_p1'),
+        (connection, 'points_p2'),
+    ]
+    assert len(connection_pool.free_connection_list) == free_connection_count
+    assert connection_pool.returned_connection_list == []
@@ -0,0 +1,112 @@
+from ingest.utils.functions.tennisabstract.match_pages import (
+    get_match_page_record,
+    parse_match_page_data,
+)
+from ingest.utils.functions.tennisabstract.match_points import (
+    parse_match_point_data,
+)
+from ingest.utils.functions.tennisabstract.matches import (
+    parse_match_data_scraped,
+)
+import os
+import pytest
+
+# small snapshot of match pages (same layout as a SCRAPE_RECORD_PATH snapshot), covering edge cases:
+# nested result tags, spacer rows, entities, no title/result, no pointlog, empty pointlog
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'snapshot')
+CHARTING_PATH = os.path.join(SNAPSHOT_PATH, 'www.tennisabstract.com', 'charting')
+MATCH_PAGE_FILE_NAME_LIST = sorted(os.listdir(CHARTING_PATH))
+
+def read_match_page(
+    file_name: str
+):
+    """
+    Returns match url and page source of a fixture page
+    """
+
+    with open(os.path.join(CHARTING_PATH, file_name), 'r') as f:
+        content = f.read()
+
+    return f"https://www.tennisabstract.com/charting/{file_name}", content
+
+def parse_with(
+    match_url: str,
+    content: str,
+    parser: str
+):
+    """
+    Returns match data and point data (or the exception type raised) of a page, parsed with parser
+    """
+
+    try:
+        match_point_data_list = parse_match_point_data(
+            match_url=match_url,
+            content=content,
+            parser=parser
+        )
+    except Exception as e:
+        match_point_data_list = type(e).__name__
+
+    return parse_match_data_scraped(content=content, parser=parser), match_point_data_list
+
+@pytest.mark.parametrize('file_name', MATCH_PAGE_FILE_NAME_LIST)
+def test_lxml_output_equals_bs4_output(file_name):
+
+    match_url, content = read_match_page(file_name=file_name)
+
+    assert parse_with(match_url, content, 'lxml') == parse_with(match_url, content, 'html.parser')
+
+def test_pointlog_cells():
+
+    match_url, content = read_match_page(file_name='20240102-M-Tour-R32-Coco_Gauff-Novak_Djokovic.html')
+    match_point_data_list = parse_match_point_data(match_url=match_url, content=content)
+
+    # spacer rows are skipped, points are numbered from 1, entities and tags are resolved
+    assert len(match_point_data_list) == 30
+    assert [point['point_number'] for point in match_point_data_list] == list(range(1, 31))
+    assert all(point['server'] in ('Coco Gauff', 'Novak Djokovic') for point in match_point_data_list)
+    assert all('‑' in point['sets'] for point in match_point_data_list)
+    assert not any('<' in point['point_description'] for point in match_point_data_list)
+
+def test_match_result_nested_in_span():
+
+    _, content = read_match_page(file_name='20240215-W-Doha-F-Iga_Swiatek-Elena_Rybakina.html')
+
+    for parser in ('lxml', 'html.parser'):
+        assert parse_match_data_scraped(content=content, parser=parser) == {
+            'match_title': '2024-02-15 Doha F: Iga Swiatek vs Elena Rybakina',
+            'match_result': 'Iga Swiatek d. Elena Rybakina 7-6(8) 6-2',
+        }
+
+@pytest.mark.parametrize('file_name', [
+    '20240320-M-Miami-R64-Jannik_Sinner-Andy_Murray.html',
+    '20240411-W-Charleston-SF-Danielle_Collins-Daria_Kasatkina.html',
+])
+def test_match_page_keeps_url_data(file_name):
+
+    match_url, content = read_match_page(file_name=file_name)
+    match_page_data = parse_match_page_data(match_url=match_url, content=content)
+
+    # match row is kept without a title/result, and without a pointlog
+    assert match_page_data['match_data']['match_url'] == match_url
+    assert match_page_data['match_data']['match_date']
+
+def test_match_page_record_never_replaces_stored_match():
+
+    match_url, content = read_match_page(file_name='20240102-M-Tour-R32-Coco_Gauff-Novak_Djokovic.html')
+    match_page_data = parse_match_page_data(match_url=match_url, content=content)
+
+    # match missing from the matches table: parsed data, or url data if the page failed
+    match_page_record = get_match_page_record(match_url=match_url, match_page_data=match_page_data, match_data_missing_flag=True)
+    assert match_page_record == match_page_data
+    match_page_record = get_match_page_record(match_url=match_url, match_page_data=None, match_data_missing_flag=True)
+    assert match_page_record['match_data']['match_url'] == match_url
+    assert 'match_title' not in match_page_record['match_data']
+    assert match_page_record['match_point_data_list'] == []
+
+    # match already in the matches table (refetched for its points): no match data, whether or not the page failed
+    match_page_record = get_match_page_record(match_url=match_url, match_page_data=match_page_data, match_data_missing_flag=False)
+    assert match_page_record['match_data'] is None
+    assert match_page_record['match_point_data_list'] == match_page_data['match_point_data_list']
+    match_page_record = get_match_page_record(match_url=match_url, match_page_data=None, match_data_missing_flag=False)
+    assert match_page_record == {'match_data': None, 'match_point_data_list': []}
@@ -0,0 +1,26 @@
+from ingest.utils.functions.tennisabstract.point_descriptions import (
+    parse_point_description,
+)
+import os
+import pandas as pd
+
+# point descriptions (edge cases) and the rally data the replaced SQL parsing chain of int_tennisabstract__match_points
+# returned for them (generated by running that chain in Postgres; NULL marks null values, an empty field an empty string)
+GOLDEN_FILE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'point_descriptions.csv')
+
+def test_parser_matches_sql_chain():
+
+    golden_df = pd.read_csv(GOLDEN_FILE_PATH, keep_default_na=False, na_values=['NULL'], dtype='string')
+    for col in ['number_of_shots_in_point', 'rally_length']:
+        golden_df[col] = pd.to_numeric(golden_df[col]).astype('Int64')
+
+    point_description_df = parse_point_description(point_description=golden_df['point_description'])
+
+    # compare values (null values are loaded as NULL whichever null-like value the parser returns)
+    for col in ['number_of_shots_in_point', 'last_shot_in_point', 'point_result', 'rally_length', 'point_winner_rally_role']:
+        pd.testing.assert_series_equal(
+            point_description_df[col].astype(golden_df[col].dtype),
+            golden_df[col],
+            check_names=False,
+            obj=col
+        )
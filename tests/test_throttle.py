@@ -0,0 +1,53 @@
+from ingest.utils.functions.throttle import (
+    HostThrottle,
+)
+
+def request(
+    throttle: HostThrottle,
+    status_code: int,
+    count: int = 1
+):
+    """
+    Runs count requests through throttle, finishing with status_code
+    """
+
+    for _ in range(count):
+        throttle.acquire()
+        throttle.release(status_code=status_code)
+
+def test_throttling_halves_limits():
+
+    throttle = HostThrottle(requests_per_second=1000, max_concurrency=8)
+
+    request(throttle=throttle, status_code=429)
+    assert (throttle.requests_per_second, throttle.concurrency) == (500, 4)
+
+    request(throttle=throttle, status_code=503)
+    assert (throttle.requests_per_second, throttle.concurrency) == (250, 2)
+
+def test_successes_grow_limits_back():
+
+    throttle = HostThrottle(requests_per_second=1000, max_concurrency=8)
+    request(throttle=throttle, status_code=429)
+
+    # one step per round of concurrency successful requests
+    request(throttle=throttle, status_code=200, count=3)
+    assert (throttle.requests_per_second, throttle.concurrency) == (500, 4)
+    request(throttle=throttle, status_code=200)
+    assert (throttle.requests_per_second, throttle.concurrency) == (600, 5)
+    request(throttle=throttle, status_code=304, count=5)
+    assert (throttle.requests_per_second, throttle.concurrency) == (700, 6)
+
+    # never above the maximum limits
+    request(throttle=throttle, status_code=200, count=100)
+    assert (throttle.requests_per_second, throttle.concurrency) == (1000, 8)
+
+def test_client_errors_do_not_grow_limits():
+
+    throttle = HostThrottle(requests_per_second=1000, max_concurrency=8)
+    request(throttle=throttle, status_code=429)
+
+    request(throttle=throttle, status_code=404, count=10)
+    throttle.acquire()
+    throttle.release(status_code=None)
+    assert (throttle.requests_per_second, throttle.concurrency) == (500, 4)